@@ -0,0 +1,222 @@
+import argparse
+import os
+import time
+from tqdm import tqdm
+from .json_excel_conversion import dd_json_to_excel, standardize_excel
+from .parallel import default_workers, iter_pool
+from .scanner import file_signatures
+
+
+def _standardize_one(input_file, output_file, options):
+    """
+    Standardizes one workbook, capturing the error instead of raising it. Runs in a worker process.
+    """
+    try:
+        directory = os.path.dirname(output_file)
+        if directory:
+            # The JSON file (make_json) is written before the workbook creates the directory
+            os.makedirs(directory, exist_ok=True)
+        written = standardize_excel(input_file, output_file, **options)
+        return input_file, written, None
+    except Exception as e:
+        return input_file, False, f"{type(e).__name__}: {e}"
+
+
+def _export_one(output_file, data_dict, engine, skip_unchanged):
+    """
+    Writes one data dictionary workbook, capturing the error instead of raising it. Runs in a worker process.
+    """
+    try:
+        written = dd_json_to_excel(
+            data_dict, output_file, engine=engine, skip_unchanged=skip_unchanged
+        )
+        return output_file, written, None
+    except Exception as e:
+        return output_file, False, f"{type(e).__name__}: {e}"
+
+
+def _run_batch(function, arguments, total, workers, desc):
+    """
+    Runs the calls of a batch in a process pool (see parallel.iter_pool) and reports on them.
+    """
+    if workers is None:
+        workers = default_workers()
+    if total is not None:
+        workers = max(1, min(workers, total))
+
+    start = time.perf_counter()
+    written = 0
+    skipped = 0
+    errors = []
+    results = iter_pool(function, arguments, workers, ordered=False)
+    for file, file_written, error in tqdm(results, total=total, desc=desc, leave=False):
+        if error is not None:
+            errors.append({"File": file, "Error": error})
+        elif file_written:
+            written += 1
+        else:
+            skipped += 1
+    seconds = time.perf_counter() - start
+    files = written + skipped + len(errors)
+    return {
+        "Files": files,
+        "Written": written,
+        "Skipped": skipped,
+        "Failed": len(errors),
+        "Errors": errors,
+        "Seconds": seconds,
+        "Files per Second": files / seconds if seconds > 0 else 0.0,
+        "Workers": workers,
+    }
+
+
+def standardize_directory(
+    input_directory,
+    output_directory=None,
+    files=None,
+    workers=None,
+    make_json=False,
+    find_codes=False,
+    order_codes=False,
+    maintain_columns=False,
+    custom_col_names=None,
+    include_web_sleds_info=False,
+    use_cache=False,
+    engine="xlsxwriter",
+    skip_unchanged=True,
+):
+    """
+    Standardizes every data dictionary workbook in a directory (see standardize_excel), reading, standardizing and
+    writing the workbooks in a process pool. A workbook that fails is reported instead of stopping the run.
+
+    Args:
+        input_directory (str): The directory of data dictionary files.
+        output_directory (str, optional): The directory to write the standardized workbooks to, with the same
+            relative paths. Defaults to None, which overwrites the workbooks in place.
+        files (list[str], optional): The paths (relative to the input directory) of the workbooks to standardize,
+            e.g. the "Added" and "Changed" workbooks of scanner.scan_directory. Defaults to every data dictionary
+            in the input directory.
+        workers (int, optional): The number of worker processes. 1 standardizes in the current process. Defaults
+            to one per CPU core.
+        make_json, find_codes, order_codes, maintain_columns, custom_col_names, include_web_sleds_info, use_cache:
+            See standardize_excel.
+        engine (str, optional): The workbook writer, "pandas" or "xlsxwriter" (see dd_json_to_excel). Defaults to
+            "xlsxwriter", which writes the same workbooks faster.
+        skip_unchanged (bool, optional): Whether or not to leave the workbooks whose content would not change as
+            they are (see dd_json_to_excel), so they are not synced again. Defaults to True.
+
+    Returns:
+        dict: A report of the run: the number of "Files", the number "Written", "Skipped" (unchanged) and "Failed",
+            the "Errors" ({"File": file, "Error": error} dicts), the "Seconds" the run took, the "Files per Second"
+            processed and the number of "Workers".
+    """
+    if output_directory is None:
+        output_directory = input_directory
+    if files is None:
+        files = list(file_signatures(input_directory))
+    options = {
+        "make_json": make_json,
+        "find_codes": find_codes,
+        "order_codes": order_codes,
+        "maintain_columns": maintain_columns,
+        "custom_col_names": custom_col_names,
+        "include_web_sleds_info": include_web_sleds_info,
+        "use_cache": use_cache,
+        "engine": engine,
+        "skip_unchanged": skip_unchanged,
+    }
+    arguments = (
+        (
+            os.path.join(input_directory, rel_path),
+            os.path.join(output_directory, rel_path),
+            options,
+        )
+        for rel_path in files
+    )
+    return _run_batch(
+        _standardize_one, arguments, len(files), workers, f"Standardizing {input_directory}"
+    )
+
+
+def export_data_dicts(
+    data_dicts, total=None, workers=None, engine="xlsxwriter", skip_unchanged=True
+):
+    """
+    Writes data dictionaries to Excel workbooks (see dd_json_to_excel) in a process pool. A workbook that fails
+    is reported instead of stopping the run.
+
+    Args:
+        data_dicts (iterable): (output file, data dictionary) tuples. They are only taken from the iterable a few
+            at a time, so a generator keeps only the data dictionaries being written in memory.
+        total (int, optional): The number of data dictionaries, for the progress bar. Defaults to len(data_dicts)
+            when it has a length.
+        workers (int, optional): The number of worker processes. 1 writes in the current process. Defaults to one
+            per CPU core.
+        engine (str, optional): The workbook writer, "pandas" or "xlsxwriter" (see dd_json_to_excel). Defaults to
+            "xlsxwriter".
+        skip_unchanged (bool, optional): Whether or not to leave the workbooks whose content would not change as
+            they are (see dd_json_to_excel). Defaults to True.
+
+    Returns:
+        dict: A report of the run (see standardize_directory).
+    """
+    if total is None and hasattr(data_dicts, "__len__"):
+        total = len(data_dicts)
+    arguments = (
+        (output_file, data_dict, engine, skip_unchanged) for output_file, data_dict in data_dicts
+    )
+    return _run_batch(_export_one, arguments, total, workers, "Writing data dictionaries")
+
+
+def print_batch_report(report):
+    """
+    Prints the summary and the errors of a batch run.
+
+    Args:
+        report (dict): The report of standardize_directory or export_data_dicts.
+
+    Returns:
+        None
+    """
+    for error in report["Errors"]:
+        print(f"Error writing {error['File']}: {error['Error']}")
+    print(
+        f"Wrote {report['Written']} of {report['Files']} workbooks in {report['Seconds']:.1f}s"
+        f" ({report['Files per Second']:.1f} per second, {report['Workers']} workers),"
+        f" skipped {report['Skipped']} unchanged, {report['Failed']} failed"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Standardize every data dictionary workbook in directories"
+    )
+    parser.add_argument("directories", nargs="+", help="Directories of data dictionaries")
+    parser.add_argument(
+        "--output", help="Write the standardized workbooks under this directory instead of in place"
+    )
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--find-codes", action="store_true", help="Find the codes in the SQL tables")
+    parser.add_argument("--order-codes", action="store_true", help="Sort the code sheets")
+    parser.add_argument(
+        "--rewrite", action="store_true", help="Write every workbook, even if its content is unchanged"
+    )
+    args = parser.parse_args()
+
+    failed = 0
+    for directory in args.directories:
+        output_directory = None
+        if args.output:
+            output_directory = os.path.join(args.output, os.path.basename(os.path.normpath(directory)))
+        report = standardize_directory(
+            directory,
+            output_directory,
+            workers=args.workers,
+            find_codes=args.find_codes,
+            order_codes=args.order_codes,
+            skip_unchanged=not args.rewrite,
+        )
+        print_batch_report(report)
+        failed += report["Failed"]
+    if failed:
+        raise SystemExit(1)
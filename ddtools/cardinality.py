@@ -0,0 +1,220 @@
+import pyodbc
+from .sql_connections import get_connection_pool
+
+# Fields estimated to have more distinct values than this are not code fields (e.g. free text or IDs)
+DEFAULT_MAX_CODES = 10000
+
+# The percentage of the table's pages read by the TABLESAMPLE probe
+DEFAULT_SAMPLE_PERCENT = 1
+
+# The number of rows read by the probe of views, which cannot be sampled by pages
+DEFAULT_SAMPLE_ROWS = 100000
+
+# A field whose sampled values are mostly unique is ID-like, so its distinct values grow with the table
+UNIQUE_RATIO = 0.5
+
+# The distinct values of the leading column of each statistics object, from its histogram: every step is one
+# value plus the distinct values in the range below it
+STATISTICS_QUERY = """
+    SELECT c.name, MAX(h.distinct_values)
+    FROM sys.stats_columns AS sc
+    JOIN sys.columns AS c ON c.object_id = sc.object_id AND c.column_id = sc.column_id
+    CROSS APPLY (
+        SELECT COUNT(*) + SUM(distinct_range_rows) AS distinct_values
+        FROM sys.dm_db_stats_histogram(sc.object_id, sc.stats_id)
+    ) AS h
+    WHERE sc.object_id = OBJECT_ID(?) AND sc.stats_column_id = 1 AND h.distinct_values IS NOT NULL
+    GROUP BY c.name
+"""
+
+# The SQLSTATEs of a statistics query the server cannot answer: sys.dm_db_stats_histogram does not exist (before
+# SQL Server 2016 SP1) or the login may not read statistics
+STATISTICS_UNAVAILABLE_STATES = ("42S02", "42000")
+
+
+def sample_sources(table, sample_percent=DEFAULT_SAMPLE_PERCENT):
+    """
+    Returns the FROM clauses that sample a table, to try in order: a TABLESAMPLE of the table's pages, and the
+    first DEFAULT_SAMPLE_ROWS rows for views, which cannot be sampled by pages.
+
+    Args:
+        table (str): The quoted name of the table, e.g. [database].[view].[table].
+        sample_percent (float, optional): The percentage of the table to sample. Defaults to 1.
+
+    Returns:
+        list[tuple]: (FROM clause, whether or not the sample is spread over the whole table) tuples.
+    """
+    return [
+        (f"{table} TABLESAMPLE ({float(sample_percent)} PERCENT)", True),
+        (f"(SELECT TOP ({DEFAULT_SAMPLE_ROWS}) * FROM {table}) AS sample", False),
+    ]
+
+
+def _tablesample_rejected(error):
+    """
+    Returns:
+        bool: Whether or not a pyodbc.Error is the database rejecting a TABLESAMPLE clause (e.g. error 494 on a
+            view), rather than a failure of the query itself such as a timeout or a cancellation.
+    """
+    return any("TABLESAMPLE" in str(arg).upper() for arg in error.args)
+
+
+def _statistics_unavailable(error):
+    """
+    Returns:
+        bool: Whether or not a pyodbc.Error is the server having no statistics histograms or not letting the login
+            read them, rather than a failure of the connection or the query such as a timeout or a cancellation.
+    """
+    return bool(error.args) and error.args[0] in STATISTICS_UNAVAILABLE_STATES
+
+
+def fetch_sample(cursor, table, select, sample_percent=DEFAULT_SAMPLE_PERCENT):
+    """
+    Runs a query on a sample of a table (see sample_sources), falling back to the first rows of the table if the
+    database rejects the TABLESAMPLE clause. Other errors are raised.
+
+    Args:
+        cursor (pyodbc.Cursor): The cursor to query through.
+        table (str): The quoted name of the table, e.g. [database].[view].[table].
+        select (callable): Builds the query from the FROM clause of the sample.
+        sample_percent (float, optional): The percentage of the table to sample. Defaults to 1.
+
+    Returns:
+        tuple: The rows of the query and whether or not the sample is spread over the whole table.
+    """
+    sources = sample_sources(table, sample_percent)
+    for i, (source, spread) in enumerate(sources):
+        try:
+            cursor.execute(select(source))
+            return cursor.fetchall(), spread
+        except pyodbc.Error as e:
+            if i == len(sources) - 1 or not _tablesample_rejected(e):
+                raise
+
+
+def statistics_code_counts(server_name, database_name, view_name, table_name, pool=None):
+    """
+    Estimates the number of distinct values of the fields of a table from the histograms of its SQL Server
+    statistics, which reads no rows of the table. Only fields that lead a statistics object (an index or an auto
+    created statistic) have an estimate. Views and servers older than SQL Server 2016 SP1 (without
+    sys.dm_db_stats_histogram) have no estimates.
+
+    Args:
+        server_name (str): The name of the server where the database is located.
+        database_name (str): The name of the database where the table is located.
+        view_name (str): The name of the view where the table is located.
+        table_name (str): The name of the table.
+        pool (ConnectionPool, optional): The pool of SQL connections to query through. Defaults to the shared
+            pool (see sql_connections.get_connection_pool).
+
+    Returns:
+        dict: The estimated number of distinct values, keyed by the lowercase field name. Empty if the server has
+            no statistics histograms or the login may not read them; other errors are raised.
+    """
+    if pool is None:
+        pool = get_connection_pool()
+    with pool.cursor(server_name, database_name) as cursor:
+        try:
+            cursor.execute(STATISTICS_QUERY, f"[{view_name}].[{table_name}]")
+            rows = cursor.fetchall()
+        except pyodbc.Error as e:
+            if not _statistics_unavailable(e):
+                raise
+            return {}
+    return {row[0].lower(): int(row[1]) for row in rows}
+
+
+def sample_code_counts(
+    server_name,
+    database_name,
+    view_name,
+    table_name,
+    field_names,
+    sample_percent=DEFAULT_SAMPLE_PERCENT,
+    pool=None,
+):
+    """
+    Estimates the number of distinct values of fields by counting them in a TABLESAMPLE of the table's pages, in
+    one query for every field. The count in the sample is a lower bound, except for fields whose sampled values
+    are mostly unique (IDs or free text), which are extrapolated to the whole table. Views cannot be sampled by
+    pages, so their first rows are probed instead (DEFAULT_SAMPLE_ROWS), which only gives a lower bound.
+
+    Args:
+        server_name (str): The name of the server where the database is located.
+        database_name (str): The name of the database where the table is located.
+        view_name (str): The name of the view where the table is located.
+        table_name (str): The name of the table.
+        field_names (list[str]): The names of the fields to estimate.
+        sample_percent (float, optional): The percentage of the table to sample. Defaults to 1.
+        pool (ConnectionPool, optional): The pool of SQL connections to query through. Defaults to the shared
+            pool (see sql_connections.get_connection_pool).
+
+    Returns:
+        dict: The estimated number of distinct values keyed by field name, or None for every field if the sample
+            is empty (tables of a few pages, which are cheap to scan anyway).
+    """
+    field_names = list(dict.fromkeys(field_names))
+    if not field_names:
+        return {}
+    if pool is None:
+        pool = get_connection_pool()
+
+    counts = ", ".join(f"COUNT(DISTINCT [{field_name}])" for field_name in field_names)
+    table = f"[{database_name}].[{view_name}].[{table_name}]"
+    with pool.cursor(server_name, database_name) as cursor:
+        rows, extrapolate = fetch_sample(
+            cursor, table, lambda source: f"SELECT COUNT(*), {counts} FROM {source}", sample_percent
+        )
+
+    row = rows[0]
+    sampled_rows = row[0]
+    if not sampled_rows:
+        return {field_name: None for field_name in field_names}
+    estimates = {}
+    for field_name, distinct_values in zip(field_names, row[1:]):
+        if extrapolate and distinct_values > sampled_rows * UNIQUE_RATIO:
+            distinct_values = int(distinct_values * 100 / sample_percent)
+        estimates[field_name] = distinct_values
+    return estimates
+
+
+def estimate_code_counts(
+    server_name,
+    database_name,
+    view_name,
+    table_name,
+    field_names,
+    sample_percent=DEFAULT_SAMPLE_PERCENT,
+    pool=None,
+):
+    """
+    Estimates the number of distinct values of fields cheaply, before selecting them: from the table's statistics
+    where they cover a field (see statistics_code_counts), and from a TABLESAMPLE probe for the other fields (see
+    sample_code_counts).
+
+    Args:
+        server_name (str): The name of the server where the database is located.
+        database_name (str): The name of the database where the table is located.
+        view_name (str): The name of the view where the table is located.
+        table_name (str): The name of the table.
+        field_names (list[str]): The names of the fields to estimate.
+        sample_percent (float, optional): The percentage of the table to sample. Defaults to 1.
+        pool (ConnectionPool, optional): The pool of SQL connections to query through. Defaults to the shared
+            pool (see sql_connections.get_connection_pool).
+
+    Returns:
+        dict: The estimated number of distinct values keyed by field name, None if there is no estimate.
+    """
+    statistics = statistics_code_counts(server_name, database_name, view_name, table_name, pool)
+    estimates = {
+        field_name: statistics[field_name.lower()]
+        for field_name in field_names
+        if field_name.lower() in statistics
+    }
+    unestimated = [field_name for field_name in field_names if field_name not in estimates]
+    estimates.update(
+        sample_code_counts(
+            server_name, database_name, view_name, table_name, unestimated, sample_percent, pool
+        )
+    )
+    return estimates
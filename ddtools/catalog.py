@@ -0,0 +1,372 @@
+import argparse
+import json
+import math
+import os
+import posixpath
+import re
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from xml.etree.ElementTree import iterparse
+from .parallel import default_workers
+from .scanner import list_files, scan_directory
+from .xlsx_reader import NA_STRINGS
+
+# The relationship type of the shared strings part
+SHARED_STRINGS_TYPE = "/sharedStrings"
+
+_CELL_REF_RE = re.compile(r"([A-Z]+)(\d+)")
+
+
+def _local(tag):
+    """
+    The tag name without the namespace (the spreadsheetml namespace differs between transitional and strict files).
+    """
+    return tag.rsplit("}", 1)[-1]
+
+
+def _attribute(element, name):
+    """
+    An attribute by its name without the namespace (e.g. the r:id of a sheet).
+    """
+    for key, value in element.attrib.items():
+        if _local(key) == name:
+            return value
+    return None
+
+
+def _column_number(letters):
+    number = 0
+    for letter in letters:
+        number = number * 26 + ord(letter) - ord("A") + 1
+    return number
+
+
+def _part_path(target):
+    """
+    The path in the zip file of a relationship target of the workbook.
+    """
+    if target.startswith("/"):
+        return target[1:]
+    return posixpath.normpath(posixpath.join("xl", target))
+
+
+class _SharedStrings:
+    """
+    The shared strings of a workbook, parsed only as far as the strings that are looked up. The Info and Uses
+    cells are among the first strings, so scans rarely parse the whole (large) table.
+    """
+
+    def __init__(self, archive, path):
+        self._strings = []
+        self._parser = None
+        if path in archive.namelist():
+            self._file = archive.open(path)
+            self._parser = iterparse(self._file, events=("start", "end"))
+
+    def __getitem__(self, index):
+        in_phonetic = 0
+        text = []
+        while index >= len(self._strings) and self._parser is not None:
+            event, element = next(self._parser, (None, None))
+            if event is None:
+                self._parser = None
+                self._file.close()
+                break
+            tag = _local(element.tag)
+            if tag == "rPh":
+                # Phonetic hints are not part of the text
+                in_phonetic += 1 if event == "start" else -1
+            elif event == "end" and tag == "t" and not in_phonetic:
+                text.append(element.text or "")
+            elif event == "end" and tag == "si":
+                self._strings.append("".join(text))
+                text = []
+                element.clear()
+        return self._strings[index]
+
+    def close(self):
+        if self._parser is not None:
+            self._file.close()
+            self._parser = None
+
+
+def _cell_value(element, shared_strings):
+    """
+    Converts a <c> element the way pandas reads the cell with openpyxl (see xlsx_reader._convert_cell). Cells
+    without a value are None.
+    """
+    cell_type = element.get("t", "n")
+    value = None
+    for child in element:
+        tag = _local(child.tag)
+        if tag == "v":
+            value = child.text
+        elif tag == "is":
+            value = "".join(t.text or "" for t in child.iter() if _local(t.tag) == "t")
+    if value is None:
+        return None
+    if cell_type == "s":
+        return shared_strings[int(value)]
+    if cell_type == "e":
+        return math.nan
+    if cell_type == "b":
+        return value == "1"
+    if cell_type == "n":
+        number = float(value)
+        return int(number) if number.is_integer() else number
+    return value
+
+
+def _iter_rows(archive, path, shared_strings, max_row=None, columns=None):
+    """
+    Streams the rows of a worksheet as (row number, {column number: value}), stopping after max_row.
+    Only the columns in columns (a set of column numbers) are converted, if given.
+
+    The r attribute of rows and cells is optional (some writers leave it out): a row or cell without one follows
+    the previous row or cell.
+    """
+    row_number = 0
+    with archive.open(path) as f:
+        for _, element in iterparse(f):
+            if _local(element.tag) != "row":
+                continue
+            row_ref = element.get("r")
+            row_number = int(row_ref) if row_ref else row_number + 1
+            if max_row is not None and row_number > max_row:
+                break
+            values = {}
+            column = 0
+            for cell in element:
+                if _local(cell.tag) != "c":
+                    continue
+                cell_ref = cell.get("r")
+                match = _CELL_REF_RE.match(cell_ref) if cell_ref else None
+                column = _column_number(match.group(1)) if match else column + 1
+                if columns is None or column in columns:
+                    values[column] = _cell_value(cell, shared_strings)
+            element.clear()
+            yield row_number, values
+
+
+def _is_null(value):
+    """
+    Whether or not pandas would read a converted cell as a missing value.
+    """
+    if value is None:
+        return True
+    if isinstance(value, str):
+        return value in NA_STRINGS
+    return isinstance(value, float) and math.isnan(value)
+
+
+def _table_type(data_dictionary_for, table_type):
+    """
+    The table type, like dd_excel_to_json: the "(Data Table)"/"(Reference Table)" cell without the parentheses,
+    or guessed from the table name when the cell is empty.
+    """
+    if _is_null(table_type):
+        table_name = data_dictionary_for.split(".")[-1]
+        if "type" in table_name.lower():
+            return "Reference Table"
+        return "Data Table"
+    return table_type.replace("(", "").replace(")", "")
+
+
+def _field_names(archive, path, shared_strings):
+    """
+    The non-empty values of the 'Field Name' column of the Data Dictionary sheet, with leading/trailing
+    whitespace stripped.
+    """
+    rows = _iter_rows(archive, path, shared_strings)
+    header_row, header = next(rows, (None, {}))
+    rows.close()
+    column = None
+    for number, name in sorted(header.items()):
+        if isinstance(name, str) and name.strip() == "Field Name":
+            column = number
+            break
+    if column is None:
+        return []
+
+    field_names = []
+    for row_number, values in _iter_rows(archive, path, shared_strings, columns={column}):
+        value = values.get(column)
+        if row_number > header_row and value is not None:
+            value = value.strip() if isinstance(value, str) else str(value)
+            if value:
+                field_names.append(value)
+    return field_names
+
+
+def scan_metadata(input_file, field_names=False):
+    """
+    Reads the table a data dictionary workbook describes from the Info and Uses sheet, without parsing the
+    rest of the workbook like dd_excel_to_json. Only the XML of the cells needed is read (openpyxl would parse the
+    styles and every sheet's dimensions first), which makes a scan many times faster than loading the workbook.
+
+    Args:
+        input_file (str): The path to the workbook.
+        field_names (bool, optional): Whether or not to also read the field names from the Data Dictionary
+            sheet. Defaults to False.
+
+    Returns:
+        dict: The "File", "Data Dictionary For" and "Table Type" (the same values dd_excel_to_json gives), and
+            the "Field Names" (list[str]) if requested.
+    """
+    with zipfile.ZipFile(input_file) as archive:
+        with archive.open("xl/_rels/workbook.xml.rels") as f:
+            relationships = {
+                element.get("Id"): element
+                for _, element in iterparse(f)
+                if _local(element.tag) == "Relationship"
+            }
+        with archive.open("xl/workbook.xml") as f:
+            sheets = {
+                element.get("name"): _part_path(
+                    relationships[_attribute(element, "id")].get("Target")
+                )
+                for _, element in iterparse(f)
+                if _local(element.tag) == "sheet"
+            }
+        shared_strings_path = next(
+            (
+                _part_path(element.get("Target"))
+                for element in relationships.values()
+                if element.get("Type", "").endswith(SHARED_STRINGS_TYPE)
+            ),
+            "xl/sharedStrings.xml",
+        )
+        shared_strings = _SharedStrings(archive, shared_strings_path)
+
+        try:
+            if "Info and Uses" not in sheets:
+                raise ValueError("Worksheet named 'Info and Uses' not found")
+            # The table is in the second row and the table type in the third, under the header
+            cells = {
+                row_number: values.get(1)
+                for row_number, values in _iter_rows(
+                    archive, sheets["Info and Uses"], shared_strings, max_row=3, columns={1}
+                )
+            }
+            data_dictionary_for = cells.get(2)
+            if _is_null(data_dictionary_for):
+                data_dictionary_for = ""
+            metadata = {
+                "File": input_file,
+                "Data Dictionary For": data_dictionary_for,
+                "Table Type": _table_type(data_dictionary_for, cells.get(3)),
+            }
+            if field_names:
+                if "Data Dictionary" not in sheets:
+                    raise ValueError("Worksheet named 'Data Dictionary' not found")
+                metadata["Field Names"] = _field_names(
+                    archive, sheets["Data Dictionary"], shared_strings
+                )
+        finally:
+            shared_strings.close()
+    return metadata
+
+
+def _scan_one(file, field_names):
+    """
+    Scans one workbook, capturing the error instead of raising it. Runs in a worker process.
+    """
+    try:
+        return scan_metadata(file, field_names), None
+    except Exception as e:
+        return None, {"File": file, "Error": f"{type(e).__name__}: {e}"}
+
+
+def build_catalog(files, field_names=False, workers=None):
+    """
+    Scans the Info and Uses sheet of many data dictionary workbooks (see scan_metadata), in a process pool. For
+    listing or grouping tables (servers, databases, table types), this is much faster than loading the data
+    dictionaries.
+
+    Args:
+        files (list[str]): The paths of the workbooks.
+        field_names (bool, optional): Whether or not to also read the field names. Defaults to False.
+        workers (int, optional): The number of worker processes. 1 scans in the current process. Defaults to one
+            per CPU core.
+
+    Returns:
+        tuple: The catalog, a list of scan_metadata dicts sorted by "Data Dictionary For" (then file), and a list of
+            {"File": file, "Error": error} dicts for the workbooks that could not be scanned.
+    """
+    files = list(files)
+    if workers is None:
+        workers = default_workers()
+    workers = min(workers, len(files))
+
+    if workers <= 1:
+        results = [_scan_one(file, field_names) for file in files]
+    else:
+        # Workbooks are scanned in chunks, since one scan is too quick to be worth a round trip per file
+        chunksize = max(1, len(files) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(
+                executor.map(_scan_one, files, [field_names] * len(files), chunksize=chunksize)
+            )
+
+    catalog = [metadata for metadata, error in results if error is None]
+    errors = [error for metadata, error in results if error is not None]
+    catalog.sort(key=lambda metadata: (str(metadata["Data Dictionary For"]), metadata["File"]))
+    return catalog, errors
+
+
+def catalog_directory(directory, workers=None):
+    """
+    Catalogs the data dictionary workbooks of a directory like build_catalog, but only scans the workbooks that
+    were added or changed since the directory was last scanned. The tables of the other workbooks are kept in the
+    directory's scan manifest (see scanner.scan_directory).
+
+    Args:
+        directory (str): The directory of data dictionary files.
+        workers (int, optional): The number of worker processes. Defaults to one per CPU core.
+
+    Returns:
+        list[dict]: The "File", "Data Dictionary For" and "Table Type" of each workbook, sorted by "Data
+            Dictionary For" (then file). Workbooks that could not be scanned are left out.
+    """
+    scan = scan_directory(directory, metadata=True, workers=workers)
+    catalog = [
+        {
+            "File": os.path.join(directory, rel_path),
+            "Data Dictionary For": entry["Data Dictionary For"],
+            "Table Type": entry["Table Type"],
+        }
+        for rel_path, entry in scan["Files"].items()
+        if "Data Dictionary For" in entry
+    ]
+    catalog.sort(key=lambda metadata: (str(metadata["Data Dictionary For"]), metadata["File"]))
+    return catalog
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Catalog the tables of data dictionary workbooks")
+    parser.add_argument("directories", nargs="+", help="Directories of data dictionaries")
+    parser.add_argument("--field-names", action="store_true", help="Also read the field names")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--output", help="Write the catalog to this JSON file instead of printing it")
+    args = parser.parse_args()
+
+    if args.field_names:
+        files = []
+        for directory in args.directories:
+            files.extend(list_files(directory))
+        catalog, errors = build_catalog(files, args.field_names, args.workers)
+        for error in errors:
+            print(f"Error scanning {error['File']}: {error['Error']}")
+    else:
+        # Only the workbooks that changed since the last run are scanned
+        catalog = []
+        for directory in args.directories:
+            catalog.extend(catalog_directory(directory, args.workers))
+        catalog.sort(key=lambda metadata: (str(metadata["Data Dictionary For"]), metadata["File"]))
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(json.dumps(catalog, indent=4))
+        print(f"Cataloged {len(catalog)} tables")
+    else:
+        for metadata in catalog:
+            print(f"{metadata['Data Dictionary For']}\t{metadata['Table Type']}")
@@ -0,0 +1,268 @@
+import os
+import numpy as np
+import pandas as pd
+from .corpus_store import corpus_store_changes, corpus_store_signature, read_corpus_table
+from .parallel import iter_load_data_dicts
+from .query import CONCAT_COLUMN, And, Not, Or, Term, field_text
+from .scanner import file_signatures
+from .search_index import iter_code_records, load_search_index
+
+# The table identity columns of a corpus frame (the record columns follow them)
+IDENTITY_COLUMNS = ["File", "Data Dictionary For"]
+
+# Loaded corpus frames keyed by (directory, table), with the file signature they were built from
+_loaded_frames = {}
+
+
+def records_frame(records):
+    """
+    Builds a corpus frame with one row per record and the text of every record column.
+
+    Args:
+        records (iterable): (file path, 'Data Dictionary For', record) tuples.
+
+    Returns:
+        pd.DataFrame: The identity columns followed by the record columns. Columns a record does
+            not have are empty strings.
+    """
+    rows = [
+        {"File": file, "Data Dictionary For": dd_for, **record}
+        for file, dd_for, record in records
+    ]
+    frame = pd.DataFrame(rows, columns=None if rows else IDENTITY_COLUMNS)
+    return _text_frame(frame)
+
+
+def _text_frame(frame):
+    """
+    Converts the record columns of a frame to their searchable text, with empty strings for missing values.
+    """
+    for col in frame.columns:
+        if col not in IDENTITY_COLUMNS:
+            frame[col] = frame[col].map(field_text, na_action="ignore").fillna("")
+    return frame
+
+
+def _iter_index_records(index, directory, table):
+    for rel_path, entry in index["Files"].items():
+        file = os.path.join(directory, rel_path)
+        for record in entry[table]:
+            yield file, entry["Data Dictionary For"], record
+
+
+def _iter_parsed_records(files, table, use_cache, workers):
+    for file, data_dict, error in iter_load_data_dicts(
+        files, workers=workers, use_cache=use_cache
+    ):
+        if error is not None:
+            print(f"Error loading {file}: {error}")
+            continue
+        if table == "Codes":
+            records = iter_code_records(data_dict)
+        else:
+            records = data_dict["Data Dictionary"]
+        for record in records:
+            yield file, data_dict["Data Dictionary For"], record
+
+
+def _refresh_stored_frame(frame, directory, current, changed, table, columns, use_cache, workers):
+    """
+    Replaces the rows of a frame read from a corpus store whose workbooks changed (or were removed) since the store
+    was written with the rows of the parsed workbooks, in directory listing order.
+    """
+    order = {os.path.join(directory, rel_path): i for i, rel_path in enumerate(current)}
+    stale = {os.path.join(directory, rel_path) for rel_path in changed}
+    frame = frame[frame["File"].map(lambda file: file in order and file not in stale)]
+    parsed = records_frame(
+        _iter_parsed_records(
+            [os.path.join(directory, rel_path) for rel_path in changed], table, use_cache, workers
+        )
+    )
+    if columns is not None:
+        parsed = parsed.reindex(columns=IDENTITY_COLUMNS + list(columns), fill_value="")
+    frame = pd.concat([frame, parsed], ignore_index=True).fillna("")
+    frame = frame.sort_values("File", key=lambda files: files.map(order), kind="stable")
+    return frame.reset_index(drop=True)
+
+
+def load_corpus_frame(
+    directory,
+    table="Fields",
+    use_index=True,
+    use_cache=False,
+    workers=None,
+    use_store=True,
+    columns=None,
+):
+    """
+    Loads the records of a directory of data dictionaries into a corpus frame. Frames are kept in
+    memory and only rebuilt when a workbook (or the corpus store or search index) of the directory changes.
+
+    Args:
+        directory (str): The directory of data dictionary files.
+        table (str, optional): The records to load, "Fields" ('Data Dictionary' rows) or "Codes"
+            (code sheet rows). Defaults to "Fields".
+        use_index (bool, optional): Whether or not to load the records from the search index of the directory
+            when it has one. Defaults to True.
+        use_cache (bool, optional): Whether or not to use the parse cache for workbooks that are parsed. Defaults to False.
+        workers (int, optional): The number of processes used to parse workbooks. Defaults to one per CPU core.
+        use_store (bool, optional): Whether or not to load the records from the corpus store of the directory (see
+            corpus_store.py) when it has one, before the search index. The records of workbooks changed since the
+            store was written are parsed instead. Defaults to True.
+        columns (list[str], optional): The record columns needed. Only these are read from a corpus store; frames
+            loaded from the search index or workbooks have every column. Defaults to every column.
+
+    Returns:
+        pd.DataFrame: The corpus frame (see records_frame), in directory listing order.
+    """
+    changes = corpus_store_changes(directory) if use_store else None
+    if changes is not None:
+        current, changed, removed = changes
+        signature = (corpus_store_signature(directory), tuple(map(tuple, current.values())))
+        key = (directory, table, None if columns is None else tuple(columns))
+        loaded = _loaded_frames.get(key)
+        if loaded is not None and loaded[0] == signature:
+            return loaded[1]
+        frame = _text_frame(read_corpus_table(directory, table, columns))
+        if changed or removed:
+            frame = _refresh_stored_frame(
+                frame, directory, current, changed, table, columns, use_cache, workers
+            )
+        _loaded_frames[key] = (signature, frame)
+        return frame
+
+    index = load_search_index(directory, workers=workers) if use_index else None
+    if index is not None:
+        signature = tuple(
+            (rel_path, entry["Size"], entry["Modified"])
+            for rel_path, entry in index["Files"].items()
+        )
+    else:
+        signatures = file_signatures(directory)
+        files = [os.path.join(directory, rel_path) for rel_path in signatures]
+        signature = tuple(signatures.items())
+    signature = (index is not None, signature)
+
+    loaded = _loaded_frames.get((directory, table))
+    if loaded is not None and loaded[0] == signature:
+        return loaded[1]
+
+    if index is not None:
+        records = _iter_index_records(index, directory, table)
+    else:
+        records = _iter_parsed_records(files, table, use_cache, workers)
+    frame = records_frame(records)
+    _loaded_frames[(directory, table)] = (signature, frame)
+    return frame
+
+
+class _FrameEvaluator:
+    """
+    Evaluates the predicate tree of a compiled query over a corpus frame with vectorized string
+    operations. Like the row predicates, AND and OR short-circuit: each child is only evaluated
+    on the rows that are still undecided.
+    """
+
+    def __init__(self, frame, query):
+        self.frame = frame
+        self.query = query
+        self._texts = {}
+
+    def text(self, col):
+        if col not in self._texts:
+            if col == CONCAT_COLUMN:
+                text = None
+                for c in self.query.concat_columns:
+                    text = self.frame[c] if text is None else text + " " + self.frame[c]
+            else:
+                text = self.frame[col]
+            if not self.query.match_case:
+                text = text.str.lower()
+            self._texts[col] = text
+        return self._texts[col]
+
+    def contains(self, col, pattern, rows):
+        """
+        Returns whether the text of a column contains the pattern, for each of the row positions.
+        """
+        text = self.text(col)
+        if len(rows) < len(text):
+            text = text.iloc[rows]
+        return text.str.contains(pattern, regex=False).to_numpy(dtype=bool)
+
+    def mask(self, node, rows):
+        """
+        Returns whether a node matches, for each of the row positions.
+        """
+        if isinstance(node, Term):
+            pattern = self.query.patterns[node.pattern_id]
+            return self._combine(
+                [lambda r, col=col: self.contains(col, pattern, r) for col in node.columns],
+                rows,
+                any_true=True,
+            )
+        if isinstance(node, Not):
+            return ~self.mask(node.child, rows)
+        return self._combine(
+            [lambda r, child=child: self.mask(child, r) for child in node.children],
+            rows,
+            any_true=isinstance(node, Or),
+        )
+
+    def _combine(self, evaluators, rows, any_true):
+        """
+        ORs (any_true) or ANDs the results of evaluators, calling each one only on the rows whose
+        result is not decided yet.
+        """
+        result = np.full(len(rows), not any_true)
+        undecided = np.arange(len(rows))
+        for evaluate in evaluators:
+            if len(undecided) == 0:
+                break
+            matched = evaluate(rows[undecided])
+            decided = matched if any_true else ~matched
+            result[undecided[decided]] = any_true
+            undecided = undecided[~decided]
+        return result
+
+
+def frame_search(frame, query):
+    """
+    Finds the rows of a corpus frame that match a compiled query, with the same results as
+    CompiledQuery.match on each row.
+
+    Args:
+        frame (pd.DataFrame): The corpus frame (see records_frame).
+        query (CompiledQuery): The compiled search query (see query.py).
+
+    Returns:
+        tuple: The boolean mask (np.ndarray) of the matching rows and an array with the matched column of
+            each row (None where the row does not match or no single column can be named).
+    """
+    evaluator = _FrameEvaluator(frame, query)
+    rows = np.arange(len(frame))
+    column = np.full(len(frame), None, dtype=object)
+    root = query.root
+    if isinstance(root, Or) and root.labels is not None:
+        # Each branch is only evaluated on the rows no earlier branch matched
+        mask = np.zeros(len(frame), dtype=bool)
+        for label, child in zip(root.labels, root.children):
+            undecided = rows[~mask]
+            if len(undecided) == 0:
+                break
+            matched = undecided[evaluator.mask(child, undecided)]
+            mask[matched] = True
+            column[matched] = label
+        return mask, column
+
+    mask = evaluator.mask(root, rows)
+    unnamed = rows[mask]
+    for col in query.columns:
+        if len(unnamed) == 0:
+            break
+        has_positive = np.zeros(len(unnamed), dtype=bool)
+        for pattern in query.positive_patterns:
+            has_positive |= evaluator.contains(col, pattern, unnamed)
+        column[unnamed[has_positive]] = col
+        unnamed = unnamed[~has_positive]
+    return mask, column
@@ -0,0 +1,530 @@
+import datetime
+import json
+import os
+from operator import itemgetter
+import pandas as pd
+from .parallel import iter_load_data_dicts
+from .scanner import file_signatures
+
+STORE_DIR_NAME = "dd_corpus_store"
+STORE_VERSION = 2
+MANIFEST_FILE_NAME = "manifest.json"
+
+# The tables of the store. Each has one row per data dictionary, field, code, relationship or FAQ.
+STORE_TABLES = ("Data Dictionaries", "Fields", "Codes", "Relationships", "FAQs")
+
+# The data dictionary keys whose rows are stored in their own table
+NESTED_TABLES = {"Data Dictionary": "Fields", "Relationships": "Relationships", "FAQs": "FAQs"}
+
+# Internal columns linking the rows of the tables (the other columns are the keys of the rows)
+FILE = "_File"  # The path of the workbook of a data dictionary, relative to the directory
+DD_ROW = "_Data Dictionary"  # The row of the data dictionary in the Data Dictionaries table
+FIELD_ROW = "_Field"  # The row of the field of a code in the Fields table
+LAYOUT = "_Layout"  # The keys of the row, in order (a position in the manifest's "Layouts")
+CODE_COUNT = "_Codes"  # The number of codes of a field, or -1 if its 'Acceptable Values' is not a list
+
+# Cell types JSON has no value for, stored as {tag: encoded value} objects (see _encode_cell). Subclasses come
+# before their base classes.
+_TAGGED_TYPES = (
+    ("$timestamp", pd.Timestamp, pd.Timestamp.isoformat, pd.Timestamp),
+    ("$datetime", datetime.datetime, datetime.datetime.isoformat, datetime.datetime.fromisoformat),
+    ("$date", datetime.date, datetime.date.isoformat, datetime.date.fromisoformat),
+    ("$time", datetime.time, datetime.time.isoformat, datetime.time.fromisoformat),
+    ("$timedelta", pd.Timedelta, pd.Timedelta.isoformat, pd.Timedelta),
+    (
+        "$duration",
+        datetime.timedelta,
+        lambda value: [value.days, value.seconds, value.microseconds],
+        lambda parts: datetime.timedelta(*parts),
+    ),
+)
+_DECODERS = {tag: decode for tag, _, _, decode in _TAGGED_TYPES}
+
+# Loaded manifests keyed by store directory, with the manifest file signature they were loaded from
+_loaded_manifests = {}
+
+
+def default_store_dir(directory):
+    """
+    Returns the path of the corpus store for a directory of data dictionaries.
+
+    Args:
+        directory (str): The directory of data dictionary files.
+
+    Returns:
+        str: The path to the store directory in the root of the directory.
+    """
+    return os.path.join(directory, STORE_DIR_NAME)
+
+
+class _TableWriter:
+    """
+    Collects the rows of a table as columns (one list per key). Keys a row does not have are None.
+    """
+
+    def __init__(self, layouts):
+        self.layouts = layouts  # tuple of keys -> position, shared by the tables
+        self.columns = {}
+        self.rows = 0
+
+    def add(self, row, **internal):
+        keys = tuple(row)
+        layout = self.layouts.setdefault(keys, len(self.layouts))
+        values = {**row, **internal, LAYOUT: layout}
+        for key in values:
+            if key not in self.columns:
+                self.columns[key] = [None] * self.rows
+        for key, column in self.columns.items():
+            column.append(values.get(key))
+        self.rows += 1
+        return self.rows - 1
+
+
+def _encode_cell(value):
+    """
+    Converts a cell JSON cannot store to a tagged object, so it is read back as the same value (see
+    _decode_cell). Types that would not round-trip are refused rather than stored as text.
+    """
+    for tag, cell_type, encode, _ in _TAGGED_TYPES:
+        if isinstance(value, cell_type):
+            return {tag: encode(value)}
+    raise TypeError(f"Cannot store a {type(value).__name__} cell in the corpus store: {value!r}")
+
+
+def _decode_cell(obj):
+    """
+    Converts a tagged object of a column file back to its cell (see _encode_cell).
+    """
+    if len(obj) == 1:
+        tag, encoded = next(iter(obj.items()))
+        decode = _DECODERS.get(tag)
+        if decode is not None:
+            return decode(encoded)
+    return obj
+
+
+def _file_signatures(directory):
+    """
+    Returns the [size, modification time] of each data dictionary workbook in a directory by relative path, as
+    they are kept in the manifest.
+    """
+    return {
+        rel_path: list(signature)
+        for rel_path, signature in file_signatures(directory).items()
+    }
+
+
+def write_corpus_store(data_dicts, store_dir, files=None):
+    """
+    Writes parsed data dictionaries to a columnar corpus store: a table each for the data dictionaries, fields,
+    codes, relationships and FAQs, with one file per table column. Readers only read the columns they need (see
+    read_corpus_table), and loading the whole corpus from the store takes a fraction of a second instead of
+    parsing every workbook.
+
+    Each column is a JSON list, so cells keep their values (strings, numbers, null, ...) although the columns of a
+    data dictionary mix types. Dates, times and durations are stored as tagged objects and read back as the same
+    Python values (see _encode_cell). The store is written next to the old one and the manifest is replaced last,
+    so readers never see a partially written store.
+
+    Args:
+        data_dicts (list[tuple]): (relative path of the workbook, data dictionary) tuples.
+        store_dir (str): The store directory.
+        files (dict, optional): The [size, modification time] of each workbook by relative path, used to tell which
+            workbooks changed since the store was written. Defaults to none.
+
+    Returns:
+        dict: The manifest of the store.
+    """
+    layouts = {}
+    tables = {table: _TableWriter(layouts) for table in STORE_TABLES}
+    for rel_path, data_dict in data_dicts:
+        # The nested tables keep their position in the data dictionary's keys, without values
+        dd_row = tables["Data Dictionaries"].add(
+            {key: None if key in NESTED_TABLES else value for key, value in data_dict.items()},
+            **{FILE: rel_path},
+        )
+        for field in data_dict.get("Data Dictionary", []):
+            codes = field.get("Acceptable Values")
+            if isinstance(codes, list):
+                field = {**field, "Acceptable Values": None}
+            field_row = tables["Fields"].add(
+                field,
+                **{DD_ROW: dd_row, CODE_COUNT: len(codes) if isinstance(codes, list) else -1},
+            )
+            if isinstance(codes, list):
+                for code in codes:
+                    tables["Codes"].add(code, **{FIELD_ROW: field_row})
+        for key in ("Relationships", "FAQs"):
+            for row in data_dict.get(key, []):
+                tables[key].add(row, **{DD_ROW: dd_row})
+
+    os.makedirs(store_dir, exist_ok=True)
+    old_manifest = _read_manifest(store_dir)
+    generation = old_manifest["Generation"] + 1 if old_manifest is not None else 1
+    manifest = {
+        "Version": STORE_VERSION,
+        "Generation": generation,
+        "Files": files or {},
+        "Layouts": [list(keys) for keys in layouts],
+        "Tables": {},
+    }
+    for table, writer in tables.items():
+        # [column, file] pairs, since JSON object keys would turn column names that are numbers into strings
+        column_files = []
+        for i, (column, values) in enumerate(writer.columns.items()):
+            file_name = f"{generation}.{table.replace(' ', '_')}.{i}.json"
+            with open(os.path.join(store_dir, file_name), "w") as f:
+                json.dump(values, f, default=_encode_cell)
+            column_files.append([column, file_name])
+        manifest["Tables"][table] = {"Rows": writer.rows, "Columns": column_files}
+
+    temp_file = os.path.join(store_dir, MANIFEST_FILE_NAME + ".tmp")
+    with open(temp_file, "w") as f:
+        json.dump(manifest, f)
+    os.replace(temp_file, os.path.join(store_dir, MANIFEST_FILE_NAME))
+
+    # Remove the column files of earlier generations, and the .pkl column files of stores of version 1
+    for file_name in os.listdir(store_dir):
+        old_generation = file_name.endswith(".json") and not file_name.startswith(f"{generation}.")
+        if file_name.endswith(".pkl") or (old_generation and file_name != MANIFEST_FILE_NAME):
+            try:
+                os.remove(os.path.join(store_dir, file_name))
+            except OSError:
+                pass  # Still open by a reader (Windows)
+    return manifest
+
+
+def _read_manifest(store_dir):
+    """
+    Returns the manifest of a store, or None if there is no (compatible) store.
+    """
+    manifest_file = os.path.join(store_dir, MANIFEST_FILE_NAME)
+    try:
+        stat = os.stat(manifest_file)
+    except OSError:
+        return None
+    signature = (stat.st_size, stat.st_mtime)
+    loaded = _loaded_manifests.get(store_dir)
+    if loaded is not None and loaded[0] == signature:
+        return loaded[1]
+
+    with open(manifest_file, "r") as f:
+        manifest = json.load(f)
+    if manifest.get("Version") != STORE_VERSION:
+        return None
+    for table in manifest["Tables"].values():
+        table["Columns"] = {column: file_name for column, file_name in table["Columns"]}
+    _loaded_manifests[store_dir] = (signature, manifest)
+    return manifest
+
+
+def corpus_store_signature(directory, store_dir=None):
+    """
+    Returns a value that changes whenever the corpus store of a directory is written, for keeping data read from
+    the store in memory.
+
+    Args:
+        directory (str): The directory of data dictionary files.
+        store_dir (str, optional): The store directory. Defaults to the store in the directory.
+
+    Returns:
+        tuple: The signature, or None if there is no (compatible) store.
+    """
+    if store_dir is None:
+        store_dir = default_store_dir(directory)
+    if _read_manifest(store_dir) is None:
+        return None
+    return _loaded_manifests[store_dir][0]
+
+
+def _read_column(store_dir, manifest, table, column):
+    """
+    Returns the values of a column of a table, or None if the table has no such column.
+    """
+    file_name = manifest["Tables"][table]["Columns"].get(column)
+    if file_name is None:
+        return None
+    with open(os.path.join(store_dir, file_name), "r") as f:
+        return json.load(f, object_hook=_decode_cell)
+
+
+def _iter_stored(store_dir, manifest, field_columns=None):
+    """
+    Rebuilds the data dictionaries of a store as (relative path, data dictionary) tuples.
+    """
+    layouts = manifest["Layouts"]
+
+    def read(table, columns=None):
+        if columns is None:
+            columns = manifest["Tables"][table]["Columns"]
+        values = {}
+        for column in columns:
+            column_values = _read_column(store_dir, manifest, table, column)
+            if column_values is not None:
+                values[column] = column_values
+        return values
+
+    def rows(table, values):
+        if not values:
+            return
+        columns = list(values)
+        layout_position = columns.index(LAYOUT)
+        getters = {}  # layout -> (keys, getter of the values of the keys from a row of all the columns)
+        for i, row in enumerate(zip(*values.values())):
+            layout = row[layout_position]
+            if layout not in getters:
+                keys = [key for key in layouts[layout] if key in values]
+                positions = [columns.index(key) for key in keys]
+                if len(positions) == 1:
+                    getter = lambda row, position=positions[0]: (row[position],)
+                else:
+                    getter = itemgetter(*positions) if positions else lambda row: ()
+                getters[layout] = (keys, getter)
+            keys, getter = getters[layout]
+            yield i, dict(zip(keys, getter(row)))
+
+    data_dicts = []
+    dd_values = read("Data Dictionaries")
+    for i, row in rows("Data Dictionaries", dd_values):
+        for key in NESTED_TABLES:
+            if key in row:
+                row[key] = []
+        data_dicts.append((dd_values[FILE][i], row))
+
+    internal = [DD_ROW, LAYOUT, CODE_COUNT]
+    fields = read("Fields", None if field_columns is None else internal + list(field_columns))
+    read_codes = field_columns is None or "Acceptable Values" in field_columns
+    codes = rows("Codes", read("Codes")) if read_codes else iter(())
+    for i, field in rows("Fields", fields):
+        count = fields[CODE_COUNT][i]
+        if count >= 0 and read_codes:
+            field["Acceptable Values"] = [next(codes)[1] for _ in range(count)]
+        data_dicts[fields[DD_ROW][i]][1].setdefault("Data Dictionary", []).append(field)
+
+    for table in ("Relationships", "FAQs"):
+        values = read(table)
+        for i, row in rows(table, values):
+            data_dicts[values[DD_ROW][i]][1].setdefault(table, []).append(row)
+    return data_dicts
+
+
+def corpus_store_changes(directory, store_dir=None):
+    """
+    Compares the corpus store of a directory with the workbooks in the directory.
+
+    Args:
+        directory (str): The directory of data dictionary files.
+        store_dir (str, optional): The store directory. Defaults to the store in the directory.
+
+    Returns:
+        tuple: The [size, modification time] of each workbook by relative path (in listing order), the relative
+            paths of the workbooks added or changed since the store was written and of the workbooks removed since,
+            or None if there is no (compatible) store.
+    """
+    manifest = _read_manifest(store_dir or default_store_dir(directory))
+    if manifest is None:
+        return None
+    current = _file_signatures(directory)
+    stored_files = manifest["Files"]
+    changed = [
+        rel_path
+        for rel_path, signature in current.items()
+        if stored_files.get(rel_path) != signature
+    ]
+    removed = [rel_path for rel_path in stored_files if rel_path not in current]
+    return current, changed, removed
+
+
+def load_corpus_store(
+    directory,
+    store_dir=None,
+    field_columns=None,
+    check_current=True,
+    workers=None,
+    use_cache=False,
+):
+    """
+    Loads the data dictionaries of a directory from its corpus store instead of parsing the workbooks.
+
+    Args:
+        directory (str): The directory of data dictionary files.
+        store_dir (str, optional): The store directory. Defaults to the store in the directory.
+        field_columns (list[str], optional): The 'Data Dictionary' columns to load (e.g. ["Field Name",
+            "Key Information"]). Codes are only loaded with 'Acceptable Values'. Defaults to every column.
+        check_current (bool, optional): Whether or not to check which workbooks changed since the store was
+            written (see corpus_store_changes). The changed workbooks are parsed instead of loaded from the store,
+            and the removed ones are left out. Defaults to True; False trusts the store, e.g. right after
+            update_corpus_store.
+        workers (int, optional): The number of processes used to parse the changed workbooks. Defaults to one per
+            CPU core.
+        use_cache (bool, optional): Whether or not to use the parse cache for the changed workbooks. Defaults to
+            False.
+
+    Returns:
+        list[tuple]: (file, data dictionary) tuples in directory listing order, or None if there is no store. The
+            data dictionaries are the same as dd_excel_to_json gives.
+    """
+    if store_dir is None:
+        store_dir = default_store_dir(directory)
+    manifest = _read_manifest(store_dir)
+    if manifest is None:
+        return None
+    stored = _iter_stored(store_dir, manifest, field_columns)
+    changes = corpus_store_changes(directory, store_dir) if check_current else None
+    if changes is None or not (changes[1] or changes[2]):
+        return [(os.path.join(directory, rel_path), data_dict) for rel_path, data_dict in stored]
+
+    current, changed, _ = changes
+    data_dicts = {rel_path: data_dict for rel_path, data_dict in stored if rel_path in current}
+    for rel_path in changed:
+        data_dicts.pop(rel_path, None)
+    for file, data_dict, error in iter_load_data_dicts(
+        [os.path.join(directory, rel_path) for rel_path in changed],
+        workers=workers,
+        use_cache=use_cache,
+    ):
+        if error is not None:
+            print(f"Error loading {file}: {error}")
+            continue
+        data_dicts[os.path.relpath(file, directory)] = data_dict
+    return [
+        (os.path.join(directory, rel_path), data_dicts[rel_path])
+        for rel_path in current
+        if rel_path in data_dicts
+    ]
+
+
+def read_corpus_table(directory, table="Fields", columns=None, store_dir=None):
+    """
+    Reads the rows of a table of the corpus store of a directory into a DataFrame, only reading the requested
+    columns.
+
+    Args:
+        directory (str): The directory of data dictionary files.
+        table (str, optional): "Fields" ('Data Dictionary' rows), "Codes" (code sheet rows, with the 'Field Name'
+            of their field), "Relationships" or "FAQs". Defaults to "Fields".
+        columns (list[str], optional): The columns to read. Defaults to every column.
+        store_dir (str, optional): The store directory. Defaults to the store in the directory.
+
+    Returns:
+        pd.DataFrame: The "File" and "Data Dictionary For" of each row followed by the columns (None where a row does
+            not have the column), or None if there is no store. The 'Acceptable Values' of fields with a code sheet
+            is 'Codes'.
+    """
+    if store_dir is None:
+        store_dir = default_store_dir(directory)
+    manifest = _read_manifest(store_dir)
+    if manifest is None:
+        return None
+
+    stored_columns = [
+        column
+        for column in manifest["Tables"][table]["Columns"]
+        if not (isinstance(column, str) and column.startswith("_"))
+    ]
+    if table == "Codes" and "Field Name" not in stored_columns:
+        stored_columns.insert(0, "Field Name")
+    if columns is None:
+        columns = stored_columns
+
+    def read(table, column):
+        return _read_column(store_dir, manifest, table, column)
+
+    if table == "Codes":
+        field_rows = read("Codes", FIELD_ROW) or []
+        field_dd_rows = read("Fields", DD_ROW)
+        dd_rows = [field_dd_rows[i] for i in field_rows]
+    else:
+        dd_rows = read(table, DD_ROW) or []
+    dd_files = read("Data Dictionaries", FILE) or []
+    dd_fors = read("Data Dictionaries", "Data Dictionary For") or [None] * len(dd_files)
+    data = {
+        "File": [os.path.join(directory, dd_files[i]) for i in dd_rows],
+        "Data Dictionary For": [dd_fors[i] for i in dd_rows],
+    }
+    for column in columns:
+        values = read(table, column)
+        if table == "Codes" and column == "Field Name":
+            # The 'Field Name' of the field, unless the code sheet has its own
+            field_names = read("Fields", "Field Name")
+            own = values or [None] * len(dd_rows)
+            values = [
+                name if name is not None else field_names[i] for name, i in zip(own, field_rows)
+            ]
+        if table == "Fields" and column == "Acceptable Values":
+            # Fields with a code sheet show 'Codes' like their workbook cell (see query.field_text)
+            code_counts = read("Fields", CODE_COUNT) or []
+            own = values or [None] * len(dd_rows)
+            values = ["Codes" if count >= 0 else value for value, count in zip(own, code_counts)]
+        data[column] = values if values is not None else [None] * len(dd_rows)
+    return pd.DataFrame(data, columns=["File", "Data Dictionary For", *columns])
+
+
+def corpus_store_is_current(directory, store_dir=None):
+    """
+    Checks whether the corpus store of a directory has every workbook of the directory, unchanged.
+
+    Args:
+        directory (str): The directory of data dictionary files.
+        store_dir (str, optional): The store directory. Defaults to the store in the directory.
+
+    Returns:
+        bool: Whether or not the store exists and is up to date.
+    """
+    changes = corpus_store_changes(directory, store_dir)
+    return changes is not None and not (changes[1] or changes[2])
+
+
+def update_corpus_store(directory, store_dir=None, rebuild=False, workers=None, use_cache=False):
+    """
+    Writes or refreshes the corpus store of a directory of data dictionaries. Only workbooks that were added, or
+    whose size/modification time changed since the store was written are parsed. The store is not rewritten if
+    nothing changed.
+
+    Args:
+        directory (str): The directory of data dictionary files.
+        store_dir (str, optional): The store directory. Defaults to the store in the directory.
+        rebuild (bool, optional): Whether or not to ignore an existing store and parse every workbook again.
+            Defaults to False.
+        workers (int, optional): The number of processes used to parse workbooks. Defaults to one per CPU core.
+        use_cache (bool, optional): Whether or not to use the parse cache. Defaults to False.
+
+    Returns:
+        dict: The number of "Files" in the store, and the number "Parsed" and "Removed" by this update.
+    """
+    if store_dir is None:
+        store_dir = default_store_dir(directory)
+    manifest = None if rebuild else _read_manifest(store_dir)
+    if manifest is not None:
+        current, changed, removed = corpus_store_changes(directory, store_dir)
+    else:
+        current = _file_signatures(directory)
+        changed = list(current)
+        removed = []
+    report = {"Files": len(current), "Parsed": len(changed), "Removed": len(removed)}
+    if manifest is not None and not changed and not removed:
+        return report
+
+    # The unchanged data dictionaries are kept from the store
+    stored = dict(_iter_stored(store_dir, manifest)) if manifest is not None else {}
+
+    parsed = {}
+    for file, data_dict, error in iter_load_data_dicts(
+        [os.path.join(directory, rel_path) for rel_path in changed],
+        workers=workers,
+        use_cache=use_cache,
+    ):
+        rel_path = os.path.relpath(file, directory)
+        if error is not None:
+            print(f"Error loading {file}: {error}")
+            current.pop(rel_path)  # Parsed again on the next update
+            continue
+        parsed[rel_path] = data_dict
+
+    data_dicts = []
+    for rel_path in current:
+        data_dict = parsed.get(rel_path, stored.get(rel_path))
+        if data_dict is not None:
+            data_dicts.append((rel_path, data_dict))
+    write_corpus_store(data_dicts, store_dir, current)
+    return report
@@ -1,19 +1,116 @@
-import pyodbc
 import json
 from .json_excel_conversion import dd_json_to_excel, standardize_json
 import os
-from pathlib import Path
 from .custom_cols import get_col_headers
+from .scanner import list_files
+from .sql_connections import get_connection_pool
 
 
-def list_files(directory, extension=".xlsx"):
-    path = Path(directory)
-    return [
-        str(file) for file in path.rglob(f'*{extension}') if file.is_file()
-    ]
+# The columns of the tables in INFORMATION_SCHEMA.COLUMNS, in the order of the tables
+CATALOG_QUERY = """
+    SELECT TABLE_SCHEMA, TABLE_NAME, COLUMN_NAME, DATA_TYPE, CHARACTER_MAXIMUM_LENGTH,
+        LEFT(IS_NULLABLE, 1) AS IS_NULLABLE
+    FROM INFORMATION_SCHEMA.COLUMNS
+"""
+CATALOG_ORDER = " ORDER BY TABLE_SCHEMA, TABLE_NAME, ORDINAL_POSITION"
 
+# SQL Server takes at most 2100 parameters per query, 2 per table
+MAX_CATALOG_TABLES = 1000
 
-def fetch_sql_info(server_name, database_name, view_name, table_name):
+
+def _column_info(column_name, data_type, max_characters, is_nullable):
+    """
+    Returns the data dictionary row of a column from its INFORMATION_SCHEMA.COLUMNS information.
+    """
+    if is_nullable == 'N':
+        return {
+            "Field Name": column_name,
+            "Data Type": data_type,
+            "Max Characters": max_characters,
+            "Null Meaning": is_nullable
+        }
+    return {
+        "Field Name": column_name,
+        "Data Type": data_type,
+        "Max Characters": max_characters
+    }
+
+
+def fetch_sql_catalog(server_name,
+                      database_name,
+                      view_name=None,
+                      tables=None,
+                      pool=None):
+    """
+    Fetches information about the columns of many SQL tables at once: every table of a database, every table of a
+    view/schema or a list of tables. The columns are selected from INFORMATION_SCHEMA.COLUMNS in one parameterized
+    query (one per 1000 tables for a list of tables) instead of one query per table.
+
+    Args:
+        server_name (str): The name of the server where the database is located.
+        database_name (str): The name of the database where the tables are located.
+        view_name (str, optional): The name of the view/schema to fetch every table of. Defaults to None.
+        tables (iterable, optional): The (view name, table name) tuples of the tables to fetch. Defaults to None,
+            which fetches every table of the view, or of the database if there is no view either.
+        pool (ConnectionPool, optional): The pool of SQL connections to query through. Defaults to the shared
+            pool (see sql_connections.get_connection_pool).
+
+    Returns:
+        dict: The column information (see fetch_sql_info) of each table, keyed by (view name, table name) with the
+            names as they are in the database. Tables that do not exist are left out.
+    """
+    if pool is None:
+        pool = get_connection_pool()
+
+    queries = []
+    if tables is not None:
+        tables = list(dict.fromkeys(tables))
+        for i in range(0, len(tables), MAX_CATALOG_TABLES):
+            chunk = tables[i:i + MAX_CATALOG_TABLES]
+            conditions = " OR ".join(["(TABLE_SCHEMA = ? AND TABLE_NAME = ?)"] * len(chunk))
+            parameters = [name for table in chunk for name in table]
+            queries.append((f"{CATALOG_QUERY} WHERE {conditions}{CATALOG_ORDER}", parameters))
+    elif view_name is not None:
+        queries.append((f"{CATALOG_QUERY} WHERE TABLE_SCHEMA = ?{CATALOG_ORDER}", [view_name]))
+    else:
+        queries.append((CATALOG_QUERY + CATALOG_ORDER, []))
+
+    catalog = {}
+    with pool.cursor(server_name, database_name) as cursor:
+        for query, parameters in queries:
+            cursor.execute(query, *parameters)
+            for row in cursor.fetchall():
+                table_data = catalog.setdefault((row[0], row[1]), {})
+                table_data[row[2].lower()] = _column_info(*row[2:6])
+    return catalog
+
+
+def _catalog_tables(catalog):
+    """
+    Returns the tables of a catalog (see fetch_sql_catalog) keyed by their lowercase (view name, table name), for
+    looking many tables up without case (see _catalog_table). The first of tables whose names only differ in case
+    is kept.
+    """
+    tables = {}
+    for (view_name, table_name), table_data in catalog.items():
+        tables.setdefault((view_name.lower(), table_name.lower()), table_data)
+    return tables
+
+
+def _catalog_table(catalog, view_name, table_name, tables=None):
+    """
+    Returns the column information of a table in a catalog (see fetch_sql_catalog), looking its names up without
+    case like SQL Server does, or an empty dict if the table is not in the catalog. tables is the catalog keyed by
+    lowercase names (see _catalog_tables), built once when many tables are looked up in the same catalog.
+    """
+    if (view_name, table_name) in catalog:
+        return catalog[(view_name, table_name)]
+    if tables is None:
+        tables = _catalog_tables(catalog)
+    return tables.get((view_name.lower(), table_name.lower()), {})
+
+
+def fetch_sql_info(server_name, database_name, view_name, table_name, pool=None):
     """
     Fetches information about columns in an SQL table.
 
@@ -22,53 +119,56 @@ def fetch_sql_info(server_name, database_name, view_name, table_name):
         database_name (str): The name of the database where the table is located.
         view_name (str): The name of the view/schema where the table is located.
         table_name (str): The name of the table to generate the data dictionary for.
+        pool (ConnectionPool, optional): The pool of SQL connections to query through. Defaults to the shared
+            pool (see sql_connections.get_connection_pool).
 
     Returns:
         dict: A dictionary containing information about the server, database, and table.
     """
+    catalog = fetch_sql_catalog(server_name,
+                                database_name,
+                                tables=[(view_name, table_name)],
+                                pool=pool)
+    print(table_name)
+    return _catalog_table(catalog, view_name, table_name)
 
-    connection_string = f"DRIVER={{ODBC Driver 17 for SQL Server}};SERVER={server_name};DATABASE={database_name};Trusted_Connection=yes;"
 
-    try:
-        conn = pyodbc.connect(connection_string)
-        print("Connection successful!")
-    except Exception as e:
-        print("Error in connection: ", e)
+def _new_data_dict(server_name, database_name, view_name, table_name,
+                   table_type):
+    """
+    Returns an empty data dictionary for a table.
+    """
+    return {
+        "Workbook Column Names":
+        get_col_headers(database_name),
+        "Legend": [],
+        "Table Type":
+        table_type,
+        "Data Dictionary For":
+        f"[{server_name}].[{database_name}].[{view_name}].[{table_name}]",
+        "FAQs": [{
+            "FAQ": "What does each record in the table represent?",
+            "Response": ""
+        }],
+        "Relationships": [],
+        "Data Dictionary": []
+    }
 
-    # Create a cursor from the connection
-    cursor = conn.cursor()
-    query = f"SELECT \
-                COLUMN_NAME, \
-                DATA_TYPE,\
-                CHARACTER_MAXIMUM_LENGTH,\
-                LEFT(IS_NULLABLE,1) AS IS_NULLABLE\
-            FROM \
-                INFORMATION_SCHEMA.COLUMNS\
-            WHERE \
-                TABLE_NAME = '{table_name}' AND TABLE_SCHEMA = '{view_name}'"
 
-    cursor.execute(query)
-    print(table_name)
-    table_data = {}
-    for i, row in enumerate(cursor.fetchall()):
-        print(row)
-        if row[3] == 'N':
-            row_json = {
-                "Field Name": row[0],
-                "Data Type": row[1],
-                "Max Characters": row[2],
-                "Null Meaning": row[3]
-            }
-        else:
-            row_json = {
-                "Field Name": row[0],
-                "Data Type": row[1],
-                "Max Characters": row[2]
-            }
-
-        table_data[row[0].lower()] = row_json
-
-    return table_data
+def _merge_table_info(data_dict, table_info):
+    """
+    Updates the columns of a data dictionary with the information of a SQL table and adds the columns it lacks.
+    """
+    remaining_columns = dict.fromkeys(table_info)
+    for column in data_dict["Data Dictionary"]:
+        low = column["Field Name"].lower()
+        if low in table_info:
+            column.update(table_info[low])
+            remaining_columns.pop(low, None)
+
+    for column in remaining_columns:
+        data_dict["Data Dictionary"].append(table_info[column])
+    return data_dict
 
 
 def initialize_data_dict(server_name,
@@ -76,7 +176,8 @@ def initialize_data_dict(server_name,
                          view_name,
                          table_name,
                          table_type="Data Table",
-                         data_dict=None):
+                         data_dict=None,
+                         pool=None):
     """
     Args:
         server_name (str): The name of the server where the database is located.
@@ -84,59 +185,22 @@ def initialize_data_dict(server_name,
         view_name (str): The name of the view where the table is located.
         table_name (str): The name of the table to generate the data dictionary for.
         data_dict (dict, optional): A dictionary containing the data dictionary for the specified table, if available. Defaults to None.
+        pool (ConnectionPool, optional): The pool of SQL connections to query through. Defaults to the shared pool.
 
     Returns:
         dict: A dictionary representing the data dictionary in json format for the specified table.
 
     """
-    new_dict = False
-    if data_dict is None:
-        data_dict = {
-            "Workbook Column Names":
-            get_col_headers(database_name),
-            "Legend": [],
-            "Table Type":
-            table_type,
-            "Data Dictionary For":
-            f"[{server_name}].[{database_name}].[{view_name}].[{table_name}]",
-            "FAQs": [{
-                "FAQ": "What does each record in the table represent?",
-                "Response": ""
-            }],
-            "Relationships": [],
-            "Data Dictionary": []
-        }
-        new_dict = True
-
-    connection_string = f"DRIVER={{ODBC Driver 17 for SQL Server}};SERVER={server_name};DATABASE={database_name};Trusted_Connection=yes;"
-
-    try:
-        conn = pyodbc.connect(connection_string)
-        print("Connection successful!")
-    except Exception as e:
-        print("Error in connection: ", e)
-
     table_info = fetch_sql_info(server_name, database_name, view_name,
-                                table_name)
-
-    if new_dict:
-        for row in table_info.values():
-            data_dict["Data Dictionary"].append(row)
-    else:
-        remaining_columns = list(table_info.keys())
-        for column in data_dict["Data Dictionary"]:
-            low = column["Field Name"].lower()
-            if low in table_info:
-                remaining_columns.remove(low)
-                column.update(table_info[low])
-
-        for column in remaining_columns:
-            data_dict["Data Dictionary"].append(table_info[column])
-    return data_dict
+                                table_name, pool)
+    if data_dict is None:
+        data_dict = _new_data_dict(server_name, database_name, view_name,
+                                   table_name, table_type)
+    return _merge_table_info(data_dict, table_info)
 
 
 def update_data_dict(server_name, database_name, view_name, table_name,
-                     data_dict):
+                     data_dict, pool=None):
     """
     Updates the data dictionary columns with information from a SQL table.
 
@@ -146,21 +210,128 @@ def update_data_dict(server_name, database_name, view_name, table_name,
         view_name (str): The name of the view where the table is located.
         table_name (str): The name of the table to generate the data dictionary for.
         data_dict (dict): A dictionary containing the data dictionary for the specified table.
+        pool (ConnectionPool, optional): The pool of SQL connections to query through. Defaults to the shared pool.
 
     Returns:
         dict: A dictionary representing the updated data dictionary in json format for the specified table.
     """
     table_info = fetch_sql_info(server_name, database_name, view_name,
-                                table_name)
-    remaining_columns = list(table_info.keys())
+                                table_name, pool)
+    return _merge_table_info(data_dict, table_info)
 
-    for column in data_dict["Data Dictionary"]:
-        low = column["Field Name"].lower()
-        if low in table_info:
-            column.update(table_info[low])
-            remaining_columns.remove(low)
 
-    for column in remaining_columns:
-        data_dict["Data Dictionary"].append(table_info[column])
+def initialize_data_dicts(server_name,
+                          database_name,
+                          view_name=None,
+                          tables=None,
+                          table_type="Data Table",
+                          data_dicts=None,
+                          catalog=None,
+                          pool=None):
+    """
+    Initializes the data dictionaries of many tables (see initialize_data_dict) from one catalog fetch (see
+    fetch_sql_catalog) instead of one query per table.
 
-    return data_dict
+    Args:
+        server_name (str): The name of the server where the database is located.
+        database_name (str): The name of the database where the tables are located.
+        view_name (str, optional): The name of the view/schema to initialize every table of. Defaults to None.
+        tables (iterable, optional): The (view name, table name) tuples of the tables to initialize. Defaults to
+            None, which initializes every table of the view, or of the database if there is no view either.
+        table_type (str, optional): The type of the tables. Defaults to "Data Table".
+        data_dicts (dict, optional): The existing data dictionaries of the tables, keyed by (view name, table
+            name), to update instead of starting new ones. Defaults to None.
+        catalog (dict, optional): The catalog of the tables, if it was already fetched (see fetch_sql_catalog).
+            Defaults to None, which fetches it.
+        pool (ConnectionPool, optional): The pool of SQL connections to query through. Defaults to the shared pool.
+
+    Returns:
+        dict: The data dictionaries keyed by (view name, table name), in the order of the tables. Tables missing
+            from the database get a data dictionary without columns, like initialize_data_dict gives them.
+    """
+    if tables is not None:
+        tables = list(dict.fromkeys(tables))
+    if catalog is None:
+        catalog = fetch_sql_catalog(server_name, database_name, view_name,
+                                    tables, pool)
+    if tables is None:
+        tables = list(catalog)
+    if data_dicts is None:
+        data_dicts = {}
+
+    initialized = {}
+    catalog_tables = _catalog_tables(catalog)
+    for view, table in tables:
+        data_dict = data_dicts.get((view, table))
+        if data_dict is None:
+            data_dict = _new_data_dict(server_name, database_name, view,
+                                       table, table_type)
+        initialized[(view, table)] = _merge_table_info(
+            data_dict, _catalog_table(catalog, view, table, catalog_tables))
+    return initialized
+
+
+def update_data_dicts(data_dicts, catalogs=None, pool=None, executor=None):
+    """
+    Updates the columns of many data dictionaries (see update_data_dict) with one catalog fetch per database (see
+    fetch_sql_catalog) instead of one query per table. The tables are read from the 'Data Dictionary For' of the
+    data dictionaries, which may be on different servers and databases.
+
+    Args:
+        data_dicts (iterable): The data dictionaries to update in place.
+        catalogs (dict, optional): Catalogs already fetched (see fetch_sql_catalog), keyed by (server name,
+            database name), e.g. of whole databases shared by several calls. The tables of the other databases are
+            fetched. Defaults to None.
+        pool (ConnectionPool, optional): The pool of SQL connections to query through. Defaults to the shared pool.
+        executor (QueryExecutor, optional): An executor to fetch the catalogs of the databases concurrently on
+            (see sql_executor.QueryExecutor), through its pool. Defaults to None, which fetches them in turn.
+
+    Returns:
+        list: The updated data dictionaries.
+    """
+    data_dicts = list(data_dicts)
+    catalogs = dict(catalogs or {})
+
+    # The tables of each database that has no catalog yet
+    names = []
+    missing = {}
+    for data_dict in data_dicts:
+        server_name, database_name, view_name, table_name = data_dict[
+            "Data Dictionary For"][1:-1].split("].[")
+        names.append((server_name, database_name, view_name, table_name))
+        if (server_name, database_name) not in catalogs:
+            missing.setdefault((server_name, database_name),
+                               []).append((view_name, table_name))
+
+    if executor is not None:
+        futures = {
+            key: executor.submit(key[0],
+                                 fetch_sql_catalog,
+                                 *key,
+                                 tables=tables,
+                                 pool=executor.pool)
+            for key, tables in missing.items()
+        }
+        try:
+            for key, future in futures.items():
+                catalogs[key] = future.result()
+        except BaseException:
+            executor.cancel()
+            raise
+    else:
+        for (server_name, database_name), tables in missing.items():
+            catalogs[(server_name, database_name)] = fetch_sql_catalog(
+                server_name, database_name, tables=tables, pool=pool)
+
+    catalog_tables = {}  # The tables of each catalog keyed by lowercase names
+    for data_dict, (server_name, database_name, view_name,
+                    table_name) in zip(data_dicts, names):
+        catalog = catalogs[(server_name, database_name)]
+        if (server_name, database_name) not in catalog_tables:
+            catalog_tables[(server_name,
+                            database_name)] = _catalog_tables(catalog)
+        table_info = _catalog_table(
+            catalog, view_name, table_name,
+            catalog_tables[(server_name, database_name)])
+        _merge_table_info(data_dict, table_info)
+    return data_dicts
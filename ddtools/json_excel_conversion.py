@@ -1,19 +1,83 @@
+import numpy as np
 import pandas as pd
 import json
 import os
-import pyodbc
 from tqdm import tqdm
-from pathlib import Path
 from .custom_cols import get_col_headers
 from .add_web_sleds_info import add_web_sleds_info
+from .cardinality import (DEFAULT_MAX_CODES, DEFAULT_SAMPLE_PERCENT,
+                          estimate_code_counts, fetch_sample)
+from .parse_cache import ParseCache, get_parse_cache
+from .scanner import list_files
+from .sql_connections import get_connection_pool
+from .xlsx_reader import WorkbookReader
+from .xlsx_writer import (BOLD_FORMAT, CODES_COLUMN_WIDTHS,
+                          DATA_DICT_COLUMN_WIDTHS, FINGERPRINT_PROPERTY,
+                          HEADER_FORMAT, HYPERLINK_FORMAT, TEXT_FORMAT,
+                          data_dict_fingerprint, trunc31, workbook_fingerprint,
+                          write_data_dict)
+
+
+def fetch_table_codes(server_name,
+                      database_name,
+                      view_name,
+                      table_name,
+                      field_names,
+                      pool=None,
+                      sample_percent=None):
+    '''
+    Selects the distinct values of many fields of a table in one scan of the table, instead of one SELECT DISTINCT
+    scan per field. The query groups the table by GROUPING SETS with a set per field: each result row holds a value
+    of one field, and GROUPING tells the field's NULL values apart from the other fields' rolled up columns.
 
-# Function to truncate a string to 31 characters for worksheet names
+    Args:
+        server_name (str): The name of the server where the database is located.
+        database_name (str): The name of the database where the table is located.
+        view_name (str): The name of the view where the table is located.
+        table_name (str): The name of the table.
+        field_names (list[str]): The names of the fields to find the values of.
+        pool (ConnectionPool, optional): The pool of SQL connections to query through. Defaults to the shared
+            pool (see sql_connections.get_connection_pool).
+        sample_percent (float, optional): The percentage of the table to sample, to find only the values in a
+            sample of the table (see cardinality.sample_sources). Defaults to None, which scans the whole table.
 
+    Returns:
+        dict: The distinct values of each field, sorted like SELECT DISTINCT ... ORDER BY sorts them, keyed by the
+            field name.
+    '''
+    field_names = list(dict.fromkeys(field_names))
+    table_codes = {field_name: [] for field_name in field_names}
+    if not field_names:
+        return table_codes
+    if pool is None:
+        pool = get_connection_pool()
+
+    columns = [f'[{field_name}]' for field_name in field_names]
+    groupings = [f'GROUPING({column})' for column in columns]
+    # Each field's rows come in turn (GROUPING is 0 in its own set), sorted by its value
+    order = [f'{grouping}, {column}' for grouping, column in zip(groupings, columns)]
+    table = f'[{database_name}].[{view_name}].[{table_name}]'
+
+    def query(source):
+        return (f'SELECT {", ".join(columns + groupings)}'
+                f' FROM {source}'
+                f' GROUP BY GROUPING SETS ({", ".join(f"({column})" for column in columns)})'
+                f' ORDER BY {", ".join(order)}')
+
+    with pool.cursor(server_name, database_name) as cursor:
+        if sample_percent is None:
+            cursor.execute(query(table))
+            rows = cursor.fetchall()
+        else:
+            rows, _ = fetch_sample(cursor, table, query, sample_percent)
 
-def trunc31(string):
-    if len(string) > 31:
-        return string[:31]
-    return string
+    n_fields = len(field_names)
+    for row in rows:
+        for i in range(n_fields):
+            if not row[n_fields + i]:
+                table_codes[field_names[i]].append(row[i])
+                break
+    return table_codes
 
 
 def initialize_code_sheet(current_rows,
@@ -23,7 +87,10 @@ def initialize_code_sheet(current_rows,
                           table_name,
                           field_name,
                           find_codes=True,
-                          order_codes=False):
+                          order_codes=False,
+                          pool=None,
+                          codes=None,
+                          sampled=False):
     '''
     Selects the distinct values from a field in a table and creates a data dictionary for the field.
 
@@ -33,6 +100,12 @@ def initialize_code_sheet(current_rows,
         database_name (str): The name of the database where the table is located.
         view_name (str): The name of the view where the table is located.
         table_name (str): The name of the table to generate the data dictionary for.
+        pool (ConnectionPool, optional): The pool of SQL connections to query through. Defaults to the shared
+            pool (see sql_connections.get_connection_pool).
+        codes (list, optional): The distinct values of the field, if they were already selected (see
+            fetch_table_codes). Defaults to None, which selects them.
+        sampled (bool, optional): Whether or not the codes are from a sample of the table, in which case the codes
+            missing from them are not marked as not in the data. Defaults to False.
 
     Returns:
         dict_list (list): A list of dictionaries representing the data dictionary code sheet in json 
@@ -42,23 +115,19 @@ def initialize_code_sheet(current_rows,
     current_codes = []
 
     if find_codes:
-        connection_string = f"DRIVER={{ODBC Driver 17 for SQL Server}};SERVER={server_name};DATABASE={database_name};Trusted_Connection=yes;"
-
-        try:
-            conn = pyodbc.connect(connection_string)
-        except Exception as e:
-            print("Error in connection: ", e)
-
-        # Create a cursor from the connection
-        cursor = conn.cursor()
-        cursor.execute(
-            f"SELECT DISTINCT [{field_name}] FROM [{database_name}].[{view_name}].[{table_name}] ORDER BY [{field_name}]"
-        )
+        if codes is None:
+            if pool is None:
+                pool = get_connection_pool()
+            # Reuse an open connection to the database instead of opening one for every field
+            with pool.cursor(server_name, database_name) as cursor:
+                cursor.execute(
+                    f"SELECT DISTINCT [{field_name}] FROM [{database_name}].[{view_name}].[{table_name}] ORDER BY [{field_name}]"
+                )
+                codes = [row[0] for row in cursor.fetchall()]
 
         codes_in_data = []
 
-        for row in cursor:
-            code = row[0]
+        for code in codes:
             if code == "NULL":
                 code = '"NULL"'
             if pd.isnull(code):
@@ -90,7 +159,7 @@ def initialize_code_sheet(current_rows,
         for value in dict_list:
             if value['Code'] in codes_in_data:
                 value['In Data'] = 'Y'
-            else:
+            elif not sampled:
                 value['In Data'] = 'N'
 
     # Custom sort key function
@@ -258,7 +327,13 @@ def standardize_json(data,
                      find_codes=False,
                      order_codes=False,
                      custom_col_names=None,
-                     include_web_sleds_info=False):
+                     include_web_sleds_info=False,
+                     pool=None,
+                     code_discovery='table',
+                     max_codes=DEFAULT_MAX_CODES,
+                     over_cap='skip',
+                     sample_percent=DEFAULT_SAMPLE_PERCENT,
+                     code_report=None):
     '''
     Standardizes the JSON data dictionary by setting the formatting to the standard template.
 
@@ -268,9 +343,29 @@ def standardize_json(data,
         order_codes (bool): Whether or not to sort the code sheets
         custom_col_names (dict): A dictionary of custom column names to use for the workbook (see get_col_headers)
         add_web_sleds_info (bool): Whether or not to add web sleds info
+        pool (ConnectionPool, optional): The pool of SQL connections to find the codes through. Defaults to the
+            shared pool (see sql_connections.get_connection_pool).
+        code_discovery (str): How to find the codes: 'table' selects the codes of every field in one scan of the
+            table (see fetch_table_codes), 'field' runs one SELECT DISTINCT per field. Defaults to 'table'.
+        max_codes (int): The most distinct values a field may have to find its codes. The number of distinct values
+            is estimated beforehand from the table's statistics or a sample of it (see
+            cardinality.estimate_code_counts), to leave out free text and ID fields. None finds the codes of every
+            field without estimating. Defaults to 10000.
+        over_cap (str): What to do with the fields over max_codes: 'skip' does not find their codes, 'sample' finds
+            the first max_codes codes in a sample of the table. Defaults to 'skip'.
+        sample_percent (float): The percentage of the table to sample for the estimates and the 'sample' codes.
+            Defaults to 1.
+        code_report (list, optional): A list to add a {"Data Dictionary For", "Field Name", "Estimated Codes",
+            "Action"} dict to for each field over max_codes, with the "Skipped" or "Sampled" action. The fields are
+            printed too.
 
     Returns:
     '''
+    if code_discovery not in ('table', 'field'):
+        raise ValueError(
+            f"code_discovery must be 'table' or 'field', not {code_discovery!r}")
+    if over_cap not in ('skip', 'sample'):
+        raise ValueError(f"over_cap must be 'skip' or 'sample', not {over_cap!r}")
     name = data['Data Dictionary For']
 
     server_name, database_name, view_name, table_name = name[1:-1].split('].[')
@@ -281,10 +376,9 @@ def standardize_json(data,
     else:
         data['Workbook Column Names'] = get_col_headers(database_name)
 
-    # Initialize the code sheet codes
-    for variable in tqdm(data['Data Dictionary'],
-                         desc=f'Finding code values for {name}',
-                         leave=False):
+    # The code sheets, with whether or not to find their codes
+    code_sheets = []
+    for variable in data['Data Dictionary']:
         if 'Acceptable Values' in variable:
             if isinstance(variable['Acceptable Values'], list):
                 # This is to check if the variable has character components instead of codes (or non-literal components), in which case we don't want to find codes
@@ -307,15 +401,82 @@ def standardize_json(data,
                     ) or 'range' in code_row['Notes'].lower():
                         single_find_codes = False
 
-                dict_list = initialize_code_sheet(current_rows,
-                                                  server_name,
-                                                  database_name,
-                                                  view_name,
-                                                  table_name,
-                                                  variable['Field Name'],
-                                                  find_codes=single_find_codes,
-                                                  order_codes=order_codes)
-                variable['Acceptable Values'] = dict_list
+                code_sheets.append((variable, current_rows, single_find_codes))
+
+    code_fields = [
+        variable['Field Name']
+        for variable, _, single_find_codes in code_sheets if single_find_codes
+    ]
+
+    # Leave out the fields with too many distinct values to be codes, before selecting them
+    sampled_fields = []
+    if max_codes is not None and code_fields:
+        estimates = estimate_code_counts(server_name, database_name, view_name,
+                                         table_name, code_fields,
+                                         sample_percent, pool)
+        over_fields = []
+        for field_name in code_fields:
+            estimate = estimates.get(field_name)
+            if estimate is None or estimate <= max_codes:
+                continue
+            over_fields.append(field_name)
+            action = 'Sampled' if over_cap == 'sample' else 'Skipped'
+            print(
+                f'{action} the codes of {field_name} in {name}: about {estimate} distinct values, over {max_codes}'
+            )
+            if code_report is not None:
+                code_report.append({
+                    "Data Dictionary For": name,
+                    "Field Name": field_name,
+                    "Estimated Codes": estimate,
+                    "Action": action
+                })
+        if over_cap == 'sample':
+            sampled_fields = over_fields
+        code_fields = [
+            field_name for field_name in code_fields
+            if field_name not in over_fields
+        ]
+
+    table_codes = {}
+    if sampled_fields:
+        sampled_codes = fetch_table_codes(server_name,
+                                          database_name,
+                                          view_name,
+                                          table_name,
+                                          sampled_fields,
+                                          pool=pool,
+                                          sample_percent=sample_percent)
+        for field_name, codes in sampled_codes.items():
+            table_codes[field_name] = codes[:max_codes]
+    # Find the codes of every field in one scan of the table
+    if code_discovery == 'table':
+        table_codes.update(
+            fetch_table_codes(server_name,
+                              database_name,
+                              view_name,
+                              table_name,
+                              code_fields,
+                              pool=pool))
+
+    # Initialize the code sheet codes
+    find_fields = set(code_fields).union(sampled_fields)
+    for variable, current_rows, single_find_codes in tqdm(
+            code_sheets, desc=f'Finding code values for {name}', leave=False):
+        field_name = variable['Field Name']
+        dict_list = initialize_code_sheet(
+            current_rows,
+            server_name,
+            database_name,
+            view_name,
+            table_name,
+            field_name,
+            find_codes=single_find_codes and field_name in find_fields,
+            order_codes=order_codes,
+            pool=pool,
+            codes=table_codes.get(field_name),
+            sampled=field_name in sampled_fields)
+        variable['Acceptable Values'] = dict_list
 
     if include_web_sleds_info:
         add_web_sleds_info(data)
@@ -323,50 +484,60 @@ def standardize_json(data,
     return data
 
 
-def dd_json_to_excel(data, output_file):
+def dd_json_to_excel(data, output_file, engine='pandas', skip_unchanged=False):
     '''
     Convert a JSON data dictionary to an Excel workbook.
 
+    The workbook keeps a fingerprint of the data dictionary in its custom properties (see data_dict_fingerprint),
+    so writing the same data dictionary again can be skipped.
+
     Args:
         data (dict): The standard format JSON data dictionary to convert.
         output_file (str): The path to the output Excel file to write to.
+        engine (str): 'pandas' writes each sheet from a DataFrame with to_excel. 'xlsxwriter' writes the rows
+            straight through xlsxwriter in constant memory mode (see xlsx_writer.py), which is faster and uses
+            less memory for workbooks with many fields and code sheets. Both write the same cells.
+        skip_unchanged (bool): Whether or not to leave the output file as it is if it was written from the same
+            data dictionary content (and not saved by another application since)
 
     Returns:
-        None
+        bool: Whether or not the workbook was written. It is only False when skip_unchanged skipped it.
     '''
+    if engine not in ('pandas', 'xlsxwriter'):
+        raise ValueError(
+            f"Unknown engine {engine!r}, expected 'pandas' or 'xlsxwriter'")
+
+    fingerprint = data_dict_fingerprint(data)
+    if skip_unchanged and workbook_fingerprint(output_file) == fingerprint:
+        return False
 
     # Create the output directory if it doesn't exist
     directory = os.path.dirname(output_file)
     if directory:
         os.makedirs(directory, exist_ok=True)
 
+    if engine == 'xlsxwriter':
+        write_data_dict(
+            data, output_file,
+            get_legend(data['Workbook Column Names']['Data Dictionary']),
+            fingerprint)
+        return True
+
     # Initialize a Pandas Excel writer with the xlsxwriter engine
     with pd.ExcelWriter(output_file, engine='xlsxwriter') as writer:
         workbook = writer.book
+        workbook.set_custom_property(FINGERPRINT_PROPERTY, fingerprint)
 
         # Define a format for the header
-        header_format = workbook.add_format({
-            'bold': True,
-            'text_wrap': True,
-            'valign': 'top',
-            'fg_color': '#D9EAD3',  # Light green
-            'border': 1
-        })
+        header_format = workbook.add_format(HEADER_FORMAT)
 
         # Define a text wrap format for general cell content
-        text_format = workbook.add_format({
-            'text_wrap': True,
-            'valign': 'top',
-            'num_format': '@'
-        })
+        text_format = workbook.add_format(TEXT_FORMAT)
 
         # Define a hyperlink format
-        hyperlink_format = workbook.add_format({
-            'font_color': 'blue',
-            'underline': 1,  # 1 for single underline
-        })
+        hyperlink_format = workbook.add_format(HYPERLINK_FORMAT)
 
-        bold_format = workbook.add_format({'bold': True})
+        bold_format = workbook.add_format(BOLD_FORMAT)
 
         # LEGEND SHEET
         # Standard rows for 'Legend' sheet
@@ -456,31 +627,10 @@ def dd_json_to_excel(data, output_file):
         # Format headers and set column widths
         for col_num, value in enumerate(df_data_dict.columns.values):
             worksheet_ac.write(0, col_num, value, header_format)
-        # Setting individual column widths in 'Data Dictionary'
-        # Assuming columns: Field Name, Description, Source Information, etc.
-        all_column_widths = {
-            'Field Name': 25,
-            'Description': 50,
-            'Source Information': 40,
-            'Raw Data Origin': 40,
-            'Reporting Status': 15,
-            'Introduced': 10,
-            'Discontinued': 12,
-            'Acceptable Values': 20,
-            'Null Meaning': 15,
-            'Accepts Null?': 15,
-            'Required?': 10,
-            'Data Type': 11,
-            'Max Characters': 14,
-            'Validations': 30,
-            'Reporting Cycle': 25,
-            'Notes': 50,
-            'Key Information': 25,
-        }
-        # Set individual column widths
+        # Set individual column widths in 'Data Dictionary'
         for i, column in enumerate(df_data_dict.columns):
-            if column in all_column_widths:
-                worksheet_ac.set_column(i, i, all_column_widths[column],
+            if column in DATA_DICT_COLUMN_WIDTHS:
+                worksheet_ac.set_column(i, i, DATA_DICT_COLUMN_WIDTHS[column],
                                         text_format)
 
         # Codes Sheets
@@ -517,20 +667,10 @@ def dd_json_to_excel(data, output_file):
                     worksheet_codes.set_column(col_num, col_num, 20,
                                                text_format)
                 # Set the column widths for the codes sheet
-                codes_column_widths = {
-                    'Code': 15,
-                    'Description': 50,
-                    'Reporting Status': 15,
-                    'Introduced': 12,
-                    'Discontinued': 12,
-                    'In Data': 7,
-                    'Notes': 50
-                }
-                # Set individual column widths
                 for i, column in enumerate(df_codes.columns):
-                    if column in codes_column_widths:
+                    if column in CODES_COLUMN_WIDTHS:
                         worksheet_codes.set_column(i, i,
-                                                   codes_column_widths[column],
+                                                   CODES_COLUMN_WIDTHS[column],
                                                    text_format)
 
                 # Add a hyperlink in the new sheet back to the variable in 'Data Dictionary' sheet
@@ -562,8 +702,68 @@ def dd_json_to_excel(data, output_file):
                 formula = f'=HYPERLINK("#{link_target}", "Codes")'
                 worksheet_ac.write_formula(cell, formula, hyperlink_format)
 
+    return True
+
+
+# Strips text cells and leaves other cells as they are, over a whole array of cells at once
+_strip_text = np.frompyfunc(
+    lambda value: value.strip() if isinstance(value, str) else value, 1, 1)
+
+
+def _normalize_sheet(df, code_nulls=False):
+    """
+    Changes all empty cells to "" and strips any leading/trailing whitespace from text cells, over
+    the whole sheet at once instead of a cell at a time.
+
+    Args:
+        df (pd.DataFrame): A sheet read with pd.ExcelFile.parse.
+        code_nulls (bool): Whether or not empty cells in the 'Code' column become "NULL" (code sheets).
+
+    Returns:
+        tuple: The column names and the normalized cells (a 2D object array of native Python values, the
+            same values DataFrame.iterrows gives).
+    """
+    columns = list(df.columns)
+    values = df.to_numpy(dtype=object)
+    if values.size:
+        empty = pd.isna(values)
+        values[empty] = ""
+        if code_nulls:
+            for i, column in enumerate(columns):
+                if column == 'Code':
+                    values[empty[:, i], i] = "NULL"
+        values = _strip_text(values)
+    return columns, values
+
+
+def _sheet_records(columns, values):
+    """
+    Converts normalized cells to a list of dictionaries (one per row).
+    """
+    return [dict(zip(columns, row)) for row in values.tolist()]
+
 
-def dd_excel_to_json(input_file, maintain_columns=False):
+def _normalize_code_records(codes_list):
+    """
+    Changes all empty cells of code records to "NULL" (Code) or "" and strips any leading/trailing
+    whitespace.
+    """
+    for code in codes_list:
+        for key, value in code.items():
+            if pd.isnull(value):
+                if key == 'Code':
+                    code[key] = "NULL"
+                else:
+                    code[key] = ""
+            elif isinstance(value, str):
+                code[key] = value.strip()
+    return codes_list
+
+
+def dd_excel_to_json(input_file,
+                     maintain_columns=False,
+                     use_cache=False,
+                     engine='pandas'):
     """
     Convert a data dictionary Excel file to a JSON string.
 
@@ -571,15 +771,62 @@ def dd_excel_to_json(input_file, maintain_columns=False):
         input_file (str): The path to the input Excel file.
         maintain_columns (bool): Whether or not to maintain the added/removed columns without reverting
             back to the original column list for that databases
+        use_cache (bool or ParseCache): Whether or not to use the parse cache (see parse_cache.py). Unchanged
+            workbooks are then loaded from the cache instead of being parsed again. A ParseCache instance is
+            used instead of the default cache.
+        engine (str): 'pandas' reads each sheet with pd.ExcelFile.parse. 'openpyxl' reads all the sheets in
+            one pass and converts code sheets without DataFrames (see xlsx_reader.py), which is faster for
+            workbooks with many code sheets. Both give the same result.
 
     Returns:
         dict: A formatted JSON dict representing the data dictionary.
     """
-    # Define the column names for each sheet
-    workbook_column_names = get_col_headers('Typical')
+    if use_cache:
+        cache = use_cache if isinstance(use_cache,
+                                        ParseCache) else get_parse_cache()
+        return cache.get(
+            input_file,
+            lambda: dd_excel_to_json(
+                input_file, maintain_columns=maintain_columns, engine=engine),
+            variant=f"maintain_columns={maintain_columns}")
 
     # Load the dd workbook template
-    xl = pd.ExcelFile(input_file)
+    if engine == 'openpyxl':
+        xl = WorkbookReader(input_file)
+    elif engine == 'pandas':
+        xl = pd.ExcelFile(input_file)
+    else:
+        raise ValueError(
+            f"Unknown engine {engine!r}, expected 'pandas' or 'openpyxl'")
+
+    metadata, records, code_sheets = read_data_dict_sheets(
+        xl, input_file, maintain_columns)
+
+    for record, sheet_name in zip(records, code_sheets):
+        if sheet_name is not None:
+            # Replace the 'Acceptable Values' entry with the list of codes
+            record['Acceptable Values'] = read_code_sheet(xl, sheet_name)
+
+    metadata['Data Dictionary'] = records
+
+    return metadata
+
+
+def read_data_dict_sheets(xl, input_file, maintain_columns=False):
+    """
+    Reads every sheet of a data dictionary workbook except the code sheets.
+
+    Args:
+        xl (pd.ExcelFile or WorkbookReader): The open workbook.
+        input_file (str): The path to the workbook (for messages).
+        maintain_columns (bool): See dd_excel_to_json.
+
+    Returns:
+        tuple: The data dictionary with an empty 'Data Dictionary', the field records, and the name of the code
+            sheet to read into each record's 'Acceptable Values' (None for records without codes to read).
+    """
+    # Define the column names for each sheet
+    workbook_column_names = get_col_headers('Typical')
 
     # Read the Data Dictionary sheet
     try:
@@ -670,53 +917,60 @@ def dd_excel_to_json(input_file, maintain_columns=False):
     # Strip the leading/trailing whitespace and remove all \n from the keys
     df_data_dict.columns = df_data_dict.columns.str.strip()
 
-    # Iterate over each row in the 'Data Dictionary' DataFrame
-    for index, row in df_data_dict.iterrows():
-        record = row.to_dict()
-
-        # Change all empty cells to "" and strip any leading/trailing whitespace.
-        for key, value in record.items():
-            if pd.isnull(value):
-                record[key] = ""
-            elif isinstance(value, str):
-                record[key] = value.strip()
+    # Change all empty cells to "" and strip any leading/trailing whitespace, over the whole sheet at once
+    columns, values = _normalize_sheet(df_data_dict)
+    records = _sheet_records(columns, values)
+
+    # Find the fields whose 'Acceptable Values' indicates there are codes to be read from another sheet
+    if records:
+        # Like the records, a duplicated column name takes the value of the last column
+        acceptable_values = values[:, len(columns) - 1 -
+                                   columns[::-1].index('Acceptable Values')]
+        has_codes = ((acceptable_values == 'Codes') |
+                     (acceptable_values == 0)).tolist()
+    else:
+        has_codes = []
 
-        # Check if the 'Acceptable Values' indicates there are codes to be read from another sheet
-        if record['Acceptable Values'] == 'Codes' or record[
-                'Acceptable Values'] == 0:
+    code_sheets = []
+    for record, codes in zip(records, has_codes):
+        if codes:
             column_name = record['Field Name'].strip()
 
-            # Read the specific sheet for the codes, assuming it is named exactly as the 'Field Name'
+            # The codes are on the sheet named exactly as the 'Field Name'
             if column_name in xl.sheet_names:
-                df_codes = xl.parse(column_name, dtype=str)
-
-                # Strip the leading/trailing whitespace and remove all \n from the keys
-                # df_codes.columns = df_codes.columns.str.strip(
-                # ).str.replace('\n', '')
-
-                # Convert the codes sheet into a list of dictionaries
-                codes_list = df_codes.to_dict(orient='records')
-
-                # Change all empty cells to "NULL" and strip any leading/trailing whitespace. Remove all \n
-                for code in codes_list:
-                    for key, value in code.items():
-                        if pd.isnull(value):
-                            if key == 'Code':
-                                code[key] = "NULL"
-                            else:
-                                code[key] = ""
-                        elif isinstance(value, str):
-                            code[key] = value.strip()
-
-                # Replace the 'Acceptable Values' entry with this list
-                record['Acceptable Values'] = codes_list
-            else:
-                record['Acceptable Values'] = []
-
-        # Append the modified record to the data dictionary list
-        metadata['Data Dictionary'].append(record)
+                code_sheets.append(column_name)
+                continue
+            record['Acceptable Values'] = []
+        code_sheets.append(None)
 
-    return metadata
+    return metadata, records, code_sheets
+
+
+def read_code_sheet(xl, sheet_name):
+    """
+    Reads a code sheet of a data dictionary workbook.
+
+    Args:
+        xl (pd.ExcelFile or WorkbookReader): The open workbook.
+        sheet_name (str): The code sheet, named after its field.
+
+    Returns:
+        list[dict]: The codes, with empty cells changed to "NULL" (Code) or "" and leading/trailing whitespace
+            stripped.
+    """
+    if isinstance(xl, WorkbookReader):
+        # Read straight into a list of dictionaries, without a DataFrame per code sheet
+        return _normalize_code_records(xl.parse_records(sheet_name))
+
+    df_codes = xl.parse(sheet_name, dtype=str)
+
+    # Strip the leading/trailing whitespace and remove all \n from the keys
+    # df_codes.columns = df_codes.columns.str.strip(
+    # ).str.replace('\n', '')
+
+    # Change all empty cells to "NULL" (Code) or "" and strip any leading/trailing whitespace,
+    # then convert the codes sheet into a list of dictionaries
+    return _sheet_records(*_normalize_sheet(df_codes, code_nulls=True))
 
 
 def standardize_excel(input_file,
@@ -726,7 +980,12 @@ def standardize_excel(input_file,
                       order_codes=False,
                       maintain_columns=False,
                       custom_col_names=None,
-                      include_web_sleds_info=False):
+                      include_web_sleds_info=False,
+                      use_cache=False,
+                      engine='pandas',
+                      skip_unchanged=False,
+                      max_codes=DEFAULT_MAX_CODES,
+                      over_cap='skip'):
     """
     Standardizes and updates the Excel file for the data dictionary by setting the formatting to 
     the standard template.
@@ -740,13 +999,20 @@ def standardize_excel(input_file,
         maintain_columns (bool): Whether or not to maintain the columns from the original Excel file
         custom_col_names (dict): A dictionary of custom column names to use for the workbook (see get_col_headers)
         add_web_sleds_info (bool): Whether or not to add web sleds info
+        use_cache (bool): Whether or not to use the parse cache when reading the input file. Defaults to False
+        engine (str): The workbook writer, 'pandas' or 'xlsxwriter' (see dd_json_to_excel)
+        skip_unchanged (bool): Whether or not to leave the output file as it is if its content would not change
+            (see dd_json_to_excel)
+        max_codes (int): The most distinct values a field may have to find its codes (see standardize_json)
+        over_cap (str): Whether to 'skip' or 'sample' the fields over max_codes (see standardize_json)
 
     Returns:
-        None
+        bool: Whether or not the output file was written
     """
     # Convert Excel to JSON
     json_output = dd_excel_to_json(input_file,
-                                   maintain_columns=maintain_columns)
+                                   maintain_columns=maintain_columns,
+                                   use_cache=use_cache)
 
     # Standardize the JSON
     standard_json = standardize_json(
@@ -754,18 +1020,16 @@ def standardize_excel(input_file,
         find_codes=find_codes,
         order_codes=order_codes,
         custom_col_names=custom_col_names,
-        include_web_sleds_info=include_web_sleds_info)
+        include_web_sleds_info=include_web_sleds_info,
+        max_codes=max_codes,
+        over_cap=over_cap)
 
     # Create a JSON file if requested
     if make_json:
         with open(output_file.replace('.xlsx', '.json'), 'w') as f:
             f.write(json.dumps(standard_json, indent=4))
 
-    dd_json_to_excel(standard_json, output_file)
-
-
-def list_files(directory, extension=".xlsx"):
-    path = Path(directory)
-    return [
-        str(file) for file in path.rglob(f'*{extension}') if file.is_file()
-    ]
+    return dd_json_to_excel(standard_json,
+                            output_file,
+                            engine=engine,
+                            skip_unchanged=skip_unchanged)
@@ -0,0 +1,227 @@
+import os
+import threading
+import pandas as pd
+from .json_excel_conversion import read_code_sheet, read_data_dict_sheets
+
+CODES_KEY = "Acceptable Values"
+
+
+class LazyField(dict):
+    """
+    A field record of a LazyDataDict. Its "Acceptable Values" code sheet is read from the workbook the first
+    time the value is used, through any of the dict methods (field["Acceptable Values"], get, items, values,
+    copy, dict(field), json.dumps, pd.DataFrame, ...).
+
+    Until then, the record holds the original cell value ("Codes" or 0). Assigning or deleting the
+    "Acceptable Values" cancels the read.
+    """
+
+    __slots__ = ("_owner", "_code_sheet")
+
+    def __init__(self, record, owner, code_sheet):
+        super().__init__(record)
+        self._owner = owner
+        self._code_sheet = code_sheet
+
+    @property
+    def codes_loaded(self):
+        """
+        bool: Whether or not the "Acceptable Values" have been read (or never needed reading).
+        """
+        return self._code_sheet is None
+
+    def _load_codes(self):
+        if self._code_sheet is not None:
+            self._owner._load_field(self)
+
+    def _cancel_codes(self):
+        if self._code_sheet is not None:
+            self._owner._cancel_field(self)
+
+    def __getitem__(self, key):
+        if key == CODES_KEY:
+            self._load_codes()
+        return super().__getitem__(key)
+
+    def get(self, key, default=None):
+        if key == CODES_KEY:
+            self._load_codes()
+        return super().get(key, default)
+
+    def __setitem__(self, key, value):
+        if key == CODES_KEY:
+            self._cancel_codes()
+        super().__setitem__(key, value)
+
+    def __delitem__(self, key):
+        if key == CODES_KEY:
+            self._cancel_codes()
+        super().__delitem__(key)
+
+    def pop(self, key, *default):
+        if key == CODES_KEY:
+            self._load_codes()
+        return super().pop(key, *default)
+
+    def setdefault(self, key, default=None):
+        if key == CODES_KEY:
+            self._load_codes()
+        return super().setdefault(key, default)
+
+    def update(self, *args, **kwargs):
+        # Assigned values replace the pending code sheet
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
+
+    # Overriding __iter__ makes dict(field) and {**field} go through __getitem__ instead of copying the
+    # stored values directly
+    def __iter__(self):
+        return super().__iter__()
+
+    def items(self):
+        self._load_codes()
+        return super().items()
+
+    def values(self):
+        self._load_codes()
+        return super().values()
+
+    def popitem(self):
+        self._load_codes()
+        return super().popitem()
+
+    def copy(self):
+        self._load_codes()
+        return dict(super().items())
+
+    def __eq__(self, other):
+        self._load_codes()
+        return super().__eq__(other)
+
+    def __ne__(self, other):
+        self._load_codes()
+        return super().__ne__(other)
+
+    __hash__ = None
+
+    def __repr__(self):
+        self._load_codes()
+        return super().__repr__()
+
+    def __reduce__(self):
+        # Pickles (and copies) as a plain dict, with the codes
+        return (dict, (self.copy(),))
+
+
+class LazyDataDict(dict):
+    """
+    A data dictionary (as returned by dd_excel_to_json) whose code sheets are read on demand.
+
+    Every sheet but the code sheets is read up front. A field's code sheet is read the first time its
+    "Acceptable Values" are used (see LazyField), so searching field names or building relationships
+    never reads them. The workbook is opened again for the first code sheet and kept open until every
+    code sheet has been read or close() is called.
+
+    Attributes:
+        input_file (str): The path to the workbook.
+    """
+
+    def __init__(self, data_dict, input_file):
+        super().__init__(data_dict)
+        self.input_file = input_file
+        self._xl = None
+        self._signature = _file_signature(input_file)
+        self._pending = 0
+        self._lock = threading.RLock()
+
+    @property
+    def pending_code_sheets(self):
+        """
+        int: The number of code sheets that have not been read yet.
+        """
+        return self._pending
+
+    def _load_field(self, field):
+        with self._lock:
+            sheet_name = field._code_sheet
+            if sheet_name is None:
+                return  # Loaded by another thread
+            if self._xl is None:
+                if _file_signature(self.input_file) != self._signature:
+                    print(
+                        f"Warning: {self.input_file} changed since it was loaded, reading the codes of {sheet_name} from the new version"
+                    )
+                self._xl = pd.ExcelFile(self.input_file)
+            codes = read_code_sheet(self._xl, sheet_name)
+            dict.__setitem__(field, CODES_KEY, codes)
+            self._field_done(field)
+
+    def _cancel_field(self, field):
+        with self._lock:
+            if field._code_sheet is not None:
+                self._field_done(field)
+
+    def _field_done(self, field):
+        field._code_sheet = None
+        self._pending -= 1
+        if self._pending == 0:
+            self.close()
+
+    def load_codes(self):
+        """
+        Reads every code sheet that has not been read yet.
+
+        Returns:
+            LazyDataDict: The data dictionary itself.
+        """
+        for field in dict.get(self, "Data Dictionary", []):
+            if isinstance(field, LazyField):
+                field._load_codes()
+        return self
+
+    def close(self):
+        """
+        Closes the workbook if it is open. It is opened again if another code sheet is needed.
+        """
+        with self._lock:
+            if self._xl is not None:
+                self._xl.close()
+                self._xl = None
+
+    def __reduce__(self):
+        # Pickles (and copies) as a plain dict, with the codes
+        self.load_codes()
+        return (dict, (dict(self),))
+
+
+def _file_signature(path):
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+def load_lazy_data_dict(input_file, maintain_columns=False):
+    """
+    Loads a data dictionary workbook without reading its code sheets until they are used. The result is the
+    same as dd_excel_to_json(input_file, maintain_columns) once the codes are read, and can be used anywhere
+    that is.
+
+    Args:
+        input_file (str): The path to the input Excel file.
+        maintain_columns (bool): See dd_excel_to_json.
+
+    Returns:
+        LazyDataDict: The data dictionary. Its 'Data Dictionary' records are LazyFields.
+    """
+    with pd.ExcelFile(input_file) as xl:
+        metadata, records, code_sheets = read_data_dict_sheets(
+            xl, input_file, maintain_columns
+        )
+
+    data_dict = LazyDataDict(metadata, input_file)
+    fields = []
+    for record, sheet_name in zip(records, code_sheets):
+        fields.append(LazyField(record, data_dict, sheet_name))
+        if sheet_name is not None:
+            data_dict._pending += 1
+    dict.__setitem__(data_dict, "Data Dictionary", fields)
+    return data_dict
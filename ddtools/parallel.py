@@ -0,0 +1,192 @@
+import os
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from .json_excel_conversion import dd_excel_to_json
+from .lazy_data_dict import load_lazy_data_dict
+from .parse_cache import get_parse_cache
+
+# Starting a worker process (which imports pandas, and is spawned on Windows) takes about as long as parsing
+# a few dozen workbooks, so by default a worker is only started for every this many workbooks. Fewer workbooks
+# are parsed in the current process.
+MIN_FILES_PER_WORKER = 25
+
+
+def default_workers(files=None):
+    """
+    Args:
+        files (int, optional): The number of workbooks to parse. Defaults to None, for many workbooks.
+
+    Returns:
+        int: The default number of worker processes: one per CPU core, and at most one per MIN_FILES_PER_WORKER
+            workbooks, so small batches are parsed without a process pool.
+    """
+    workers = os.cpu_count() or 1
+    if files is not None:
+        workers = min(workers, files // MIN_FILES_PER_WORKER)
+    return max(workers, 1)
+
+
+def _load_one(file, maintain_columns, use_cache, engine="pandas", lazy=False):
+    """
+    Parses one workbook, capturing the error instead of raising it. Runs in a worker process.
+    """
+    try:
+        if lazy:
+            data_dict = load_lazy_data_dict(file, maintain_columns=maintain_columns)
+        else:
+            data_dict = dd_excel_to_json(
+                file, maintain_columns=maintain_columns, use_cache=use_cache, engine=engine
+            )
+        return file, data_dict, None
+    except Exception as e:
+        return file, None, f"{type(e).__name__}: {e}"
+
+
+def iter_pool(function, arguments, workers=None, ordered=True):
+    """
+    Calls a function with each tuple of arguments in a process pool and yields the results as they finish.
+
+    At most two calls per worker are submitted and not yet yielded at a time, so arguments are only taken from the
+    iterable (and results only held) a few at a time, and closing the generator early stops the remaining calls.
+
+    Args:
+        function (callable): A module level function (it is pickled to the workers). Exceptions it raises are
+            raised from the generator, so it should capture errors it can recover from in its result.
+        arguments (iterable[tuple]): The arguments of each call.
+        workers (int, optional): The number of worker processes. 1 calls the function in the current process.
+            Defaults to one per CPU core.
+        ordered (bool, optional): Whether or not to yield the results in the order of arguments. If True, an
+            exception is raised when the call that raised it is reached. If False, results are yielded (and
+            exceptions raised) as soon as they are ready. Defaults to True.
+
+    Yields:
+        The result of each call.
+    """
+    if workers is None:
+        workers = default_workers()
+    arguments = iter(arguments)
+
+    if workers <= 1:
+        for args in arguments:
+            yield function(*args)
+        return
+
+    executor = ProcessPoolExecutor(max_workers=workers)
+    max_in_flight = workers * 2
+    try:
+        # Submitted futures not yet yielded: in order of arguments if ordered, else a set of those still running
+        pending = deque() if ordered else set()
+        exhausted = False
+        while True:
+            while not exhausted and len(pending) < max_in_flight:
+                args = next(arguments, None)
+                if args is None:
+                    exhausted = True
+                    break
+                future = executor.submit(function, *args)
+                if ordered:
+                    pending.append(future)
+                else:
+                    pending.add(future)
+            if not pending:
+                break
+
+            if ordered:
+                # Finished calls behind the first one stay in pending (and count against max_in_flight) until
+                # their turn, so no more results are held than calls are in flight
+                yield pending.popleft().result()
+            else:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    pending.remove(future)
+                    yield future.result()
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def iter_load_data_dicts(
+    files,
+    workers=None,
+    ordered=True,
+    maintain_columns=False,
+    use_cache=False,
+    engine="pandas",
+    lazy=False,
+):
+    """
+    Parses data dictionary workbooks in a process pool and yields them as they are parsed.
+
+    At most two workbooks per worker are in flight at a time, so closing the generator early
+    stops parsing the remaining workbooks.
+
+    Args:
+        files (list[str]): The paths of the workbooks to parse.
+        workers (int, optional): The number of worker processes. 1 parses in the current process. Defaults to one per CPU
+            core, with a worker per MIN_FILES_PER_WORKER workbooks at most (see default_workers).
+        ordered (bool, optional): Whether or not to yield the workbooks in the order of files. If False, workbooks are
+            yielded as soon as they are parsed. Defaults to True.
+        maintain_columns (bool, optional): Passed to dd_excel_to_json. Defaults to False.
+        use_cache (bool, optional): Whether or not to use the parse cache. Defaults to False.
+        engine (str, optional): The workbook reader, "pandas" or "openpyxl" (see dd_excel_to_json). Defaults to "pandas".
+        lazy (bool, optional): Whether or not to load LazyDataDicts, which read their code sheets when they are first
+            used (see lazy_data_dict.py). They keep reading from their workbooks, so they are loaded in the current
+            process, without the parse cache or engine. Defaults to False.
+
+    Yields:
+        tuple: (file, data dictionary, error). If parsing failed, the data dictionary is None and error is
+            a string describing the exception, otherwise error is None.
+    """
+    files = list(files)
+    if workers is None:
+        workers = default_workers(len(files))
+    workers = min(workers, len(files))
+    if lazy:
+        workers = 1
+
+    # Pass the cache itself so worker processes use the same cache configuration
+    cache = get_parse_cache() if use_cache is True else use_cache
+
+    yield from iter_pool(
+        _load_one,
+        ((file, maintain_columns, cache, engine, lazy) for file in files),
+        workers,
+        ordered,
+    )
+
+
+def load_data_dicts(
+    files,
+    workers=None,
+    ordered=True,
+    maintain_columns=False,
+    use_cache=False,
+    engine="pandas",
+    lazy=False,
+):
+    """
+    Parses data dictionary workbooks in a process pool.
+
+    Args:
+        files (list[str]): The paths of the workbooks to parse.
+        workers (int, optional): The number of worker processes. Defaults to one per CPU core, with a worker per
+            MIN_FILES_PER_WORKER workbooks at most (see default_workers).
+        ordered (bool, optional): Whether or not to keep the data dictionaries in the order of files. Defaults to True.
+        maintain_columns (bool, optional): Passed to dd_excel_to_json. Defaults to False.
+        use_cache (bool, optional): Whether or not to use the parse cache. Defaults to False.
+        engine (str, optional): The workbook reader, "pandas" or "openpyxl" (see dd_excel_to_json). Defaults to "pandas".
+        lazy (bool, optional): Whether or not to load LazyDataDicts (see iter_load_data_dicts). Defaults to False.
+
+    Returns:
+        tuple: A list of (file, data dictionary) tuples for the parsed workbooks and a list of
+            {"File": file, "Error": error} dicts for the workbooks that could not be parsed.
+    """
+    loaded = []
+    errors = []
+    for file, data_dict, error in iter_load_data_dicts(
+        files, workers, ordered, maintain_columns, use_cache, engine, lazy
+    ):
+        if error is not None:
+            errors.append({"File": file, "Error": error})
+        else:
+            loaded.append((file, data_dict))
+    return loaded, errors
@@ -0,0 +1,215 @@
+import hashlib
+import os
+import pickle
+
+# Bump this when the parsed data dictionary format changes so old cache entries are ignored
+CACHE_FORMAT_VERSION = 2
+
+DEFAULT_CACHE_DIR = os.environ.get(
+    "DDTOOLS_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".ddtools_cache")
+)
+DEFAULT_MAX_BYTES = 1024 * 1024 * 1024  # 1 GB
+
+
+class ParseCache:
+    """
+    A disk cache of parsed data dictionary workbooks.
+
+    Entries are pickled parse results stored in a cache directory, one entry file per workbook and
+    variant (the parse options) named by the workbook's absolute path and the variant. An entry
+    starts with a stamp of the workbook's size and modification time (and optionally a hash of its
+    content), so a workbook is parsed again as soon as it changes. The cache is bounded by size and the least recently used entries are evicted
+    first. The cache keeps a running total of the size it has written and only lists the cache
+    directory when the total goes over max_bytes, so storing an entry does not read the directory.
+
+    Attributes:
+        cache_dir (str): The directory the cache entries are stored in.
+        max_bytes (int): The maximum total size of the cache entries.
+        use_hash (bool): Whether or not to include a hash of the workbook content in the key. This
+            protects against copies that keep the modification time, but reads every workbook.
+    """
+
+    def __init__(self, cache_dir=None, max_bytes=DEFAULT_MAX_BYTES, use_hash=False):
+        self.cache_dir = cache_dir if cache_dir is not None else DEFAULT_CACHE_DIR
+        self.max_bytes = max_bytes
+        self.use_hash = use_hash
+        # The total size of the entries, counted from the directory on the first store and kept up to date
+        # with the entries written since. Other processes writing to the cache make it an underestimate.
+        self._total = None
+
+    def _path_key(self, input_file):
+        """
+        Returns the start of the names of the cache entry files of a workbook, one for each variant.
+        """
+        path = os.path.normcase(os.path.abspath(input_file))
+        return hashlib.sha1(path.encode("utf-8")).hexdigest()
+
+    def _entry_file(self, input_file, variant=""):
+        """
+        Returns the cache entry file of a variant of a workbook.
+        """
+        variant_key = hashlib.sha1(variant.encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, f"{self._path_key(input_file)}_{variant_key}.pickle")
+
+    def _stamp(self, input_file, variant):
+        """
+        Returns the stamp of the current version of a workbook, the first line of its entry.
+        """
+        stat = os.stat(input_file)
+        stamp = f"{CACHE_FORMAT_VERSION}|{stat.st_size}|{stat.st_mtime_ns}|{variant}"
+        if self.use_hash:
+            with open(input_file, "rb") as f:
+                stamp += "|" + hashlib.sha1(f.read()).hexdigest()
+        return hashlib.sha1(stamp.encode("utf-8")).hexdigest().encode("ascii") + b"\n"
+
+    def get(self, input_file, loader, variant=""):
+        """
+        Returns the parsed workbook from the cache, parsing and storing it if it is not cached.
+
+        Args:
+            input_file (str): The path to the workbook.
+            loader (callable): A function without arguments that parses the workbook.
+            variant (str, optional): Distinguishes parses of the same workbook with different options.
+
+        Returns:
+            The (freshly unpickled) parse result, so callers are free to modify it.
+        """
+        entry_file = self._entry_file(input_file, variant)
+        stamp = self._stamp(input_file, variant)
+        try:
+            with open(entry_file, "rb") as f:
+                # An entry of another version of the workbook is replaced below
+                if f.readline() == stamp:
+                    data = pickle.load(f)
+                    # Mark the entry as recently used
+                    os.utime(entry_file)
+                    return data
+        except (OSError, EOFError, pickle.UnpicklingError):
+            pass
+
+        data = loader()
+        self._store(entry_file, stamp, data)
+        return data
+
+    def _store(self, entry_file, stamp, data):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        if self._total is None:
+            self._total = self.size()
+        try:
+            replaced = os.stat(entry_file).st_size
+        except OSError:
+            replaced = 0
+
+        # Write to a temporary file first so other processes never read a partial entry
+        tmp_file = f"{entry_file}.{os.getpid()}.tmp"
+        with open(tmp_file, "wb") as f:
+            f.write(stamp)
+            pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+            size = f.tell()
+        os.replace(tmp_file, entry_file)
+        self._total += size - replaced
+        if self._total > self.max_bytes:
+            self._evict()
+
+    def _entries(self):
+        entries = []
+        try:
+            with os.scandir(self.cache_dir) as it:
+                for entry in it:
+                    if entry.name.endswith(".pickle"):
+                        stat = entry.stat()
+                        entries.append((stat.st_mtime, stat.st_size, entry.path))
+        except FileNotFoundError:
+            pass
+        return entries
+
+    def _evict(self):
+        """
+        Removes the least recently used entries until the cache fits in max_bytes.
+        """
+        entries = self._entries()
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+        self._total = total
+
+    def invalidate(self, input_file=None):
+        """
+        Removes cache entries.
+
+        Args:
+            input_file (str, optional): The workbook to remove the entries (of every variant) of. Defaults to None,
+                which clears the whole cache.
+
+        Returns:
+            int: The number of entries removed.
+        """
+        paths = [path for _, _, path in self._entries()]
+        if input_file is not None:
+            path_key = self._path_key(input_file)
+            paths = [path for path in paths if os.path.basename(path).startswith(path_key)]
+        removed = 0
+        for path in paths:
+            try:
+                os.remove(path)
+                removed += 1
+            except OSError:
+                pass
+        # Counted again on the next store
+        self._total = None
+        return removed
+
+    def size(self):
+        """
+        Returns:
+            int: The total size in bytes of the cache entries.
+        """
+        return sum(size for _, size, _ in self._entries())
+
+
+_default_cache = ParseCache()
+
+
+def get_parse_cache():
+    """
+    Returns:
+        ParseCache: The cache used by dd_excel_to_json(use_cache=True).
+    """
+    return _default_cache
+
+
+def configure_parse_cache(cache_dir=None, max_bytes=DEFAULT_MAX_BYTES, use_hash=False):
+    """
+    Replaces the cache used by dd_excel_to_json(use_cache=True).
+
+    Args:
+        cache_dir (str, optional): The cache directory. Defaults to $DDTOOLS_CACHE_DIR or ~/.ddtools_cache.
+        max_bytes (int, optional): The maximum total size of the cache. Defaults to 1 GB.
+        use_hash (bool, optional): Whether or not to include a content hash in the cache key. Defaults to False.
+
+    Returns:
+        ParseCache: The new cache.
+    """
+    global _default_cache
+    _default_cache = ParseCache(cache_dir, max_bytes, use_hash)
+    return _default_cache
+
+
+def invalidate_parse_cache(input_file=None):
+    """
+    Removes entries from the cache used by dd_excel_to_json(use_cache=True).
+
+    Args:
+        input_file (str, optional): The workbook to remove the entries (of every variant) of. Defaults to None,
+            which clears the whole cache.
+
+    Returns:
+        int: The number of entries removed.
+    """
+    return _default_cache.invalidate(input_file)
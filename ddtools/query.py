@@ -0,0 +1,493 @@
+import re
+
+# Pseudo column holding the concatenated values of the searched columns (concat=True searches)
+CONCAT_COLUMN = "(Concatenated)"
+
+
+def field_text(value):
+    """
+    Returns the searchable text of a data dictionary cell. Code lists are searched as 'Codes'
+    (the value shown in the workbook cell).
+
+    Args:
+        value: The cell value from a data dictionary record.
+
+    Returns:
+        str: The text of the cell.
+    """
+    if isinstance(value, str):
+        return value
+    if isinstance(value, list):
+        return "Codes"
+    return str(value)
+
+
+class Term:
+    """
+    A search term that must appear in at least one of its columns.
+
+    Attributes:
+        text (str): The text to find (a word or a phrase).
+        columns (tuple[str]): The columns the term is searched in.
+    """
+
+    def __init__(self, text, columns):
+        self.text = text
+        self.columns = tuple(columns)
+        self.pattern_id = None
+
+    def __repr__(self):
+        return f"Term({self.text!r}, {self.columns!r})"
+
+
+class And:
+    """
+    All children must match.
+    """
+
+    def __init__(self, children):
+        self.children = list(children)
+
+    def __repr__(self):
+        return f"And({self.children!r})"
+
+
+class Or:
+    """
+    At least one child must match. If labels are given, a match reports the label (column name) of
+    the first matching child.
+    """
+
+    def __init__(self, children, labels=None):
+        self.children = list(children)
+        self.labels = labels
+
+    def __repr__(self):
+        return f"Or({self.children!r})"
+
+
+class Not:
+    """
+    The child must not match.
+    """
+
+    def __init__(self, child):
+        self.child = child
+
+    def __repr__(self):
+        return f"Not({self.child!r})"
+
+
+def _trie_regex(node):
+    """
+    Converts a character trie into a regular expression. Optional branches are greedy, so at any
+    position the expression matches the longest pattern that starts there.
+    """
+    terminal = "" in node
+    pieces = [re.escape(ch) + _trie_regex(child) for ch, child in node.items() if ch]
+    if not pieces:
+        return ""
+    if len(pieces) == 1 and not terminal:
+        return pieces[0]
+    return "(?:" + "|".join(pieces) + ")" + ("?" if terminal else "")
+
+
+class PatternMatcher:
+    """
+    Finds which of a set of patterns occur in a text in a single pass over the text.
+
+    Like an Aho-Corasick automaton, the patterns are merged into one trie, so the work at each
+    position of the text depends on the trie branches that match there rather than on the number
+    of patterns. The trie is compiled into a regular expression so the scan runs in the regex
+    engine. The search restarts one character after each match, so overlapping patterns are
+    found too. At each position the longest matching pattern is found, and every pattern that is
+    a prefix of it occurs at the same position.
+    """
+
+    def __init__(self, patterns):
+        self.ids = {}
+        trie = {}
+        for pattern in patterns:
+            if pattern in self.ids:
+                continue
+            self.ids[pattern] = len(self.ids)
+            if not pattern:
+                continue
+            node = trie
+            for ch in pattern:
+                node = node.setdefault(ch, {})
+            node[""] = {}
+
+        # Every pattern implies the patterns that are prefixes of it
+        self.implied = {
+            pattern: frozenset(
+                pattern_id for other, pattern_id in self.ids.items()
+                if other and pattern.startswith(other)
+            )
+            for pattern in self.ids
+        }
+        self.empty = frozenset(
+            pattern_id for pattern, pattern_id in self.ids.items() if not pattern
+        )
+        self.regex = re.compile(_trie_regex(trie), re.DOTALL) if trie else None
+
+    def find(self, text):
+        """
+        Args:
+            text (str): The text to scan.
+
+        Returns:
+            set[int]: The ids of the patterns found in the text (empty patterns are always found).
+        """
+        found = set(self.empty)
+        if self.regex is None:
+            return found
+        search = self.regex.search
+        match = search(text)
+        while match is not None:
+            found |= self.implied[match.group()]
+            match = search(text, match.start() + 1)
+        return found
+
+
+# Up to this many distinct patterns, substring checks on the pre-lowered text are faster than the
+# multi-pattern matcher (see scripts/benchmark_search.py)
+MAX_SUBSTRING_PATTERNS = 64
+
+
+class _ColumnValues(dict):
+    """
+    The per-record values a compiled predicate reads, computed the first time a column is used.
+    """
+
+    __slots__ = ("item", "compute")
+
+    def __init__(self, item, compute):
+        self.item = item
+        self.compute = compute
+
+    def __missing__(self, col):
+        value = self[col] = self.compute(self.item, col)
+        return value
+
+
+class CompiledQuery:
+    """
+    A search compiled into a predicate tree of Term/And/Or/Not nodes.
+
+    The tree is turned into a short-circuiting predicate of nested closures once. Each column of
+    a record is lower-cased at most once, and only when the predicate needs it. Queries with many
+    patterns use one multi-pattern matcher per column, so each column is scanned once however many
+    terms the query has.
+
+    Attributes:
+        root: The root node of the predicate tree.
+        match_case (bool): Whether or not the terms are case sensitive.
+        columns (list[str]): The columns the query reads (in order of first use).
+        concat_columns (list[str]): The columns concatenated into CONCAT_COLUMN, if used.
+        patterns (list[str]): The distinct (lower case unless match_case) term texts.
+        positive_patterns (list[str]): The patterns that are not negated.
+        show_column (bool): Whether or not search locations should name the matched column.
+    """
+
+    def __init__(self, root, match_case=False, concat_columns=None, show_column=False):
+        self.root = root
+        self.match_case = match_case
+        self.concat_columns = list(concat_columns or [])
+        self.show_column = show_column
+
+        self.columns = []
+        patterns = {}
+        positive = set()
+
+        def visit(node, negated):
+            if isinstance(node, Term):
+                pattern = node.text if match_case else node.text.lower()
+                node.pattern_id = patterns.setdefault(pattern, len(patterns))
+                for col in node.columns:
+                    if col not in self.columns:
+                        self.columns.append(col)
+                if not negated:
+                    positive.add(node.pattern_id)
+            elif isinstance(node, Not):
+                visit(node.child, not negated)
+            else:
+                for child in node.children:
+                    visit(child, negated)
+
+        visit(root, False)
+        self.patterns = list(patterns)
+        self._positive = frozenset(positive)
+        # The patterns whose presence can make the query match (not only under a NOT)
+        self.positive_patterns = [self.patterns[i] for i in sorted(positive)]
+        self._matcher = None
+        if len(self.patterns) > MAX_SUBSTRING_PATTERNS:
+            self._matcher = PatternMatcher(self.patterns)
+
+        if isinstance(root, Or) and root.labels is not None:
+            self._labelled = [
+                (label, self._compile(child))
+                for label, child in zip(root.labels, root.children)
+            ]
+            self._predicate = None
+        else:
+            self._labelled = None
+            self._predicate = self._compile(root)
+
+    def _compile(self, node):
+        """
+        Returns the predicate of a node, reading column values from the mapping v.
+        """
+        if isinstance(node, Term):
+            # The pattern itself is found in the pre-lowered text, its id in the matcher's results
+            key = self.patterns[node.pattern_id] if self._matcher is None else node.pattern_id
+            columns = node.columns
+            if len(columns) == 1:
+                col = columns[0]
+                return lambda v: key in v[col]
+            return lambda v: any(key in v[col] for col in columns)
+        if isinstance(node, Not):
+            child = self._compile(node.child)
+            return lambda v: not child(v)
+        is_and = isinstance(node, And)
+        children = node.children
+        if (children and all(isinstance(child, Term) for child in children)
+                and len(children[0].columns) == 1
+                and all(child.columns == children[0].columns for child in children)):
+            # Terms of one column (the usual compile_search branch) read the column once
+            col = children[0].columns[0]
+            if self._matcher is not None:
+                ids = frozenset(child.pattern_id for child in node.children)
+                if is_and:
+                    return lambda v: ids <= v[col]
+                return lambda v: not ids.isdisjoint(v[col])
+            patterns = tuple(dict.fromkeys(
+                self.patterns[child.pattern_id] for child in node.children
+            ))
+            if len(patterns) == 1:
+                pattern = patterns[0]
+                return lambda v: pattern in v[col]
+            if is_and:
+
+                def predicate(v):
+                    text = v[col]
+                    for pattern in patterns:
+                        if pattern not in text:
+                            return False
+                    return True
+
+            else:
+
+                def predicate(v):
+                    text = v[col]
+                    for pattern in patterns:
+                        if pattern in text:
+                            return True
+                    return False
+
+            return predicate
+
+        children = [self._compile(child) for child in node.children]
+        if is_and:
+            return lambda v: all(child(v) for child in children)
+        return lambda v: any(child(v) for child in children)
+
+    def _column_value(self, item, col):
+        """
+        Returns the pre-lowered text of a column, or the pattern ids found in it when the query
+        uses the multi-pattern matcher.
+        """
+        if col == CONCAT_COLUMN:
+            text = " ".join(field_text(item[c]) for c in self.concat_columns)
+        else:
+            text = field_text(item[col])
+        if not self.match_case:
+            text = text.lower()
+        if self._matcher is None:
+            return text
+        return self._matcher.find(text)
+
+    def _has_positive(self, value):
+        if self._matcher is None:
+            return any(self.patterns[i] in value for i in self._positive)
+        return not value.isdisjoint(self._positive)
+
+    def match(self, item):
+        """
+        Checks a 'Data Dictionary' record against the query.
+
+        Args:
+            item (dict): The record to check.
+
+        Returns:
+            tuple: (matched, column). column is the column that matched (see show_column) or None.
+        """
+        values = _ColumnValues(item, self._column_value)
+        if self._labelled is not None:
+            for label, predicate in self._labelled:
+                if predicate(values):
+                    return True, label
+            return False, None
+
+        if not self._predicate(values):
+            return False, None
+        column = next(
+            (col for col in self.columns if self._has_positive(values[col])), None
+        )
+        return True, column
+
+
+def compile_search(
+    search_terms,
+    column_names=["Field Name"],
+    search_term_op="AND",
+    column_op="OR",
+    match_case=False,
+    concat=False,
+):
+    """
+    Compiles the search_data_dicts search arguments into a query.
+
+    Args:
+        search_terms (list): A list of search terms.
+        column_names (list, optional): The columns to search. Defaults to ["Field Name"].
+        search_term_op (str, optional): The operation to perform on the search terms ("AND" or "OR"). Defaults to "AND".
+        column_op (str, optional): The operation to perform on the columns ("AND" or "OR"). Defaults to "OR".
+        match_case (bool, optional): Whether or not to match the case of the search terms. Defaults to False.
+        concat (bool, optional): Whether or not to concatenate the columns before searching. Defaults to False.
+
+    Returns:
+        CompiledQuery: The compiled query.
+    """
+    for op in (search_term_op, column_op):
+        if op not in ("AND", "OR"):
+            raise ValueError(f"Unknown operation {op!r}, expected 'AND' or 'OR'")
+    term_op = And if search_term_op == "AND" else Or
+
+    if concat:
+        root = term_op([Term(term, [CONCAT_COLUMN]) for term in search_terms])
+        return CompiledQuery(root, match_case, concat_columns=column_names)
+
+    branches = [
+        term_op([Term(term, [col]) for term in search_terms]) for col in column_names
+    ]
+    if column_op == "AND":
+        return CompiledQuery(And(branches), match_case)
+    return CompiledQuery(
+        Or(branches, labels=list(column_names)),
+        match_case,
+        show_column=len(column_names) > 1,
+    )
+
+
+_TOKEN_RE = re.compile(
+    r'\s*(?:(?P<paren>[()])|\[(?P<scope>[^\]]+)\]:|(?P<bare_scope>[A-Za-z_]\w*):(?=\S)'
+    r'|"(?P<phrase>[^"]*)"|(?P<word>[^\s()"]+))'
+)
+
+
+def _tokenize_query(text):
+    tokens = []
+    pos = 0
+    text = text.rstrip()
+    while pos < len(text):
+        m = _TOKEN_RE.match(text, pos)
+        if m is None:
+            raise ValueError(f"Could not parse query at position {pos}: {text[pos:]!r}")
+        pos = m.end()
+        if m.group("paren"):
+            tokens.append(("paren", m.group("paren")))
+        elif m.group("scope") is not None:
+            tokens.append(("scope", m.group("scope").strip()))
+        elif m.group("bare_scope") is not None:
+            tokens.append(("scope", m.group("bare_scope")))
+        elif m.group("phrase") is not None:
+            tokens.append(("term", m.group("phrase")))
+        elif m.group("word") in ("AND", "OR", "NOT"):
+            tokens.append(("op", m.group("word")))
+        else:
+            tokens.append(("term", m.group("word")))
+    return tokens
+
+
+def parse_query(text, column_names=["Field Name"], match_case=False):
+    """
+    Parses a query string into a compiled query.
+
+    Syntax:
+        - Words are search terms and "quoted text" is a phrase searched as a whole.
+        - Terms next to each other must all match (implicit AND). AND, OR and NOT (upper case) combine
+          terms, with NOT binding tightest and OR loosest. Parentheses group terms.
+        - A term can be limited to a column with [Column Name]:term or Column:term
+          (e.g. [Field Name]:marss Description:"english learner").
+
+    Args:
+        text (str): The query string.
+        column_names (list, optional): The columns searched by terms without a column. Defaults to ["Field Name"].
+        match_case (bool, optional): Whether or not to match the case of the search terms. Defaults to False.
+
+    Returns:
+        CompiledQuery: The compiled query.
+    """
+    tokens = _tokenize_query(text)
+    pos = 0
+
+    def peek():
+        return tokens[pos] if pos < len(tokens) else (None, None)
+
+    def parse_or():
+        nonlocal pos
+        children = [parse_and()]
+        while peek() == ("op", "OR"):
+            pos += 1
+            children.append(parse_and())
+        return children[0] if len(children) == 1 else Or(children)
+
+    def parse_and():
+        nonlocal pos
+        children = [parse_not()]
+        while True:
+            kind, value = peek()
+            if (kind, value) == ("op", "AND"):
+                pos += 1
+            elif kind is None or (kind, value) in (("op", "OR"), ("paren", ")")):
+                break
+            children.append(parse_not())
+        return children[0] if len(children) == 1 else And(children)
+
+    def parse_not():
+        nonlocal pos
+        if peek() == ("op", "NOT"):
+            pos += 1
+            return Not(parse_not())
+        return parse_atom()
+
+    def parse_atom():
+        nonlocal pos
+        kind, value = peek()
+        pos += 1
+        if (kind, value) == ("paren", "("):
+            node = parse_or()
+            if peek() != ("paren", ")"):
+                raise ValueError(f"Missing ')' in query {text!r}")
+            pos += 1
+            return node
+        if kind == "scope":
+            term_kind, term = peek()
+            if term_kind != "term":
+                raise ValueError(f"Expected a term after [{value}]: in query {text!r}")
+            pos += 1
+            return Term(term, [value])
+        if kind == "term":
+            return Term(value, column_names)
+        raise ValueError(f"Unexpected {value!r} in query {text!r}")
+
+    if not tokens:
+        raise ValueError("The query is empty")
+    root = parse_or()
+    if pos != len(tokens):
+        raise ValueError(f"Unexpected {tokens[pos][1]!r} in query {text!r}")
+
+    query = CompiledQuery(root, match_case)
+    query.show_column = len(query.columns) > 1
+    return query
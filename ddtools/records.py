@@ -0,0 +1,208 @@
+import sys
+
+# Values up to this long (data types, statuses, Y/N flags, ...) repeat across fields and are interned
+MAX_INTERNED_LENGTH = 32
+
+CODES_KEY = "Acceptable Values"
+
+_layouts = {}  # column names -> Layout
+
+
+class Layout:
+    """
+    The column names shared by every record with the same columns, and the position of each column's value.
+    """
+
+    __slots__ = ("columns", "positions", "_extended")
+
+    def __init__(self, columns):
+        self.columns = columns
+        self.positions = {column: i for i, column in enumerate(columns)}
+        self._extended = {}  # column -> layout with the column added
+
+    def extended(self, column):
+        """
+        Returns:
+            Layout: This layout with a column added at the end.
+        """
+        if column not in self._extended:
+            self._extended[column] = layout_for(self.columns + (column,))
+        return self._extended[column]
+
+
+def layout_for(columns):
+    """
+    Args:
+        columns (iterable): Column names.
+
+    Returns:
+        Layout: The one Layout of those column names, in that order. The names are interned.
+    """
+    columns = tuple(columns)
+    layout = _layouts.get(columns)
+    if layout is None:
+        columns = tuple(sys.intern(c) if type(c) is str else c for c in columns)
+        layout = _layouts[columns] = Layout(columns)
+    return layout
+
+
+class Record:
+    """
+    A row of a data dictionary sheet stored as a list of values and a shared Layout, instead of a dict per row.
+    It supports the dict operations used on the JSON formatted rows (record["Field Name"], get, in, items,
+    assignment, ...), so it can be used in their place by code that reads or updates the rows.
+    """
+
+    __slots__ = ("_layout", "_values")
+
+    def __init__(self, row):
+        intern = sys.intern
+        self._layout = layout_for(row)
+        self._values = [
+            intern(value) if type(value) is str and len(value) <= MAX_INTERNED_LENGTH else value
+            for value in row.values()
+        ]
+
+    def __getitem__(self, key):
+        return self._values[self._layout.positions[key]]
+
+    def get(self, key, default=None):
+        position = self._layout.positions.get(key)
+        return default if position is None else self._values[position]
+
+    def __setitem__(self, key, value):
+        position = self._layout.positions.get(key)
+        if position is None:
+            self._layout = self._layout.extended(key)
+            self._values.append(value)
+        else:
+            self._values[position] = value
+
+    def __delitem__(self, key):
+        position = self._layout.positions[key]
+        columns = self._layout.columns
+        self._layout = layout_for(columns[:position] + columns[position + 1 :])
+        del self._values[position]
+
+    def __contains__(self, key):
+        return key in self._layout.positions
+
+    def __iter__(self):
+        return iter(self._layout.columns)
+
+    def __len__(self):
+        return len(self._values)
+
+    def keys(self):
+        return self._layout.columns
+
+    def values(self):
+        return list(self._values)
+
+    def items(self):
+        return list(zip(self._layout.columns, self._values))
+
+    def to_dict(self):
+        """
+        Returns:
+            dict: The row in the JSON format.
+        """
+        return dict(zip(self._layout.columns, self._values))
+
+    def __eq__(self, other):
+        if isinstance(other, Record):
+            other = other.to_dict()
+        return self.to_dict() == other
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+
+class CodeRecord(Record):
+    """
+    A row of a code sheet.
+    """
+
+    __slots__ = ()
+
+
+class RelationshipRecord(Record):
+    """
+    A row of the Relationships sheet.
+    """
+
+    __slots__ = ()
+
+
+class FieldRecord(Record):
+    """
+    A row of the Data Dictionary sheet. Its "Acceptable Values" codes, if any, are CodeRecords.
+
+    Attributes:
+        dd_for (str): The (interned) table the field is in.
+    """
+
+    __slots__ = ("dd_for",)
+
+    def __init__(self, row, dd_for=None):
+        super().__init__(row)
+        self.dd_for = sys.intern(dd_for) if type(dd_for) is str else dd_for
+        position = self._layout.positions.get(CODES_KEY)
+        if position is not None and isinstance(self._values[position], list):
+            self._values[position] = [CodeRecord(code) for code in self._values[position]]
+
+    def to_dict(self):
+        row = super().to_dict()
+        if isinstance(row.get(CODES_KEY), list):
+            row[CODES_KEY] = [
+                code.to_dict() if isinstance(code, Record) else code for code in row[CODES_KEY]
+            ]
+        return row
+
+
+def compact_data_dict(data_dict):
+    """
+    Converts the fields, codes and relationships of a JSON formatted data dictionary to compact records, which
+    take a fraction of the memory of dicts when many data dictionaries are loaded at once.
+
+    Args:
+        data_dict (dict): The data dictionary (see dd_excel_to_json). It is not changed.
+
+    Returns:
+        dict: A copy of the data dictionary with FieldRecords in "Data Dictionary" and RelationshipRecords in
+            "Relationships". Use expand_data_dict to convert it back before writing it (dd_json_to_excel,
+            json.dumps).
+    """
+    compact = dict(data_dict)
+    dd_for = data_dict.get("Data Dictionary For")
+    if isinstance(dd_for, str):
+        dd_for = compact["Data Dictionary For"] = sys.intern(dd_for)
+    compact["Data Dictionary"] = [
+        FieldRecord(field, dd_for) for field in data_dict.get("Data Dictionary", [])
+    ]
+    if "Relationships" in data_dict:
+        compact["Relationships"] = [
+            RelationshipRecord(relationship) for relationship in data_dict["Relationships"]
+        ]
+    return compact
+
+
+def expand_data_dict(data_dict):
+    """
+    Converts the records of a data dictionary from compact_data_dict back to the JSON format.
+
+    Args:
+        data_dict (dict): The data dictionary. Dicts that are already in the JSON format are kept.
+
+    Returns:
+        dict: A copy of the data dictionary in the JSON format.
+    """
+    expanded = dict(data_dict)
+    for key in ("Data Dictionary", "Relationships"):
+        if key in data_dict:
+            expanded[key] = [
+                row.to_dict() if isinstance(row, Record) else row for row in data_dict[key]
+            ]
+    return expanded
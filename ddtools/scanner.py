@@ -0,0 +1,236 @@
+import hashlib
+import json
+import os
+
+# The manifest file is kept in the root of the scanned directory (next to the share)
+MANIFEST_FILE_NAME = "dd_scan_manifest.json"
+MANIFEST_VERSION = 1
+
+# Data dictionary workbooks are named <table>_data_dict.xlsx
+DATA_DICT_PATTERN = "_data_dict.xlsx"
+
+_HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def default_manifest_file(directory):
+    """
+    Returns the path of the scan manifest file of a directory.
+
+    Args:
+        directory (str): The scanned directory.
+
+    Returns:
+        str: The path of the manifest file.
+    """
+    return os.path.join(directory, MANIFEST_FILE_NAME)
+
+
+def _iter_entries(directory, extension):
+    """
+    Walks a directory tree with os.scandir, yielding the os.DirEntry of every file with the extension.
+
+    Unlike Path.rglob followed by is_file/os.stat on each path, the file type (and on Windows the size and
+    modification time) comes with the directory listing, so a network share is read with one request per
+    directory instead of a few per file.
+    """
+    extension = os.path.normcase(extension)
+    # Paths under "." are listed without a "./" prefix, like Path.rglob
+    directories = [os.path.normpath(directory)]
+    while directories:
+        current = directories.pop()
+        try:
+            with os.scandir(current) as it:
+                entries = list(it)
+        except (PermissionError, FileNotFoundError, NotADirectoryError):
+            continue
+        subdirectories = []
+        for entry in entries:
+            try:
+                if entry.is_dir():
+                    subdirectories.append(entry.path)
+                elif os.path.normcase(entry.name).endswith(extension) and entry.is_file():
+                    yield entry
+            except OSError:
+                continue
+        # Walk depth first in listing order
+        directories.extend(reversed(subdirectories))
+
+
+def list_files(directory, extension=".xlsx"):
+    """
+    Lists the files with an extension in a directory and its subdirectories.
+
+    Args:
+        directory (str): The directory to list.
+        extension (str, optional): The file extension. Defaults to ".xlsx".
+
+    Returns:
+        list[str]: The paths of the files.
+    """
+    return [entry.path for entry in _iter_entries(directory, extension)]
+
+
+def file_signatures(directory, pattern=DATA_DICT_PATTERN, extension=".xlsx"):
+    """
+    Lists the data dictionary workbooks of a directory with their size and modification time, which tell
+    whether a workbook changed since it was last read.
+
+    Args:
+        directory (str): The directory to list.
+        pattern (str, optional): Only files whose name contains the pattern are listed. Defaults to data
+            dictionary workbooks.
+        extension (str, optional): The file extension. Defaults to ".xlsx".
+
+    Returns:
+        dict: The (size, modification time) of each file by path relative to the directory, in listing order.
+    """
+    signatures = {}
+    for entry in _iter_entries(directory, extension):
+        if pattern and pattern not in entry.name:
+            continue
+        try:
+            stat = entry.stat()
+        except OSError:
+            continue  # Removed since the directory was listed
+        signatures[os.path.relpath(entry.path, directory)] = (stat.st_size, stat.st_mtime)
+    return signatures
+
+
+def file_hash(path):
+    """
+    Returns:
+        str: The SHA-1 hash of the content of a file.
+    """
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(_HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def load_scan_manifest(directory, manifest_file=None):
+    """
+    Loads the manifest written by the last scan of a directory.
+
+    Args:
+        directory (str): The scanned directory.
+        manifest_file (str, optional): The path of the manifest file. Defaults to the manifest in the directory.
+
+    Returns:
+        dict: The manifest, or None if the directory has no (compatible) manifest.
+    """
+    if manifest_file is None:
+        manifest_file = default_manifest_file(directory)
+    try:
+        with open(manifest_file, "r") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if manifest.get("Version") != MANIFEST_VERSION:
+        return None
+    return manifest
+
+
+def _save_manifest(manifest, manifest_file):
+    # Readers on the share never see a partially written manifest
+    tmp_file = manifest_file + ".tmp"
+    with open(tmp_file, "w") as f:
+        json.dump(manifest, f)
+    os.replace(tmp_file, manifest_file)
+
+
+def scan_directory(
+    directory,
+    manifest_file=None,
+    pattern=DATA_DICT_PATTERN,
+    use_hash=False,
+    metadata=False,
+    workers=None,
+    save=True,
+):
+    """
+    Scans a directory for data dictionary workbooks and reports which were added, changed or removed since
+    the last scan, so batch tools only process the difference. The result is kept in a manifest file in the
+    directory for the next scan.
+
+    A workbook has changed when its size or modification time differs from the manifest. With use_hash, a
+    workbook whose modification time changed but whose content did not (e.g. a copy that did not keep the
+    time) is not reported as changed.
+
+    Args:
+        directory (str): The directory of data dictionary files.
+        manifest_file (str, optional): The path of the manifest file. Defaults to the manifest in the directory.
+        pattern (str, optional): Only workbooks whose name contains the pattern are scanned. Defaults to
+            data dictionary workbooks.
+        use_hash (bool, optional): Whether or not to keep a hash of each workbook's content. This reads every
+            added or changed workbook. Defaults to False.
+        metadata (bool, optional): Whether or not to keep the "Data Dictionary For" and "Table Type" of each
+            workbook (see catalog.scan_metadata). Only added and changed workbooks are read. Defaults to False.
+        workers (int, optional): The number of processes used to read metadata. Defaults to one per CPU core.
+        save (bool, optional): Whether or not to write the manifest. Defaults to True.
+
+    Returns:
+        dict: The "Files" of the directory ({relative path: {"Size", "Modified", and "Hash", "Data Dictionary
+            For" and "Table Type" if kept}}, in listing order) and the relative paths that were "Added",
+            "Changed" and "Removed" since the last scan.
+    """
+    if manifest_file is None:
+        manifest_file = default_manifest_file(directory)
+    manifest = load_scan_manifest(directory, manifest_file)
+    previous = manifest["Files"] if manifest is not None and manifest.get("Pattern") == pattern else {}
+
+    files = {}
+    added, changed = [], []
+    updated = manifest is None or not previous
+    for rel_path, (size, modified) in file_signatures(directory, pattern).items():
+        entry = previous.get(rel_path)
+        if entry is not None and entry["Size"] == size and entry["Modified"] == modified:
+            files[rel_path] = entry
+            continue
+
+        new_entry = {"Size": size, "Modified": modified}
+        updated = True
+        if use_hash:
+            try:
+                new_entry["Hash"] = file_hash(os.path.join(directory, rel_path))
+            except OSError:
+                continue  # Removed since the directory was listed
+            if entry is not None and entry.get("Hash") == new_entry["Hash"]:
+                # Same content: keep what was read from the workbook
+                files[rel_path] = {**entry, **new_entry}
+                continue
+        files[rel_path] = new_entry
+        (added if entry is None else changed).append(rel_path)
+    removed = [rel_path for rel_path in previous if rel_path not in files]
+
+    if metadata and _read_metadata(directory, files, workers):
+        updated = True
+    if save and (updated or removed):
+        _save_manifest(
+            {"Version": MANIFEST_VERSION, "Pattern": pattern, "Files": files}, manifest_file
+        )
+    return {"Files": files, "Added": added, "Changed": changed, "Removed": removed}
+
+
+def _read_metadata(directory, files, workers=None):
+    """
+    Adds the "Data Dictionary For" and "Table Type" to the manifest entries that do not have them. Returns
+    whether or not any entry was updated.
+    """
+    # The catalog imports the conversion module, which lists files with this module
+    from .catalog import build_catalog
+
+    missing = [rel_path for rel_path, entry in files.items() if "Data Dictionary For" not in entry]
+    if not missing:
+        return False
+    catalog, errors = build_catalog(
+        [os.path.join(directory, rel_path) for rel_path in missing], workers=workers
+    )
+    for error in errors:
+        # Read again on the next scan
+        print(f"Error scanning {error['File']}: {error['Error']}")
+    for scanned in catalog:
+        entry = files[os.path.relpath(scanned["File"], directory)]
+        entry["Data Dictionary For"] = scanned["Data Dictionary For"]
+        entry["Table Type"] = scanned["Table Type"]
+    return bool(catalog)
@@ -1,4 +1,262 @@
+import heapq
+from contextlib import closing
 from .json_excel_conversion import *
+from .columnar import frame_search, load_corpus_frame
+from .corpus_store import load_corpus_store
+from .parallel import iter_load_data_dicts
+from .query import CONCAT_COLUMN, compile_search, parse_query
+from .search_index import (
+    RANK_COLUMNS,
+    build_search_index,
+    index_candidates,
+    iter_code_records,
+    load_search_index,
+    lookup_code,
+    rank_tokenize,
+    ranking_statistics,
+    score_records,
+)
+
+# The records searched in each search mode (see iter_search)
+SEARCH_MODES = {"fields": "Fields", "codes": "Codes"}
+
+# "python" checks the records one at a time, "pandas" evaluates the query over a corpus frame
+SEARCH_ENGINES = ("python", "pandas")
+
+# Matches in the field name count more than matches in the description or notes
+DEFAULT_RANK_WEIGHTS = {"Field Name": 3.0, "Description": 1.0, "Notes": 1.0}
+
+
+def _hit(file, dd_for, record, column, mode):
+    hit = {
+        "File": file,
+        "Data Dictionary For": dd_for,
+        "Field Name": record["Field Name"],
+        "Column": column,
+    }
+    if mode == "codes":
+        hit["Code"] = record["Code"]
+        hit["Description"] = record.get("Description", "")
+    return hit
+
+
+def _needed_columns(query, mode):
+    """
+    The record columns a search reads: the columns of the query and the columns of its hits.
+    """
+    columns = ["Field Name", *query.columns, *query.concat_columns]
+    if mode == "codes":
+        columns += ["Code", "Description"]
+    return [col for col in dict.fromkeys(columns) if col != CONCAT_COLUMN]
+
+
+def iter_index_hits(index, directory, query, mode="fields"):
+    """
+    Searches the records of a search index (see search_index.py) without opening any workbook.
+
+    Args:
+        index (dict): The search index of the directory.
+        directory (str): The indexed directory.
+        query (CompiledQuery): The compiled search query (see query.py).
+        mode (str, optional): "fields" or "codes" (see iter_search). Defaults to "fields".
+
+    Yields:
+        dict: The hits, like iter_search.
+    """
+    for file, dd_for, record in index_candidates(
+        index, directory, query, SEARCH_MODES[mode]
+    ):
+        matched, column = query.match(record)
+        if matched:
+            yield _hit(file, dd_for, record, column, mode)
+
+
+def _iter_hits(
+    directories,
+    query,
+    use_index=True,
+    use_cache=False,
+    workers=None,
+    ordered=True,
+    cancel=None,
+    mode="fields",
+    engine="python",
+    use_store=True,
+):
+    """
+    Yields a hit dict for each 'Data Dictionary' (or code sheet) record that matches a compiled query.
+    """
+    if mode not in SEARCH_MODES:
+        raise ValueError(f"Unknown search mode {mode!r}, expected one of {list(SEARCH_MODES)}")
+    if engine not in SEARCH_ENGINES:
+        raise ValueError(f"Unknown search engine {engine!r}, expected one of {list(SEARCH_ENGINES)}")
+    for d in directories:
+        if cancel is not None and cancel.is_set():
+            return
+        if engine == "pandas":
+            yield from _iter_frame_hits(
+                d, query, use_index, use_cache, workers, mode, use_store
+            )
+            continue
+        index = load_search_index(d, workers=workers) if use_index else None
+        if index is not None:
+            yield from iter_index_hits(index, d, query, mode)
+            continue
+
+        # Only the columns the search reads are loaded from the corpus store
+        if mode == "codes":
+            field_columns = ["Field Name", "Acceptable Values"]
+        else:
+            field_columns = _needed_columns(query, mode)
+        # Workbooks changed since the store was written are parsed instead
+        stored = (
+            load_corpus_store(d, field_columns=field_columns, workers=workers, use_cache=use_cache)
+            if use_store
+            else None
+        )
+        if stored is not None:
+            for file, json_data in stored:
+                if cancel is not None and cancel.is_set():
+                    return
+                if mode == "codes":
+                    records = iter_code_records(json_data)
+                else:
+                    records = json_data["Data Dictionary"]
+                for record in records:
+                    matched, column = query.match(record)
+                    if matched:
+                        yield _hit(file, json_data["Data Dictionary For"], record, column, mode)
+            continue
+
+        files = [file for file in list_files(d) if "_data_dict.xlsx" in file]
+        loader = iter_load_data_dicts(
+            files, workers=workers, ordered=ordered, use_cache=use_cache
+        )
+        # Closing the loader stops parsing the remaining workbooks when the caller stops early
+        with closing(loader):
+            for file, json_data, error in loader:
+                if cancel is not None and cancel.is_set():
+                    return
+                if error is not None:
+                    print(f"Error loading {file}: {error}")
+                    continue
+                dd_for = json_data["Data Dictionary For"]
+                if mode == "codes":
+                    records = iter_code_records(json_data)
+                else:
+                    records = json_data["Data Dictionary"]
+                for record in records:
+                    matched, column = query.match(record)
+                    if matched:
+                        yield _hit(file, dd_for, record, column, mode)
+
+
+def _iter_frame_hits(directory, query, use_index, use_cache, workers, mode, use_store):
+    frame = load_corpus_frame(
+        directory,
+        SEARCH_MODES[mode],
+        use_index,
+        use_cache,
+        workers,
+        use_store,
+        _needed_columns(query, mode),
+    )
+    if frame.empty:
+        return
+    mask, column = frame_search(frame, query)
+    columns = ["File", "Data Dictionary For", "Field Name"]
+    if mode == "codes":
+        columns += ["Code", "Description"]
+    hits = frame.loc[mask].reindex(columns=columns, fill_value="")
+    hits.insert(3, "Column", column[mask])
+    for hit in hits.to_dict("records"):
+        yield hit
+
+
+def iter_search(
+    directories: list[str],
+    search_terms: list[str] = None,
+    column_names: list[str] = ["Field Name"],
+    search_term_op: str = "AND",
+    column_op: str = "OR",
+    match_case: bool = False,
+    concat: bool = False,
+    use_index: bool = True,
+    use_cache: bool = False,
+    workers: int = None,
+    query: str = None,
+    limit: int = None,
+    ordered: bool = True,
+    cancel=None,
+    mode: str = "fields",
+    engine: str = "python",
+    use_store: bool = True,
+):
+    """
+    Searches data dictionaries and yields each match as soon as its workbook is processed. Stopping
+    early (limit, cancel or closing the generator) stops opening the remaining workbooks.
+
+    Args:
+        directories (list[str]): A list of directories to search for data dictionary files.
+        search_terms (list, optional): A list of search terms (see search_data_dicts). Not needed if query is given.
+        column_names (list, optional): A list of column names to search for the search terms. Defaults to ["Field Names"].
+        search_term_op (str, optional): The operation to perform on the search terms. Defaults to "AND".
+        column_op (str, optional): The operation to perform on the columns. Defaults to "OR".
+        match_case (bool, optional): Whether or not to match the case of the search terms. Defaults to False.
+        concat (bool, optional): Whether or not to concatenate the columns before searching. Defaults to False.
+        use_index (bool, optional): Whether or not to use the search index of a directory when it has one. Workbooks
+            changed since the index was written are parsed again (see search_index.load_search_index). Defaults to True.
+        use_cache (bool, optional): Whether or not to use the parse cache for workbooks that are parsed. Defaults to False.
+        workers (int, optional): The number of processes used to parse workbooks. Defaults to one per CPU core.
+        query (str, optional): A query string (see query.parse_query) used instead of search_terms. Defaults to None.
+        limit (int, optional): The maximum number of hits to yield. Defaults to None (no limit).
+        ordered (bool, optional): Whether or not to yield hits in directory listing order. If False, the hits of
+            each workbook are yielded as soon as it is parsed. Defaults to True.
+        cancel (threading.Event, optional): Stops the search once it is set. Defaults to None.
+        mode (str, optional): "fields" searches the 'Data Dictionary' rows. "codes" searches the code sheet rows
+            ('Acceptable Values'), whose columns are the code sheet columns plus the 'Field Name' the code
+            sheet belongs to. Defaults to "fields".
+        engine (str, optional): "python" checks the records one at a time. "pandas" loads the records of each
+            directory into a corpus frame (kept in memory between searches) and evaluates the query with
+            vectorized string operations. Defaults to "python".
+        use_store (bool, optional): Whether or not to read the records of a directory from its corpus store (see
+            corpus_store.update_corpus_store) when it has one, reading only the columns the search needs. The store
+            is checked against the workbooks, and workbooks changed since it was written are parsed instead (see
+            corpus_store.load_corpus_store). Defaults to True.
+
+    Yields:
+        dict: A hit with the "File", "Data Dictionary For", "Field Name" and matched "Column" (None if no
+            single column can be named, e.g. for concatenated searches). Hits of code searches also have
+            the "Code" and its "Description".
+    """
+    if query is not None:
+        compiled = parse_query(query, column_names, match_case)
+    else:
+        compiled = compile_search(
+            search_terms, column_names, search_term_op, column_op, match_case, concat
+        )
+    if limit is not None and limit <= 0:
+        return
+
+    hits = _iter_hits(
+        directories,
+        compiled,
+        use_index,
+        use_cache,
+        workers,
+        ordered,
+        cancel,
+        mode,
+        engine,
+        use_store,
+    )
+    with closing(hits):
+        for count, hit in enumerate(hits, start=1):
+            if cancel is not None and cancel.is_set():
+                return
+            yield hit
+            if limit is not None and count >= limit:
+                return
 
 
 def search_data_dicts(
@@ -9,6 +267,12 @@ def search_data_dicts(
     column_op: str = "OR",
     match_case: bool = False,
     concat: bool = False,
+    use_index: bool = True,
+    use_cache: bool = False,
+    workers: int = None,
+    query: str = None,
+    engine: str = "python",
+    use_store: bool = True,
 ) -> list:
     """
     Args:
@@ -19,128 +283,292 @@ def search_data_dicts(
         column_op (str, optional): The operation to perform on the columns. Defaults to "OR".
         match_case (bool, optional): Whether or not to match the case of the search terms. Defaults to False.
         concat (bool, optional): Whether or not to concatenate the columns before searching. Defaults to False.
+        use_index (bool, optional): Whether or not to use the search index of a directory when it has one
+            (see search_index.update_search_index). Workbooks changed since the index was written are parsed
+            again, and directories without an index are searched by parsing every workbook. Defaults to True.
+        use_cache (bool, optional): Whether or not to use the parse cache for workbooks that are parsed. Defaults to False.
+        workers (int, optional): The number of processes used to parse workbooks. Defaults to one per CPU core.
+        query (str, optional): A query string with AND/OR/NOT, "phrases", parentheses and [Column]:term scopes
+            (see query.parse_query). If given, it replaces search_terms, search_term_op, column_op and concat,
+            and column_names are the columns searched by terms without a column. Defaults to None.
+        engine (str, optional): "python" checks the fields one at a time. "pandas" evaluates the search over a
+            frame of all the fields of a directory, which is kept in memory so repeated searches only pay for
+            loading it once (see scripts/benchmark_columnar.py). Defaults to "python".
+        use_store (bool, optional): Whether or not to read the fields of a directory from its corpus store when it
+            has one (see iter_search). Defaults to True.
 
     Returns:
         list: A list of the locations of the search terms in the data dictionary files.
     """
-    files = []
-    for d in directories:
-        files.extend(list_files(d))
-    # for file in files:
-    #     if "_data_dict.xlsx" not in file:
-    #         files.remove(file)
+    if query is not None:
+        compiled = parse_query(query, column_names, match_case)
+    else:
+        compiled = compile_search(
+            search_terms, column_names, search_term_op, column_op, match_case, concat
+        )
+
     match_locations = []
-    for file in files:
-        if "_data_dict.xlsx" not in file:
-            continue
-        # print(file)
-        json_data = dd_excel_to_json(file)
-        dd_for = json_data["Data Dictionary For"]
-
-        for item in json_data["Data Dictionary"]:
-            if concat:
-                col_vals = [item[col] for col in column_names]
-                concat_vals = " ".join(col_vals)
-                if search_term_op == "AND":  # Every search term must be in the field
-                    if not match_case:
-                        if not all(
-                            term.lower() in concat_vals.lower() for term in search_terms
-                        ):
-                            continue
-                    else:
-                        if not all(term in concat_vals for term in search_terms):
-                            continue
-
-                if (
-                    search_term_op == "OR"
-                ):  # At least one search term must be in the field
-                    if not match_case:
-                        if not any(
-                            term.lower() in concat_vals.lower() for term in search_terms
-                        ):
-                            continue
-                    else:
-                        if not any(term in concat_vals for term in search_terms):
-                            continue
-
-                location = f"{dd_for}.[{item['Field Name']}]"
-                match_locations.append(location)
-
-            elif not concat:
-                if (
-                    column_op == "AND"
-                ):  # Search critera must be met in every column in column_names
-                    in_all = True
-                    for col in column_names:
-                        if (
-                            search_term_op == "AND"
-                        ):  # All search terms must be in the field
-                            if not match_case:
-                                if not all(
-                                    term.lower() in item[col].lower()
-                                    for term in search_terms
-                                ):
-                                    in_all = False
-                                    break
-                            else:
-                                if not all(term in item[col] for term in search_terms):
-                                    in_all = False
-                                    break
-                        elif (
-                            search_term_op == "OR"
-                        ):  # At least one search term must be in the field
-                            if not match_case:
-                                if not any(
-                                    term.lower() in item[col].lower()
-                                    for term in search_terms
-                                ):
-                                    in_all = False
-                                    break
-                            else:
-                                if not any(term in item[col] for term in search_terms):
-                                    in_all = False
-                                    break
-                    if in_all:
-                        location = f"{dd_for}.[{item['Field Name']}]"
-                        match_locations.append(location)
-
-                if (
-                    column_op == "OR"
-                ):  # Search critera must be met in at least one column in column_names
-                    in_any = False
-                    for col in column_names:
-                        if (
-                            search_term_op == "AND"
-                        ):  # All search terms must be in the field
-                            if not match_case:
-                                if all(
-                                    term.lower() in item[col].lower()
-                                    for term in search_terms
-                                ):
-                                    in_any = True
-                                    break
-                            else:
-                                if all(term in item[col] for term in search_terms):
-                                    in_any = True
-                                    break
-                        elif (
-                            search_term_op == "OR"
-                        ):  # At least one search term must be in the field
-                            if not match_case:
-                                if any(
-                                    term.lower() in item[col].lower()
-                                    for term in search_terms
-                                ):
-                                    in_any = True
-                                    break
-                            else:
-                                if any(term in item[col] for term in search_terms):
-                                    in_any = True
-                                    break
-                    if in_any:
-                        location = f"{dd_for}.[{item['Field Name']}]"
-                        if len(column_names) > 1:
-                            location += f" ({col})"
-                        match_locations.append(location)
+    hits = _iter_hits(
+        directories,
+        compiled,
+        use_index,
+        use_cache,
+        workers,
+        engine=engine,
+        use_store=use_store,
+    )
+    for hit in hits:
+        location = f"{hit['Data Dictionary For']}.[{hit['Field Name']}]"
+        if compiled.show_column and hit["Column"] is not None:
+            location += f" ({hit['Column']})"
+        match_locations.append(location)
 
     return match_locations
+
+
+def search_codes(
+    directories: list[str],
+    search_terms: list[str],
+    column_names: list[str] = ["Code", "Description"],
+    search_term_op: str = "AND",
+    column_op: str = "OR",
+    match_case: bool = False,
+    use_index: bool = True,
+    use_cache: bool = False,
+    workers: int = None,
+    query: str = None,
+    engine: str = "python",
+    use_store: bool = True,
+) -> list:
+    """
+    Searches the code sheets ('Acceptable Values') of data dictionaries.
+
+    Args:
+        directories (list[str]): A list of directories to search for data dictionary files.
+        search_terms (list): A list of search terms to search for in the code sheets.
+        column_names (list, optional): The code sheet columns to search. Defaults to ["Code", "Description"].
+        search_term_op (str, optional): The operation to perform on the search terms. Defaults to "AND".
+        column_op (str, optional): The operation to perform on the columns. Defaults to "OR".
+        match_case (bool, optional): Whether or not to match the case of the search terms. Defaults to False.
+        use_index (bool, optional): Whether or not to use the search index of a directory when it has one. Defaults to True.
+        use_cache (bool, optional): Whether or not to use the parse cache for workbooks that are parsed. Defaults to False.
+        workers (int, optional): The number of processes used to parse workbooks. Defaults to one per CPU core.
+        query (str, optional): A query string (see query.parse_query) used instead of search_terms. Defaults to None.
+        engine (str, optional): The search engine, "python" or "pandas" (see iter_search). Defaults to "python".
+        use_store (bool, optional): Whether or not to read the codes of a directory from its corpus store when it
+            has one (see iter_search). Defaults to True.
+
+    Returns:
+        list: A list of the locations ([server].[database].[view].[table].[field].[code]) of the matching codes.
+    """
+    hits = iter_search(
+        directories,
+        search_terms,
+        column_names,
+        search_term_op,
+        column_op,
+        match_case,
+        use_index=use_index,
+        use_cache=use_cache,
+        workers=workers,
+        query=query,
+        mode="codes",
+        engine=engine,
+        use_store=use_store,
+    )
+    return [
+        f"{hit['Data Dictionary For']}.[{hit['Field Name']}].[{hit['Code']}]"
+        for hit in hits
+    ]
+
+
+def find_code(
+    directories: list[str],
+    code: str,
+    match_case: bool = False,
+    use_index: bool = True,
+    use_cache: bool = False,
+    workers: int = None,
+) -> list:
+    """
+    Finds the tables and fields whose code sheets contain exactly the given code. Directories with a
+    search index answer from its code lookup table without scanning any code sheet.
+
+    Args:
+        directories (list[str]): A list of directories to search for data dictionary files.
+        code (str): The code to find (e.g. "ELL").
+        match_case (bool, optional): Whether or not to match the case of the code. Defaults to False.
+        use_index (bool, optional): Whether or not to use the search index of a directory when it has one. Defaults to True.
+        use_cache (bool, optional): Whether or not to use the parse cache for workbooks that are parsed. Defaults to False.
+        workers (int, optional): The number of processes used to parse workbooks. Defaults to one per CPU core.
+
+    Returns:
+        list[dict]: Hits with the "File", "Data Dictionary For", "Field Name", "Code" and "Description".
+    """
+    code = str(code)
+    hits = []
+    for d in directories:
+        index = load_search_index(d, workers=workers) if use_index else None
+        if index is not None:
+            for file, dd_for, record in lookup_code(index, d, code, match_case):
+                hits.append(_hit(file, dd_for, record, "Code", "codes"))
+            continue
+
+        files = [file for file in list_files(d) if "_data_dict.xlsx" in file]
+        for file, json_data, error in iter_load_data_dicts(
+            files, workers=workers, use_cache=use_cache
+        ):
+            if error is not None:
+                print(f"Error loading {file}: {error}")
+                continue
+            for record in iter_code_records(json_data):
+                record_code = str(record["Code"])
+                if record_code == code or (
+                    not match_case and record_code.lower() == code.lower()
+                ):
+                    hits.append(
+                        _hit(
+                            file,
+                            json_data["Data Dictionary For"],
+                            record,
+                            "Code",
+                            "codes",
+                        )
+                    )
+    return hits
+
+
+def ranked_search(
+    directories: list[str],
+    search_terms,
+    column_weights: dict = None,
+    page: int = 1,
+    page_size: int = 20,
+    use_index: bool = True,
+    workers: int = None,
+    k1: float = 1.2,
+    b: float = 0.75,
+) -> dict:
+    """
+    Searches data dictionaries and returns the best matching fields first, scored with BM25 over the
+    Field Name, Description and Notes columns. Any field containing one of the search words is a
+    match, and fields containing more (and rarer) search words score higher.
+
+    The term statistics come from the search index of each directory, so only the fields containing a
+    search word are scored and the top results are picked with a heap. Directories without an index are
+    indexed in memory first (see search_index.update_search_index to keep an index on the share).
+
+    Args:
+        directories (list[str]): A list of directories to search for data dictionary files.
+        search_terms (str | list[str]): The search words, e.g. "student gender" or ["student", "gender"].
+            Camel case words are split, so "StudentGender" is the same as "student gender".
+        column_weights (dict, optional): The weight of each of the ranked columns. Columns left out are not
+            searched. Defaults to {"Field Name": 3.0, "Description": 1.0, "Notes": 1.0}.
+        page (int, optional): The page of results to return, starting at 1. Defaults to 1.
+        page_size (int, optional): The number of results per page. Defaults to 20.
+        use_index (bool, optional): Whether or not to use the search index of a directory when it has one. Defaults to True.
+        workers (int, optional): The number of processes used to parse workbooks. Defaults to one per CPU core.
+        k1 (float, optional): The BM25 term frequency saturation. Defaults to 1.2.
+        b (float, optional): The BM25 length normalization. Defaults to 0.75.
+
+    Returns:
+        dict: The "Total" number of matching fields, the "Page", the "Page Size" and the "Results" on the
+            page. Each result has its "Rank", "Score", "Location", "File", "Data Dictionary For",
+            "Field Name" and the "Matched Terms".
+    """
+    indexes = []
+    for d in directories:
+        index = load_search_index(d, workers=workers) if use_index else None
+        if index is None:
+            index = build_search_index(d, workers)
+        indexes.append((d, index))
+    return rank_indexes(indexes, search_terms, column_weights, page, page_size, k1, b)
+
+
+def rank_indexes(
+    indexes, search_terms, column_weights=None, page=1, page_size=20, k1=1.2, b=0.75
+):
+    """
+    Ranks the fields of search indexes that are already loaded (see ranked_search).
+
+    Args:
+        indexes (list[tuple]): (directory, search index) tuples.
+        search_terms (str | list[str]): The search words.
+        column_weights (dict, optional): The weight of each of the ranked columns. Defaults to DEFAULT_RANK_WEIGHTS.
+        page (int, optional): The page of results to return, starting at 1. Defaults to 1.
+        page_size (int, optional): The number of results per page. Defaults to 20.
+        k1 (float, optional): The BM25 term frequency saturation. Defaults to 1.2.
+        b (float, optional): The BM25 length normalization. Defaults to 0.75.
+
+    Returns:
+        dict: The page of results, like ranked_search.
+    """
+    if column_weights is None:
+        column_weights = DEFAULT_RANK_WEIGHTS
+    unknown = set(column_weights) - set(RANK_COLUMNS)
+    if unknown:
+        raise ValueError(
+            f"Cannot rank on {sorted(unknown)}, ranked columns are {list(RANK_COLUMNS)}"
+        )
+    if page < 1 or page_size < 1:
+        raise ValueError("page and page_size must be at least 1")
+    weights = [column_weights.get(col, 0.0) for col in RANK_COLUMNS]
+
+    if isinstance(search_terms, str):
+        search_terms = [search_terms]
+    terms = list(dict.fromkeys(t for term in search_terms for t in rank_tokenize(term)))
+
+    # Collection statistics over all the directories, so scores are comparable between them
+    records = 0
+    total_length = 0.0
+    doc_freqs = {}
+    for _, index in indexes:
+        index_records, index_length = ranking_statistics(index, weights)
+        records += index_records
+        total_length += index_length
+        for term in terms:
+            doc_freq = index["Ranking"]["Document Frequency"].get(term, 0)
+            doc_freqs[term] = doc_freqs.get(term, 0) + doc_freq
+    avg_length = total_length / records if records else 0.0
+
+    scored = []
+    for dir_idx, (d, index) in enumerate(indexes):
+        file_order = {rel_path: i for i, rel_path in enumerate(index["Files"])}
+        scores = score_records(
+            index, terms, weights, records, avg_length, doc_freqs, k1, b
+        )
+        for (rel_path, record_idx), (score, matched) in scores.items():
+            order = (dir_idx, file_order[rel_path], record_idx)
+            scored.append((score, order, d, rel_path, matched))
+
+    # Ties are broken by directory listing order
+    top = heapq.nlargest(
+        page * page_size,
+        scored,
+        key=lambda s: (s[0], tuple(-i for i in s[1])),
+    )
+    results = []
+    start = (page - 1) * page_size
+    for rank, (score, order, d, rel_path, matched) in enumerate(
+        top[start:], start=start + 1
+    ):
+        entry = indexes[order[0]][1]["Files"][rel_path]
+        field_name = entry["Fields"][order[2]]["Field Name"]
+        results.append(
+            {
+                "Rank": rank,
+                "Score": score,
+                "Location": f"{entry['Data Dictionary For']}.[{field_name}]",
+                "File": os.path.join(d, rel_path),
+                "Data Dictionary For": entry["Data Dictionary For"],
+                "Field Name": field_name,
+                "Matched Terms": matched,
+            }
+        )
+
+    return {
+        "Total": len(scored),
+        "Page": page,
+        "Page Size": page_size,
+        "Results": results,
+    }
@@ -0,0 +1,629 @@
+import copy
+import json
+import math
+import os
+import re
+from tqdm import tqdm
+from .parallel import iter_load_data_dicts
+from .query import CONCAT_COLUMN, And, Not, Term, field_text
+from .scanner import file_signatures
+
+# The index file is kept in the root of the indexed directory (next to the share)
+INDEX_FILE_NAME = "dd_search_index.json"
+INDEX_VERSION = 3
+
+# The searchable record tables of the index: 'Data Dictionary' rows and code sheet rows
+RECORD_TABLES = ("Fields", "Codes")
+
+# The 'Data Dictionary' columns with term statistics for ranked search
+RANK_COLUMNS = ("Field Name", "Description", "Notes")
+
+# Splits camel case field names (e.g. "ELLStatusCode" -> ELL, Status, Code) as well as words
+_RANK_TOKEN_RE = re.compile(r"[A-Z]+(?![a-z])|[A-Z]?[a-z]+|\d+")
+
+# Loaded indexes keyed by index file path, with the (size, mtime) they were loaded at and the workbook
+# signatures (see scanner.file_signatures) they were last checked against
+_loaded_indexes = {}
+
+# The key of the in-memory map from trigrams to the index terms containing them (see _term_grams). It is
+# built on the first search, dropped whenever files are added or removed, and not saved with the index.
+TERM_GRAMS = "_Term Grams"
+
+
+def tokenize(text):
+    """
+    Splits text into the lower case word tokens used as index terms.
+
+    Args:
+        text (str): The text to tokenize.
+
+    Returns:
+        list[str]: The lower case word tokens in the text.
+    """
+    return re.findall(r"\w+", text.lower())
+
+
+def rank_tokenize(text):
+    """
+    Splits text into the lower case word tokens used for ranked search. Unlike tokenize, camel case
+    words are split so "StudentGender" ranks for "gender".
+
+    Args:
+        text (str): The text to tokenize.
+
+    Returns:
+        list[str]: The lower case word tokens in the text.
+    """
+    return [token.lower() for token in _RANK_TOKEN_RE.findall(text)]
+
+
+def default_index_file(directory):
+    """
+    Returns the path of the search index file for a directory of data dictionaries.
+
+    Args:
+        directory (str): The directory of data dictionary files.
+
+    Returns:
+        str: The path to the index file in the root of the directory.
+    """
+    return os.path.join(directory, INDEX_FILE_NAME)
+
+
+def _field_text(item):
+    """
+    Converts a 'Data Dictionary' record to the searchable text stored in the index.
+    """
+    return {col: field_text(value) for col, value in item.items()}
+
+
+def iter_code_records(data_dict):
+    """
+    Yields the code sheet rows of a data dictionary as searchable records. Each record is the code
+    row with the 'Field Name' of the field the code sheet belongs to.
+
+    Args:
+        data_dict (dict): The JSON formatted data dictionary.
+
+    Yields:
+        dict: A code record.
+    """
+    for item in data_dict["Data Dictionary"]:
+        codes = item.get("Acceptable Values")
+        if not isinstance(codes, list):
+            continue
+        for code_row in codes:
+            record = {"Field Name": item["Field Name"]}
+            record.update(code_row)
+            yield record
+
+
+def _add_postings(postings, rel_path, records):
+    for record_idx, record in enumerate(records):
+        for col, value in record.items():
+            for term in set(tokenize(value)):
+                postings.setdefault(term, {}).setdefault(rel_path, []).append(
+                    [record_idx, col]
+                )
+
+
+def _remove_postings(postings, rel_path, records):
+    terms = set()
+    for record in records:
+        for value in record.values():
+            terms.update(tokenize(value))
+    for term in terms:
+        file_postings = postings.get(term)
+        if file_postings is None:
+            continue
+        file_postings.pop(rel_path, None)
+        if not file_postings:
+            del postings[term]
+
+
+def _new_index():
+    return {
+        "Version": INDEX_VERSION,
+        "Files": {},
+        "Postings": {table: {} for table in RECORD_TABLES},
+        "Code Lookup": {},
+        "Ranking": {
+            "Records": 0,
+            "Total Lengths": [0] * len(RANK_COLUMNS),
+            "Document Frequency": {},
+            "Postings": {},
+        },
+    }
+
+
+def _add_rank_stats(ranking, rel_path, records):
+    """
+    Adds the term frequencies of the ranked columns of records to the ranking statistics.
+
+    Returns:
+        list[list[int]]: The number of tokens in each ranked column of each record.
+    """
+    postings = ranking["Postings"]
+    doc_freq = ranking["Document Frequency"]
+    total_lengths = ranking["Total Lengths"]
+    lengths = []
+    for record_idx, record in enumerate(records):
+        term_freqs = {}  # term -> frequency in each ranked column
+        record_lengths = []
+        for col_idx, col in enumerate(RANK_COLUMNS):
+            tokens = rank_tokenize(record.get(col, ""))
+            record_lengths.append(len(tokens))
+            total_lengths[col_idx] += len(tokens)
+            for term in tokens:
+                term_freqs.setdefault(term, [0] * len(RANK_COLUMNS))[col_idx] += 1
+        for term, freqs in term_freqs.items():
+            postings.setdefault(term, {}).setdefault(rel_path, []).append(
+                [record_idx, freqs]
+            )
+            doc_freq[term] = doc_freq.get(term, 0) + 1
+        lengths.append(record_lengths)
+    ranking["Records"] += len(records)
+    return lengths
+
+
+def _remove_rank_stats(ranking, rel_path, entry):
+    postings = ranking["Postings"]
+    doc_freq = ranking["Document Frequency"]
+    terms = set()
+    for record in entry["Fields"]:
+        for col in RANK_COLUMNS:
+            terms.update(rank_tokenize(record.get(col, "")))
+    for term in terms:
+        file_postings = postings.get(term)
+        if file_postings is None:
+            continue
+        doc_freq[term] -= len(file_postings.pop(rel_path, []))
+        if not file_postings:
+            del postings[term]
+            del doc_freq[term]
+    for record_lengths in entry["Lengths"]:
+        for col_idx, length in enumerate(record_lengths):
+            ranking["Total Lengths"][col_idx] -= length
+    ranking["Records"] -= len(entry["Fields"])
+
+
+def _add_file(index, rel_path, data_dict, size, modified):
+    """
+    Adds the parsed records of one workbook to the index and its postings.
+    """
+    entry = {
+        "Size": size,
+        "Modified": modified,
+        "Data Dictionary For": data_dict["Data Dictionary For"],
+        "Fields": [_field_text(item) for item in data_dict["Data Dictionary"]],
+        "Codes": [_field_text(record) for record in iter_code_records(data_dict)],
+    }
+    index["Files"][rel_path] = entry
+    index.pop(TERM_GRAMS, None)
+    for table in RECORD_TABLES:
+        _add_postings(index["Postings"][table], rel_path, entry[table])
+    entry["Lengths"] = _add_rank_stats(index["Ranking"], rel_path, entry["Fields"])
+
+    code_lookup = index["Code Lookup"]
+    for code_idx, record in enumerate(entry["Codes"]):
+        code_lookup.setdefault(record["Code"].lower(), {}).setdefault(
+            rel_path, []
+        ).append(code_idx)
+
+
+def _remove_file(index, rel_path):
+    """
+    Removes one workbook and all of its postings from the index.
+    """
+    entry = index["Files"].pop(rel_path, None)
+    if entry is None:
+        return
+    index.pop(TERM_GRAMS, None)
+    for table in RECORD_TABLES:
+        _remove_postings(index["Postings"][table], rel_path, entry[table])
+    _remove_rank_stats(index["Ranking"], rel_path, entry)
+
+    code_lookup = index["Code Lookup"]
+    for code in {record["Code"].lower() for record in entry["Codes"]}:
+        file_codes = code_lookup.get(code)
+        if file_codes is None:
+            continue
+        file_codes.pop(rel_path, None)
+        if not file_codes:
+            del code_lookup[code]
+
+
+def save_search_index(index, index_file):
+    """
+    Writes the search index to disk. The file is written to a temporary file first and then
+    moved into place so that readers on the share never see a partially written index.
+
+    Args:
+        index (dict): The search index.
+        index_file (str): The path to write the index to.
+
+    Returns:
+        None
+    """
+    tmp_file = index_file + ".tmp"
+    with open(tmp_file, "w") as f:
+        json.dump({key: value for key, value in index.items() if key != TERM_GRAMS}, f)
+    os.replace(tmp_file, index_file)
+
+
+def _indexed_signatures(index):
+    """
+    Returns:
+        dict: The (size, modification time) of each workbook in a search index by relative path, as
+            scanner.file_signatures lists them.
+    """
+    return {
+        rel_path: (entry["Size"], entry["Modified"]) for rel_path, entry in index["Files"].items()
+    }
+
+
+def load_search_index(directory, index_file=None, check_current=True, workers=None):
+    """
+    Loads the search index of a directory if it exists. Indexes are kept in memory after the
+    first load and only re-read when the index file changes.
+
+    Args:
+        directory (str): The indexed directory.
+        index_file (str, optional): The path of the index file. Defaults to the index file in the directory.
+        check_current (bool, optional): Whether or not to check the index against the workbooks in the
+            directory. If workbooks were added, changed or removed since the index was written, a copy of the
+            index is refreshed (see refresh_search_index) and kept in memory until the workbooks change again;
+            the index file is left as it is. Defaults to True.
+        workers (int, optional): The number of processes used to parse changed workbooks. Defaults to one per
+            CPU core.
+
+    Returns:
+        dict: The search index, or None if there is no (compatible) index for the directory.
+    """
+    if index_file is None:
+        index_file = default_index_file(directory)
+    try:
+        stat = os.stat(index_file)
+    except OSError:
+        return None
+
+    signature = (stat.st_size, stat.st_mtime)
+    loaded = _loaded_indexes.get(index_file)
+    if loaded is None or loaded[0] != signature:
+        with open(index_file, "r") as f:
+            index = json.load(f)
+        if index.get("Version") != INDEX_VERSION:
+            return None
+        loaded = (signature, index, None)
+        _loaded_indexes[index_file] = loaded
+    _, index, checked = loaded
+    if not check_current:
+        return index
+
+    current = file_signatures(directory)
+    if checked == current:
+        return index
+    # Workbooks that fail to parse stay out of the index, so they are only parsed again once the workbooks
+    # change again
+    if _indexed_signatures(index) != current:
+        # Searches may be reading the loaded index, so a copy is refreshed
+        index = refresh_search_index(copy.deepcopy(index), directory, workers)
+    _loaded_indexes[index_file] = (signature, index, current)
+    return index
+
+
+def refresh_search_index(index, directory, workers=None):
+    """
+    Brings an index up to date with the workbooks in a directory, parsing only the workbooks that
+    were added or whose size/modification time changed. The index is updated in place.
+
+    Args:
+        index (dict): The search index of the directory.
+        directory (str): The indexed directory.
+        workers (int, optional): The number of processes used to parse workbooks. Defaults to one per CPU core.
+
+    Returns:
+        dict: The updated search index.
+    """
+    current = file_signatures(directory)
+
+    for rel_path in list(index["Files"]):
+        if rel_path not in current:
+            _remove_file(index, rel_path)
+
+    changed = [
+        rel_path
+        for rel_path, (size, modified) in current.items()
+        if rel_path not in index["Files"]
+        or index["Files"][rel_path]["Size"] != size
+        or index["Files"][rel_path]["Modified"] != modified
+    ]
+    loader = iter_load_data_dicts(
+        [os.path.join(directory, rel_path) for rel_path in changed],
+        workers=workers,
+        ordered=False,
+    )
+    for file, data_dict, error in tqdm(
+        loader, total=len(changed), desc=f"Indexing {directory}", leave=False
+    ):
+        rel_path = os.path.relpath(file, directory)
+        _remove_file(index, rel_path)
+        if error is not None:
+            # Left out of the index so it is parsed again on the next refresh
+            print(f"Error loading {file}: {error}")
+            continue
+        size, modified = current[rel_path]
+        _add_file(index, rel_path, data_dict, size, modified)
+
+    # Keep the files in directory listing order so results are in the same order as a full scan
+    index["Files"] = {
+        rel_path: index["Files"][rel_path]
+        for rel_path in current
+        if rel_path in index["Files"]
+    }
+    return index
+
+
+def build_search_index(directory, workers=None):
+    """
+    Builds a search index for a directory in memory, without writing it to the directory.
+
+    Args:
+        directory (str): The directory of data dictionary files to index.
+        workers (int, optional): The number of processes used to parse workbooks. Defaults to one per CPU core.
+
+    Returns:
+        dict: The search index.
+    """
+    return refresh_search_index(_new_index(), directory, workers)
+
+
+def update_search_index(directory, index_file=None, rebuild=False, workers=None):
+    """
+    Builds or refreshes the search index for a directory of data dictionaries. Only workbooks that
+    were added, or whose size/modification time changed since the last refresh are parsed again.
+
+    Args:
+        directory (str): The directory of data dictionary files to index.
+        index_file (str, optional): The path of the index file. Defaults to the index file in the directory.
+        rebuild (bool, optional): Whether or not to ignore an existing index and index every workbook again. Defaults to False.
+        workers (int, optional): The number of processes used to parse workbooks. Defaults to one per CPU core.
+
+    Returns:
+        dict: The updated search index.
+    """
+    if index_file is None:
+        index_file = default_index_file(directory)
+
+    index = None
+    if not rebuild:
+        index = load_search_index(directory, index_file, check_current=False)
+    if index is None:
+        index = _new_index()
+    refresh_search_index(index, directory, workers)
+
+    save_search_index(index, index_file)
+    _loaded_indexes.pop(index_file, None)
+    return index
+
+
+def _term_grams(index, table):
+    """
+    Returns the index terms of a table containing each trigram, building the map the first time the
+    table is searched.
+    """
+    term_grams = index.get(TERM_GRAMS)
+    if term_grams is None:
+        term_grams = index[TERM_GRAMS] = {}
+    grams = term_grams.get(table)
+    if grams is None:
+        grams = {}
+        for index_term in index["Postings"][table]:
+            for gram in {index_term[i : i + 3] for i in range(len(index_term) - 2)}:
+                grams.setdefault(gram, []).append(index_term)
+        term_grams[table] = grams
+    return grams
+
+
+def _matching_terms(index, word, table):
+    """
+    Returns the index terms of a table that contain a word. A term containing the word contains each
+    of its trigrams, so only the terms of the word's rarest trigram are checked. Words shorter than
+    a trigram are checked against every term.
+    """
+    if len(word) < 3:
+        return [index_term for index_term in index["Postings"][table] if word in index_term]
+    grams = _term_grams(index, table)
+    rarest = min(
+        (grams.get(word[i : i + 3], ()) for i in range(len(word) - 2)), key=len
+    )
+    return [index_term for index_term in rarest if word in index_term]
+
+
+def _term_candidates(index, term, column_names, table):
+    """
+    Finds the records that could contain a search term in any of the given columns.
+
+    Every word of the term must appear inside some indexed word of a matching field, so the
+    candidates are the intersection (over the words of the term) of the postings of all index
+    terms containing that word. Returns None if the term has no words and cannot be narrowed.
+    """
+    words = tokenize(term)
+    if not words:
+        return None
+    columns = set(column_names)
+    postings = index["Postings"][table]
+    candidates = None
+    for word in words:
+        word_candidates = set()
+        for index_term in _matching_terms(index, word, table):
+            for rel_path, entries in postings[index_term].items():
+                for field_idx, col in entries:
+                    if col in columns:
+                        word_candidates.add((rel_path, field_idx))
+        candidates = (
+            word_candidates if candidates is None else candidates & word_candidates
+        )
+        if not candidates:
+            break
+    return candidates
+
+
+def _node_candidates(index, node, concat_columns, table):
+    """
+    Returns the candidate records for a node of a compiled query, or None if the node cannot
+    narrow the search (it may match any record).
+    """
+    if isinstance(node, Term):
+        columns = list(node.columns)
+        if CONCAT_COLUMN in columns:
+            # The words of a concatenated search come from the concatenated columns
+            columns.extend(concat_columns)
+        return _term_candidates(index, node.text, columns, table)
+    if isinstance(node, Not):
+        return None
+    child_candidates = [
+        _node_candidates(index, child, concat_columns, table)
+        for child in node.children
+    ]
+    if isinstance(node, And):
+        narrowed = [c for c in child_candidates if c is not None]
+        if not narrowed:
+            return None
+        return set.intersection(*narrowed)
+    if not child_candidates or any(c is None for c in child_candidates):
+        # Or([]) never matches, but there is nothing to gain from special casing it
+        return None
+    return set.union(*child_candidates)
+
+
+def _records(index, directory, candidates, table):
+    """
+    Resolves (file, record index) candidates to (file path, 'Data Dictionary For', record) tuples
+    in directory listing order.
+    """
+    files = index["Files"]
+    file_order = {rel_path: i for i, rel_path in enumerate(files)}
+    results = []
+    for rel_path, record_idx in sorted(
+        candidates, key=lambda c: (file_order[c[0]], c[1])
+    ):
+        entry = files[rel_path]
+        results.append(
+            (
+                os.path.join(directory, rel_path),
+                entry["Data Dictionary For"],
+                entry[table][record_idx],
+            )
+        )
+    return results
+
+
+def index_candidates(index, directory, query, table="Fields"):
+    """
+    Narrows the indexed records down to the ones that may match a search. The candidates still
+    have to be checked against the query, but they are a (usually small) superset of the
+    matching records.
+
+    Args:
+        index (dict): The search index for the directory.
+        directory (str): The indexed directory.
+        query (CompiledQuery): The compiled search query (see query.py).
+        table (str, optional): The records to search, "Fields" ('Data Dictionary' rows) or "Codes"
+            (code sheet rows, see iter_code_records). Defaults to "Fields".
+
+    Returns:
+        list[tuple]: (file path, 'Data Dictionary For', record) tuples in directory listing order.
+    """
+    candidates = _node_candidates(index, query.root, query.concat_columns, table)
+    if candidates is None:
+        candidates = [
+            (rel_path, record_idx)
+            for rel_path, entry in index["Files"].items()
+            for record_idx in range(len(entry[table]))
+        ]
+    return _records(index, directory, candidates, table)
+
+
+def lookup_code(index, directory, code, match_case=False):
+    """
+    Finds the code sheet rows with exactly the given code, using the code lookup table of the index.
+
+    Args:
+        index (dict): The search index for the directory.
+        directory (str): The indexed directory.
+        code (str): The code to look up.
+        match_case (bool, optional): Whether or not to match the case of the code. Defaults to False.
+
+    Returns:
+        list[tuple]: (file path, 'Data Dictionary For', code record) tuples in directory listing order.
+    """
+    file_codes = index["Code Lookup"].get(str(code).lower(), {})
+    candidates = [
+        (rel_path, code_idx)
+        for rel_path, code_indexes in file_codes.items()
+        for code_idx in code_indexes
+    ]
+    results = _records(index, directory, candidates, "Codes")
+    if match_case:
+        results = [r for r in results if r[2]["Code"] == str(code)]
+    return results
+
+
+def ranking_statistics(index, weights):
+    """
+    Returns the collection statistics a ranked search needs from an index, so the statistics of
+    several indexes can be added up.
+
+    Args:
+        index (dict): The search index.
+        weights (list[float]): The weight of each of the RANK_COLUMNS.
+
+    Returns:
+        tuple: The number of records and their total weighted length.
+    """
+    ranking = index["Ranking"]
+    total_length = sum(w * length for w, length in zip(weights, ranking["Total Lengths"]))
+    return ranking["Records"], total_length
+
+
+def score_records(index, terms, weights, records, avg_length, doc_freqs, k1=1.2, b=0.75):
+    """
+    Scores the indexed 'Data Dictionary' records containing any of the terms with BM25F (BM25 over
+    the weighted sum of the term frequencies in the ranked columns). Only the postings of the terms
+    are read, so records without any of the terms are never scored.
+
+    Args:
+        index (dict): The search index.
+        terms (list[str]): The distinct query tokens (see rank_tokenize).
+        weights (list[float]): The weight of each of the RANK_COLUMNS.
+        records (int): The number of records in the whole searched collection.
+        avg_length (float): The average weighted record length in the whole searched collection.
+        doc_freqs (dict): The number of records containing each term in the whole searched collection.
+        k1 (float, optional): The BM25 term frequency saturation. Defaults to 1.2.
+        b (float, optional): The BM25 length normalization. Defaults to 0.75.
+
+    Returns:
+        dict: The score of each (relative path, record index) and the terms it matched.
+    """
+    postings = index["Ranking"]["Postings"]
+    files = index["Files"]
+    scores = {}
+    for term in terms:
+        doc_freq = doc_freqs.get(term, 0)
+        idf = math.log(1 + (records - doc_freq + 0.5) / (doc_freq + 0.5))
+        for rel_path, entries in postings.get(term, {}).items():
+            lengths = files[rel_path]["Lengths"]
+            for record_idx, freqs in entries:
+                tf = sum(w * f for w, f in zip(weights, freqs))
+                if tf == 0:
+                    continue
+                length = sum(w * n for w, n in zip(weights, lengths[record_idx]))
+                norm = k1 * (1 - b + b * length / avg_length) if avg_length else k1
+                score, matched = scores.get((rel_path, record_idx), (0.0, []))
+                matched.append(term)
+                scores[(rel_path, record_idx)] = (
+                    score + idf * tf * (k1 + 1) / (tf + norm),
+                    matched,
+                )
+    return scores
@@ -0,0 +1,429 @@
+import argparse
+import copy
+import json
+import os
+import threading
+from collections import OrderedDict
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+from .query import parse_query
+from .search import iter_index_hits, rank_indexes
+from .scanner import file_signatures
+from .search_index import build_search_index, load_search_index, refresh_search_index
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+# The search page (docs/searchtool.html) is served from the same origin as the API
+DOCS_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "docs"))
+
+
+def split_location(dd_for):
+    """
+    Splits a 'Data Dictionary For' value into its names.
+
+    Args:
+        dd_for (str): The table, named [server].[database].[view].[table].
+
+    Returns:
+        list[str]: The server, database, view and table names.
+    """
+    return dd_for[1:-1].split("].[")
+
+
+def _indexed_files(index):
+    """
+    Returns:
+        list[tuple]: The (relative path, (size, modification time)) of each workbook in a search index.
+    """
+    return [
+        (rel_path, (entry["Size"], entry["Modified"])) for rel_path, entry in index["Files"].items()
+    ]
+
+
+class SearchService:
+    """
+    Answers searches over directories of data dictionaries from search indexes kept in memory.
+
+    The indexes are refreshed in the background (see start), so changed workbooks are parsed again
+    without restarting the service. Recent query results are kept in an LRU cache that is cleared
+    whenever a workbook changes.
+
+    Indexes are never changed once they are in use: a refresh updates copies of the changed indexes
+    and swaps them in, so searches run without the lock on the indexes they started with. The lock
+    only guards the swap and the cache.
+
+    Attributes:
+        directories (list[str]): The directories of data dictionaries being searched.
+        cache_size (int): The maximum number of query results kept in the cache.
+        reload_interval (float): The number of seconds between checks for changed workbooks.
+        workers (int): The number of processes used to parse workbooks.
+    """
+
+    def __init__(self, directories, cache_size=128, reload_interval=5.0, workers=None):
+        self.directories = list(directories)
+        self.cache_size = cache_size
+        self.reload_interval = reload_interval
+        self.workers = workers
+
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()  # Refreshes run one at a time, so none is lost
+        self._cache = OrderedDict()
+        self._stop = threading.Event()
+        self._thread = None
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+        self.indexes = []
+        for d in self.directories:
+            # Refreshed below instead of when loading, so the workbooks are only checked once
+            index = load_search_index(d, check_current=False)
+            if index is None:
+                index = build_search_index(d, workers)
+            else:
+                # Refreshed in place below, so keep the shared loaded index untouched
+                index = copy.deepcopy(index)
+                refresh_search_index(index, d, workers)
+            self.indexes.append((d, index))
+
+    def refresh(self):
+        """
+        Parses the workbooks that were added or changed since the last refresh and clears the
+        query cache if any were.
+
+        Returns:
+            bool: Whether or not any workbook changed.
+        """
+        with self._refresh_lock:
+            indexes = []
+            changed = False
+            for d, index in self.indexes:
+                before = _indexed_files(index)
+                if before != list(file_signatures(d).items()):
+                    # Searches may be reading the index, so a copy is refreshed
+                    refreshed = refresh_search_index(copy.deepcopy(index), d, self.workers)
+                    # Workbooks that fail to parse stay out of the index, so the index may not change
+                    if _indexed_files(refreshed) != before:
+                        index = refreshed
+                        changed = True
+                indexes.append((d, index))
+            if changed:
+                with self._lock:
+                    self.indexes = indexes
+                    self._cache.clear()
+            return changed
+
+    def _reload_loop(self):
+        while not self._stop.wait(self.reload_interval):
+            try:
+                if self.refresh():
+                    print("Reloaded changed data dictionaries")
+            except Exception as e:
+                print(f"Error reloading data dictionaries: {e}")
+
+    def start(self):
+        """
+        Starts checking for changed workbooks in a background thread.
+        """
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._reload_loop, daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """
+        Stops checking for changed workbooks.
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _tables(self):
+        for _, index in self.indexes:  # Read once, so a refresh swapping the indexes is not seen midway
+            for entry in index["Files"].values():
+                yield split_location(entry["Data Dictionary For"])
+
+    def servers(self):
+        """
+        Returns:
+            list[str]: The servers with data dictionaries.
+        """
+        return sorted({names[0] for names in self._tables()})
+
+    def databases(self, servers=None):
+        """
+        Args:
+            servers (list[str], optional): Only list the databases on these servers. Defaults to all servers.
+
+        Returns:
+            list[str]: The databases with data dictionaries.
+        """
+        return sorted(
+            {names[1] for names in self._tables() if not servers or names[0] in servers}
+        )
+
+    def status(self):
+        """
+        Returns:
+            dict: The number of indexed files and fields and the query cache statistics.
+        """
+        indexes = self.indexes
+        files = sum(len(index["Files"]) for _, index in indexes)
+        fields = sum(index["Ranking"]["Records"] for _, index in indexes)
+        with self._lock:
+            return {
+                "Directories": self.directories,
+                "Files": files,
+                "Fields": fields,
+                "Cached Queries": len(self._cache),
+                "Cache Hits": self.cache_hits,
+                "Cache Misses": self.cache_misses,
+            }
+
+    def search(
+        self,
+        query,
+        column_names=["Field Name"],
+        servers=None,
+        databases=None,
+        mode="fields",
+        ranked=False,
+        match_case=False,
+        page=1,
+        page_size=50,
+    ):
+        """
+        Searches the data dictionaries, answering repeated queries from the cache.
+
+        Args:
+            query (str): The query string (see query.parse_query), or the search words for ranked searches.
+            column_names (list, optional): The columns searched by terms without a column. Defaults to ["Field Name"].
+            servers (list[str], optional): Only return results on these servers. Defaults to all servers.
+            databases (list[str], optional): Only return results in these databases. Defaults to all databases.
+            mode (str, optional): "fields" or "codes" (see search.iter_search). Defaults to "fields".
+            ranked (bool, optional): Whether or not to rank the fields with BM25 (see search.ranked_search)
+                instead of returning every match in directory order. Defaults to False.
+            match_case (bool, optional): Whether or not to match the case of the search terms. Defaults to False.
+            page (int, optional): The page of results to return, starting at 1. Defaults to 1.
+            page_size (int, optional): The number of results per page. Defaults to 50.
+
+        Returns:
+            dict: The "Total" number of results, the "Page", the "Page Size" and the "Results" on the page.
+        """
+        if page < 1 or page_size < 1:
+            raise ValueError("page and page_size must be at least 1")
+        key = (
+            query,
+            tuple(column_names),
+            tuple(servers or ()),
+            tuple(databases or ()),
+            mode,
+            ranked,
+            match_case,
+            page,
+            page_size,
+        )
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                self.cache_hits += 1
+                return self._cache[key]
+            self.cache_misses += 1
+            indexes = self.indexes
+
+        if ranked:
+            results = self._ranked(indexes, query, servers, databases, page, page_size)
+        else:
+            results = self._matches(
+                indexes, query, column_names, servers, databases, mode, match_case, page, page_size
+            )
+
+        with self._lock:
+            # Results of indexes replaced by a refresh in the meantime are not cached
+            if indexes is self.indexes:
+                self._cache[key] = results
+                if len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return results
+
+    def _in_scope(self, dd_for, servers, databases):
+        names = split_location(dd_for)
+        return (not servers or names[0] in servers) and (
+            not databases or names[1] in databases
+        )
+
+    def _matches(
+        self, indexes, query, column_names, servers, databases, mode, match_case, page, page_size
+    ):
+        compiled = parse_query(query, column_names, match_case)
+        hits = [
+            hit
+            for d, index in indexes
+            for hit in iter_index_hits(index, d, compiled, mode)
+            if self._in_scope(hit["Data Dictionary For"], servers, databases)
+        ]
+        start = (page - 1) * page_size
+        results = []
+        for hit in hits[start : start + page_size]:
+            location = f"{hit['Data Dictionary For']}.[{hit['Field Name']}]"
+            if mode == "codes":
+                location += f".[{hit['Code']}]"
+            elif compiled.show_column and hit["Column"] is not None:
+                location += f" ({hit['Column']})"
+            results.append({"Location": location, **hit})
+        return {
+            "Total": len(hits),
+            "Page": page,
+            "Page Size": page_size,
+            "Results": results,
+        }
+
+    def _ranked(self, indexes, query, servers, databases, page, page_size):
+        if not servers and not databases:
+            return rank_indexes(indexes, query, page=page, page_size=page_size)
+
+        # Rank every matching field, then keep the ones on the selected servers/databases
+        ranking = rank_indexes(
+            indexes,
+            query,
+            page_size=max(sum(index["Ranking"]["Records"] for _, index in indexes), 1),
+        )
+        in_scope = [
+            result
+            for result in ranking["Results"]
+            if self._in_scope(result["Data Dictionary For"], servers, databases)
+        ]
+        start = (page - 1) * page_size
+        results = []
+        for rank, result in enumerate(
+            in_scope[start : start + page_size], start=start + 1
+        ):
+            results.append({**result, "Rank": rank})
+        return {
+            "Total": len(in_scope),
+            "Page": page,
+            "Page Size": page_size,
+            "Results": results,
+        }
+
+
+class SearchRequestHandler(SimpleHTTPRequestHandler):
+    """
+    Serves the JSON search API under /api/ and the static files of the docs directory.
+
+    API:
+        GET /api/servers: The servers with data dictionaries.
+        GET /api/databases?server=...: The databases on the given servers (repeat server for several).
+        GET /api/search?q=...&column=...&server=...&database=...&mode=fields|codes&ranked=0|1
+            &match_case=0|1&page=1&page_size=50: A page of search results (see SearchService.search).
+        GET /api/status: The number of indexed files and fields and the query cache statistics.
+    """
+
+    def __init__(self, *args, service=None, **kwargs):
+        self.service = service
+        super().__init__(*args, **kwargs)
+
+    def _send_json(self, body, status=200):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        # Allow the search page to be opened from disk or another host
+        self.send_header("Access-Control-Allow-Origin", "*")
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if not url.path.startswith("/api/"):
+            return super().do_GET()
+
+        params = parse_qs(url.query)
+
+        def flag(name):
+            return params.get(name, ["0"])[0].lower() in ("1", "true", "yes")
+
+        try:
+            if url.path == "/api/servers":
+                self._send_json(self.service.servers())
+            elif url.path == "/api/databases":
+                self._send_json(self.service.databases(params.get("server")))
+            elif url.path == "/api/status":
+                self._send_json(self.service.status())
+            elif url.path == "/api/search":
+                results = self.service.search(
+                    params.get("q", [""])[0],
+                    column_names=params.get("column", ["Field Name"]),
+                    servers=params.get("server"),
+                    databases=params.get("database"),
+                    mode=params.get("mode", ["fields"])[0],
+                    ranked=flag("ranked"),
+                    match_case=flag("match_case"),
+                    page=int(params.get("page", ["1"])[0]),
+                    page_size=int(params.get("page_size", ["50"])[0]),
+                )
+                self._send_json(results)
+            else:
+                self._send_json({"Error": f"Unknown endpoint {url.path}"}, 404)
+        except (KeyError, ValueError) as e:
+            self._send_json({"Error": str(e)}, 400)
+
+
+def serve(
+    directories,
+    host=DEFAULT_HOST,
+    port=DEFAULT_PORT,
+    static_dir=DOCS_DIR,
+    cache_size=128,
+    reload_interval=5.0,
+    workers=None,
+):
+    """
+    Runs the search service until it is interrupted. The search page is at
+    http://<host>:<port>/searchtool.html.
+
+    Args:
+        directories (list[str]): The directories of data dictionaries to search.
+        host (str, optional): The address to listen on. Defaults to "127.0.0.1" (this computer only).
+        port (int, optional): The port to listen on. Defaults to 8765.
+        static_dir (str, optional): The directory of static files to serve. Defaults to the docs directory.
+        cache_size (int, optional): The maximum number of query results kept in the cache. Defaults to 128.
+        reload_interval (float, optional): The number of seconds between checks for changed workbooks. Defaults to 5.
+        workers (int, optional): The number of processes used to parse workbooks. Defaults to one per CPU core.
+
+    Returns:
+        None
+    """
+    service = SearchService(directories, cache_size, reload_interval, workers)
+    service.start()
+    handler = partial(SearchRequestHandler, service=service, directory=static_dir)
+    server = ThreadingHTTPServer((host, port), handler)
+    print(f"Serving data dictionary search on http://{host}:{port}/searchtool.html")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Serve data dictionary search for docs/searchtool.html"
+    )
+    parser.add_argument("directories", nargs="+", help="Directories of data dictionaries")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--cache-size", type=int, default=128)
+    parser.add_argument("--reload-interval", type=float, default=5.0)
+    args = parser.parse_args()
+    serve(
+        args.directories,
+        args.host,
+        args.port,
+        cache_size=args.cache_size,
+        reload_interval=args.reload_interval,
+    )
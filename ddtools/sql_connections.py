@@ -0,0 +1,286 @@
+import atexit
+import threading
+import time
+from contextlib import contextmanager
+import pyodbc
+
+DEFAULT_DRIVER = "ODBC Driver 17 for SQL Server"
+
+# Idle connections older than this are closed instead of reused, before the server drops them
+DEFAULT_MAX_IDLE_SECONDS = 300
+
+
+def connection_string(server_name, database_name, driver=DEFAULT_DRIVER):
+    """
+    Returns:
+        str: The ODBC connection string of a database, with Windows authentication.
+    """
+    return f"DRIVER={{{driver}}};SERVER={server_name};DATABASE={database_name};Trusted_Connection=yes;"
+
+
+class _PooledConnection:
+    """
+    An open connection with the cursor that is reused for its queries.
+    """
+
+    __slots__ = ("connection", "cursor", "last_used")
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.cursor = connection.cursor()
+        self.last_used = time.monotonic()
+
+    def close(self):
+        for resource in (self.cursor, self.connection):
+            try:
+                resource.close()
+            except pyodbc.Error:
+                pass
+
+
+class ConnectionPool:
+    """
+    A pool of open SQL Server connections keyed by server and database.
+
+    Opening a connection (the login handshake) takes much longer than most of the queries run on it, so a
+    connection is checked out of the pool for a query and checked back in afterwards to be reused by the next
+    query on the same database. Checkouts are thread safe: a connection is only used by one thread at a time, and
+    concurrent checkouts of the same database open more connections.
+
+    A connection is closed instead of being checked in if its with block raised, since it may be broken. Connections
+    idle for longer than max_idle_seconds are closed instead of reused.
+
+    Attributes:
+        driver (str): The ODBC driver.
+        max_idle (int): The maximum number of idle connections kept per database.
+        max_idle_seconds (float): How long an idle connection is kept.
+        query_timeout (int): The number of seconds a query may run before it fails, 0 for no timeout.
+        opened (int): The number of connections opened by the pool.
+    """
+
+    def __init__(
+        self,
+        driver=DEFAULT_DRIVER,
+        max_idle=4,
+        max_idle_seconds=DEFAULT_MAX_IDLE_SECONDS,
+        query_timeout=0,
+    ):
+        self.driver = driver
+        self.max_idle = max_idle
+        self.max_idle_seconds = max_idle_seconds
+        self.query_timeout = query_timeout
+        self.opened = 0
+        self._idle = {}  # (server, database) -> idle _PooledConnections, most recently used last
+        self._active = set()  # The checked out _PooledConnections
+        self._cancelled = False
+        self._lock = threading.Lock()
+
+    def _checkout(self, key, query_timeout=None):
+        now = time.monotonic()
+        stale = []
+        pooled = None
+        with self._lock:
+            if self._cancelled:
+                raise RuntimeError("The connection pool was cancelled")
+            idle = self._idle.get(key, [])
+            while idle:
+                candidate = idle.pop()
+                if now - candidate.last_used <= self.max_idle_seconds:
+                    pooled = candidate
+                    break
+                stale.append(candidate)
+            # Connections under the most recently used one are older, so they are stale too if it is
+            if pooled is None:
+                stale.extend(idle)
+                idle.clear()
+        for candidate in stale:
+            candidate.close()
+        if pooled is None:
+            connection = pyodbc.connect(connection_string(*key, driver=self.driver))
+            pooled = _PooledConnection(connection)
+            with self._lock:
+                self.opened += 1
+        pooled.connection.timeout = self.query_timeout if query_timeout is None else query_timeout
+        with self._lock:
+            self._active.add(pooled)
+        return pooled
+
+    def _checkin(self, key, pooled):
+        pooled.last_used = time.monotonic()
+        with self._lock:
+            self._active.discard(pooled)
+            idle = self._idle.setdefault(key, [])
+            if len(idle) < self.max_idle:
+                idle.append(pooled)
+                return
+        pooled.close()
+
+    @contextmanager
+    def connection(self, server_name, database_name):
+        """
+        Checks out a connection to a database for the duration of a with block.
+
+        Args:
+            server_name (str): The name of the server where the database is located.
+            database_name (str): The name of the database.
+
+        Yields:
+            pyodbc.Connection: The connection. It must not be closed or used after the with block.
+        """
+        with self._checkout_pooled(server_name, database_name) as pooled:
+            yield pooled.connection
+
+    @contextmanager
+    def cursor(self, server_name, database_name):
+        """
+        Checks out a connection to a database for the duration of a with block and gives its cursor.
+
+        Args:
+            server_name (str): The name of the server where the database is located.
+            database_name (str): The name of the database.
+
+        Yields:
+            pyodbc.Cursor: The cursor of the connection. It must not be closed or used after the with block.
+        """
+        with self._checkout_pooled(server_name, database_name) as pooled:
+            yield pooled.cursor
+
+    @contextmanager
+    def _checkout_pooled(self, server_name, database_name, query_timeout=None):
+        key = (server_name, database_name)
+        pooled = self._checkout(key, query_timeout)
+        try:
+            yield pooled
+        except BaseException:
+            with self._lock:
+                self._active.discard(pooled)
+            pooled.close()
+            raise
+        self._checkin(key, pooled)
+
+    def cancel(self):
+        """
+        Cancels the queries running on the checked out connections, from any thread. The cancelled queries raise a
+        pyodbc.Error in the threads that run them, and later checkouts raise a RuntimeError, so the work querying
+        through the pool stops at its next query. The pool stays cancelled, so work that shares the pool with
+        other work should query through a scope of it instead (see scope).
+        """
+        with self._lock:
+            self._cancelled = True
+            active = list(self._active)
+        for pooled in active:
+            try:
+                pooled.cursor.cancel()
+            except pyodbc.Error:
+                pass
+
+    def scope(self, query_timeout=None):
+        """
+        Returns a scope of the pool: a view of the pool with its own query timeout, whose queries can be cancelled
+        without cancelling the pool.
+
+        Args:
+            query_timeout (int, optional): The number of seconds a query through the scope may run before it fails,
+                0 for no timeout. Defaults to the timeout of the pool.
+
+        Returns:
+            PoolScope: The scope.
+        """
+        return PoolScope(self, query_timeout)
+
+    def close(self):
+        """
+        Closes the idle connections. Connections checked out at the time are checked in as usual, and the pool
+        stays usable: the next checkouts open new connections.
+        """
+        with self._lock:
+            idle = [pooled for connections in self._idle.values() for pooled in connections]
+            self._idle.clear()
+        for pooled in idle:
+            pooled.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class PoolScope:
+    """
+    Checks out connections of a ConnectionPool with its own query timeout, and cancels only the queries running
+    on its own checkouts (see ConnectionPool.scope). It has the same connection() and cursor() as the pool, so it
+    can be given wherever a pool is.
+
+    Attributes:
+        pool (ConnectionPool): The pool the connections are checked out of.
+        query_timeout (int): The number of seconds a query may run before it fails, 0 for no timeout.
+    """
+
+    def __init__(self, pool, query_timeout=None):
+        self.pool = pool
+        self.query_timeout = pool.query_timeout if query_timeout is None else query_timeout
+        self._active = set()  # The _PooledConnections checked out through the scope
+        self._cancelled = False
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def _checkout_pooled(self, server_name, database_name):
+        with self._lock:
+            if self._cancelled:
+                raise RuntimeError("The connection scope was cancelled")
+        with self.pool._checkout_pooled(server_name, database_name, self.query_timeout) as pooled:
+            with self._lock:
+                # Cancelled while the connection was being opened
+                if self._cancelled:
+                    raise RuntimeError("The connection scope was cancelled")
+                self._active.add(pooled)
+            try:
+                yield pooled
+            finally:
+                with self._lock:
+                    self._active.discard(pooled)
+
+    @contextmanager
+    def connection(self, server_name, database_name):
+        """
+        Checks out a connection to a database for the duration of a with block (see ConnectionPool.connection).
+        """
+        with self._checkout_pooled(server_name, database_name) as pooled:
+            yield pooled.connection
+
+    @contextmanager
+    def cursor(self, server_name, database_name):
+        """
+        Checks out a connection to a database for the duration of a with block and gives its cursor (see
+        ConnectionPool.cursor).
+        """
+        with self._checkout_pooled(server_name, database_name) as pooled:
+            yield pooled.cursor
+
+    def cancel(self):
+        """
+        Cancels the queries running on the connections checked out through the scope, from any thread. The
+        cancelled queries raise a pyodbc.Error and later checkouts through the scope raise a RuntimeError. The pool
+        and its other users are not affected.
+        """
+        with self._lock:
+            self._cancelled = True
+            active = list(self._active)
+        for pooled in active:
+            try:
+                pooled.cursor.cancel()
+            except pyodbc.Error:
+                pass
+
+
+_default_pool = ConnectionPool()
+atexit.register(_default_pool.close)
+
+
+def get_connection_pool():
+    """
+    Returns:
+        ConnectionPool: The connection pool used when no pool is given.
+    """
+    return _default_pool
@@ -0,0 +1,231 @@
+import threading
+import time
+from concurrent.futures import CancelledError, ThreadPoolExecutor
+from .cardinality import DEFAULT_MAX_CODES, DEFAULT_SAMPLE_PERCENT
+from .fetch_table_info import fetch_sql_catalog
+from .json_excel_conversion import standardize_json
+from .sql_connections import ConnectionPool
+
+# The number of queries run at once on a server, unless it has its own limit
+DEFAULT_MAX_PER_SERVER = 4
+
+
+class QueryExecutor:
+    """
+    Runs SQL work (code discovery, catalog fetches) on several threads, with a limit on the number of queries run
+    at once on each server. Queries wait on the database, not on Python, so threads overlap them.
+
+    Each server gets its own thread pool with as many threads as its limit, so a busy server does not hold up the
+    work of the others. The work runs its queries through the executor's scope of a connection pool, whose query
+    timeout applies to every query. cancel() (or an exception leaving the with block) cancels the work not started
+    yet and the queries running through the scope, leaving the pool usable by others.
+
+    Attributes:
+        max_per_server (int): The number of queries run at once on a server.
+        server_limits (dict): The number of queries run at once on specific servers, keyed by server name.
+        pool (PoolScope): The scope of the connection pool the work queries through (see
+            ConnectionPool.scope).
+    """
+
+    def __init__(
+        self, max_per_server=DEFAULT_MAX_PER_SERVER, server_limits=None, timeout=None, pool=None
+    ):
+        """
+        Args:
+            max_per_server (int, optional): The number of queries run at once on a server. Defaults to 4.
+            server_limits (dict, optional): The number of queries run at once on specific servers, keyed by server
+                name. Defaults to None.
+            timeout (int, optional): The number of seconds a query may run before it fails. Defaults to None, for
+                the timeout of the pool (no timeout for the executor's own pool).
+            pool (ConnectionPool, optional): The pool of SQL connections to query through. The executor queries
+                through its own scope of the pool, so the pool's timeout is unchanged and cancelling the executor
+                does not cancel the pool. Defaults to a new pool, closed with the executor.
+        """
+        self.max_per_server = max_per_server
+        self.server_limits = dict(server_limits or {})
+        self._own_pool = pool is None
+        if pool is None:
+            pool = ConnectionPool()
+        self._connection_pool = pool
+        self.pool = pool.scope(timeout)
+        self._executors = {}
+        self._lock = threading.Lock()
+        self._cancelled = threading.Event()
+
+    def _executor(self, server_name):
+        with self._lock:
+            if self._cancelled.is_set():
+                raise RuntimeError("The query executor was cancelled")
+            executor = self._executors.get(server_name)
+            if executor is None:
+                limit = self.server_limits.get(server_name, self.max_per_server)
+                executor = ThreadPoolExecutor(limit, thread_name_prefix=f"sql-{server_name}")
+                self._executors[server_name] = executor
+            return executor
+
+    def submit(self, server_name, function, *args, **kwargs):
+        """
+        Schedules a call that queries a server, within the server's limit.
+
+        Args:
+            server_name (str): The name of the server the call queries.
+            function (callable): The function to call. It should query through the executor's pool.
+            *args, **kwargs: The arguments of the function.
+
+        Returns:
+            concurrent.futures.Future: The future of the call's result.
+        """
+        return self._executor(server_name).submit(function, *args, **kwargs)
+
+    def cancel(self):
+        """
+        Cancels the calls not started yet and the queries running through the executor (see PoolScope.cancel).
+        Calls cannot be submitted afterwards.
+        """
+        with self._lock:
+            self._cancelled.set()
+            executors = list(self._executors.values())
+        for executor in executors:
+            executor.shutdown(wait=False, cancel_futures=True)
+        self.pool.cancel()
+
+    def close(self):
+        """
+        Waits for the calls submitted and closes the connections of the executor's own pool.
+        """
+        with self._lock:
+            executors = list(self._executors.values())
+        for executor in executors:
+            executor.shutdown(wait=True)
+        if self._own_pool:
+            self._connection_pool.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is not None:
+            self.cancel()
+        self.close()
+
+
+def _standardize_one(data, options, pool):
+    """
+    Standardizes one data dictionary, capturing the error instead of raising it. Runs in an executor thread.
+    """
+    code_report = []
+    try:
+        standardize_json(data, pool=pool, code_report=code_report, **options)
+        return code_report, None
+    except Exception as e:
+        return code_report, f"{type(e).__name__}: {e}"
+
+
+def standardize_data_dicts(
+    data_dicts,
+    executor=None,
+    find_codes=True,
+    order_codes=False,
+    custom_col_names=None,
+    include_web_sleds_info=False,
+    code_discovery="table",
+    max_codes=DEFAULT_MAX_CODES,
+    over_cap="skip",
+    sample_percent=DEFAULT_SAMPLE_PERCENT,
+):
+    """
+    Standardizes data dictionaries (see standardize_json) concurrently, finding the codes of several tables at once
+    within the per-server limits of the executor. Each data dictionary is standardized in place by one call, so the
+    codes are merged into each 'Data Dictionary' entry the same way, in the same order, as standardize_json does
+    serially. A data dictionary that fails is reported instead of stopping the run.
+
+    Args:
+        data_dicts (iterable[dict]): The JSON data dictionaries to standardize in place.
+        executor (QueryExecutor, optional): The executor to run the queries on. Defaults to a new executor with the
+            default limits, closed at the end.
+        find_codes, order_codes, custom_col_names, include_web_sleds_info, code_discovery, max_codes, over_cap,
+        sample_percent: See standardize_json. find_codes defaults to True.
+
+    Returns:
+        dict: A report of the run: the number of "Data Dictionaries" and the number "Failed", the "Errors"
+            ({"Data Dictionary For": name, "Error": error} dicts), the "Code Report" of the fields over max_codes
+            (see standardize_json) and the "Seconds" the run took. The errors and the code report are in the order
+            of the data dictionaries.
+    """
+    options = {
+        "find_codes": find_codes,
+        "order_codes": order_codes,
+        "custom_col_names": custom_col_names,
+        "include_web_sleds_info": include_web_sleds_info,
+        "code_discovery": code_discovery,
+        "max_codes": max_codes,
+        "over_cap": over_cap,
+        "sample_percent": sample_percent,
+    }
+    # Read twice: to submit the data dictionaries and to collect their results
+    data_dicts = list(data_dicts)
+
+    own_executor = executor is None
+    if own_executor:
+        executor = QueryExecutor()
+    start = time.perf_counter()
+    try:
+        futures = []
+        for data in data_dicts:
+            server_name = data["Data Dictionary For"][1:-1].split("].[")[0]
+            futures.append(executor.submit(server_name, _standardize_one, data, options, executor.pool))
+        # The results are collected in the order of the data dictionaries, not the order they finish in
+        errors = []
+        code_report = []
+        for data, future in zip(data_dicts, futures):
+            try:
+                field_report, error = future.result()
+            except CancelledError:
+                field_report, error = [], "Cancelled"
+            code_report.extend(field_report)
+            if error is not None:
+                errors.append({"Data Dictionary For": data["Data Dictionary For"], "Error": error})
+    except BaseException:
+        executor.cancel()
+        raise
+    finally:
+        if own_executor:
+            executor.close()
+
+    return {
+        "Data Dictionaries": len(futures),
+        "Failed": len(errors),
+        "Errors": errors,
+        "Code Report": code_report,
+        "Seconds": time.perf_counter() - start,
+    }
+
+
+def fetch_sql_catalogs(databases, executor=None):
+    """
+    Fetches the column catalogs of several databases or views concurrently (see fetch_sql_catalog).
+
+    Args:
+        databases (iterable): (server name, database name) or (server name, database name, view name) tuples.
+        executor (QueryExecutor, optional): The executor to run the queries on. Defaults to a new executor with the
+            default limits, closed at the end.
+
+    Returns:
+        dict: The catalog of each tuple, keyed by the tuple, in the order of the databases.
+    """
+    databases = list(dict.fromkeys(tuple(database) for database in databases))
+    own_executor = executor is None
+    if own_executor:
+        executor = QueryExecutor()
+    try:
+        futures = [
+            executor.submit(database[0], fetch_sql_catalog, *database, pool=executor.pool)
+            for database in databases
+        ]
+        return {database: future.result() for database, future in zip(databases, futures)}
+    except BaseException:
+        executor.cancel()
+        raise
+    finally:
+        if own_executor:
+            executor.close()
@@ -0,0 +1,158 @@
+import hashlib
+import json
+import os
+import re
+from .query import field_text
+
+STATIC_INDEX_VERSION = 1
+
+# The columns searchable in the browser (docs/searchtool.html)
+STATIC_INDEX_COLUMNS = ("Field Name", "Description", "Notes")
+
+# Budgets for what the browser downloads: one shard per searched database plus the manifest
+DEFAULT_MAX_SHARD_BYTES = 1024 * 1024  # 1 MB
+DEFAULT_MAX_TOTAL_BYTES = 20 * 1024 * 1024  # 20 MB
+
+MANIFEST_FILE_NAME = "manifest.json"
+SHARD_PREFIX = "shard_"
+
+
+def trigrams(text):
+    """
+    Args:
+        text (str): The (lower case) text.
+
+    Returns:
+        set[str]: The three character substrings of the text.
+    """
+    return {text[i : i + 3] for i in range(len(text) - 2)}
+
+
+def _delta_encode(positions):
+    """
+    Encodes a sorted list of integers as the first value followed by the differences, which keeps
+    the numbers (and the JSON) short.
+    """
+    encoded = []
+    previous = 0
+    for position in positions:
+        encoded.append(position - previous)
+        previous = position
+    return encoded
+
+
+def _shard_file_name(server, database):
+    """
+    The file name of a database's shard: the readable names, and a short hash of the exact names, since
+    different names can read the same once sanitized (e.g. a.b + c and a + b.c, or "a b" and a_b).
+    """
+    digest = hashlib.sha1(json.dumps([server, database]).encode("utf-8")).hexdigest()[:8]
+    return SHARD_PREFIX + re.sub(r"[^\w.-]", "_", f"{server}.{database}") + f".{digest}.json"
+
+
+def _build_shard(fields):
+    """
+    Builds the shard of one database from (table id, field texts) tuples.
+    """
+    grams = {}
+    rows = []
+    for position, (table_id, texts) in enumerate(fields):
+        rows.append([table_id, *texts])
+        field_grams = set()
+        for text in texts:
+            field_grams |= trigrams(text.lower())
+        for gram in field_grams:
+            grams.setdefault(gram, []).append(position)
+    return {
+        "Fields": rows,
+        "Grams": {gram: _delta_encode(positions) for gram, positions in sorted(grams.items())},
+    }
+
+
+def write_static_search_index(
+    data_dicts,
+    output_dir,
+    max_shard_bytes=DEFAULT_MAX_SHARD_BYTES,
+    max_total_bytes=DEFAULT_MAX_TOTAL_BYTES,
+):
+    """
+    Writes a prebuilt search index for searching data dictionaries in the browser (docs/searchtool.js)
+    without the search service.
+
+    The index is a manifest and one shard per database, so the browser only downloads the shards of the
+    databases it searches. The manifest lists the tables once, and the shards refer to them by position.
+    Each shard has the searchable text of its fields and a trigram index: for every three character
+    substring, the (delta encoded) positions of the fields containing it. Terms of three or more
+    characters only need to be checked against the fields that contain all of their trigrams.
+
+    Args:
+        data_dicts (list[dict]): The JSON formatted data dictionaries.
+        output_dir (str): The directory to write the index to (e.g. docs/search_index). Shards from earlier
+            builds that are no longer needed are removed.
+        max_shard_bytes (int, optional): The size budget of one shard. Defaults to 1 MB.
+        max_total_bytes (int, optional): The size budget of the whole index. Defaults to 20 MB.
+
+    Returns:
+        dict: The size report, with the "Total Bytes", the "Bytes" of each shard and whether or not the index is
+            "Within Budget". A warning is printed for every exceeded budget.
+    """
+    tables = []
+    databases = {}  # (server, database) -> [(table id, field texts)]
+    for data_dict in sorted(data_dicts, key=lambda dd: dd["Data Dictionary For"]):
+        dd_for = data_dict["Data Dictionary For"]
+        server, database = dd_for[1:-1].split("].[")[:2]
+        table_id = len(tables)
+        tables.append(dd_for)
+        fields = databases.setdefault((server, database), [])
+        for item in data_dict["Data Dictionary"]:
+            texts = [field_text(item.get(col, "")) for col in STATIC_INDEX_COLUMNS]
+            fields.append((table_id, texts))
+
+    os.makedirs(output_dir, exist_ok=True)
+    shards = {}
+    report = {"Bytes": {}, "Total Bytes": 0, "Within Budget": True}
+    for (server, database), fields in sorted(databases.items()):
+        file_name = _shard_file_name(server, database)
+        data = json.dumps(_build_shard(fields), separators=(",", ":"))
+        with open(os.path.join(output_dir, file_name), "w", encoding="utf-8") as f:
+            f.write(data)
+        size = len(data.encode("utf-8"))
+        shards[f"[{server}].[{database}]"] = {
+            "Server": server,
+            "Database": database,
+            "File": file_name,
+            "Fields": len(fields),
+            "Bytes": size,
+        }
+        report["Bytes"][file_name] = size
+        report["Total Bytes"] += size
+        if size > max_shard_bytes:
+            print(
+                f"Warning: search index shard {file_name} is {size} bytes, over the budget of {max_shard_bytes} bytes"
+            )
+            report["Within Budget"] = False
+
+    manifest = {
+        "Version": STATIC_INDEX_VERSION,
+        "Columns": list(STATIC_INDEX_COLUMNS),
+        "Tables": tables,
+        "Shards": shards,
+    }
+    data = json.dumps(manifest, separators=(",", ":"))
+    with open(os.path.join(output_dir, MANIFEST_FILE_NAME), "w", encoding="utf-8") as f:
+        f.write(data)
+    report["Bytes"][MANIFEST_FILE_NAME] = len(data.encode("utf-8"))
+    report["Total Bytes"] += report["Bytes"][MANIFEST_FILE_NAME]
+    if report["Total Bytes"] > max_total_bytes:
+        print(
+            f"Warning: the search index is {report['Total Bytes']} bytes, over the budget of {max_total_bytes} bytes"
+        )
+        report["Within Budget"] = False
+
+    # Remove the shards of databases that no longer have data dictionaries
+    current = {shard["File"] for shard in shards.values()}
+    for file_name in os.listdir(output_dir):
+        if file_name.startswith(SHARD_PREFIX) and file_name not in current:
+            os.remove(os.path.join(output_dir, file_name))
+
+    return report
@@ -0,0 +1,340 @@
+import datetime
+import hashlib
+import json
+import math
+import warnings
+import zipfile
+from decimal import Decimal
+from xml.etree import ElementTree
+import numpy as np
+import pandas as pd
+import xlsxwriter
+
+# Cell formats of the data dictionary workbooks
+HEADER_FORMAT = {
+    'bold': True,
+    'text_wrap': True,
+    'valign': 'top',
+    'fg_color': '#D9EAD3',  # Light green
+    'border': 1
+}
+TEXT_FORMAT = {'text_wrap': True, 'valign': 'top', 'num_format': '@'}
+HYPERLINK_FORMAT = {
+    'font_color': 'blue',
+    'underline': 1,  # 1 for single underline
+}
+BOLD_FORMAT = {'bold': True}
+
+# Column widths of the 'Data Dictionary' sheet
+DATA_DICT_COLUMN_WIDTHS = {
+    'Field Name': 25,
+    'Description': 50,
+    'Source Information': 40,
+    'Raw Data Origin': 40,
+    'Reporting Status': 15,
+    'Introduced': 10,
+    'Discontinued': 12,
+    'Acceptable Values': 20,
+    'Null Meaning': 15,
+    'Accepts Null?': 15,
+    'Required?': 10,
+    'Data Type': 11,
+    'Max Characters': 14,
+    'Validations': 30,
+    'Reporting Cycle': 25,
+    'Notes': 50,
+    'Key Information': 25,
+}
+
+# Column widths of the code sheets
+CODES_COLUMN_WIDTHS = {
+    'Code': 15,
+    'Description': 50,
+    'Reporting Status': 15,
+    'Introduced': 12,
+    'Discontinued': 12,
+    'In Data': 7,
+    'Notes': 50
+}
+
+# Excel's limit on the length of a cell
+MAX_CELL_LENGTH = 32767
+
+# The custom document property with the fingerprint of the data dictionary a workbook was written from
+FINGERPRINT_PROPERTY = 'Data Dictionary Fingerprint'
+# Bump this when the workbook layout changes, so workbooks written before are not skipped
+FINGERPRINT_VERSION = 1
+# The parts of a data dictionary that are written to its workbook
+WORKBOOK_KEYS = ('Workbook Column Names', 'Data Dictionary For', 'Table Type',
+                 'FAQs', 'Relationships', 'Data Dictionary')
+
+
+def trunc31(string):
+    """
+    Truncates a string to the 31 characters allowed in a worksheet name.
+    """
+    if len(string) > 31:
+        return string[:31]
+    return string
+
+
+def data_dict_fingerprint(data):
+    '''
+    Returns a fingerprint of the content of a data dictionary that is written to its workbook. Data dictionaries
+    with the same fingerprint give the same workbook.
+
+    Args:
+        data (dict): The standard format JSON data dictionary.
+
+    Returns:
+        str: The SHA-1 hash of the canonical JSON of the content.
+    '''
+    content = [FINGERPRINT_VERSION] + [data.get(key) for key in WORKBOOK_KEYS]
+    text = json.dumps(content, separators=(',', ':'), default=str)
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+def workbook_fingerprint(output_file):
+    '''
+    Returns the fingerprint of the data dictionary a workbook was written from (see data_dict_fingerprint).
+
+    Workbooks saved by another application since they were written (e.g. edited in Excel) have no fingerprint,
+    since their content may differ: Excel updates the modified date of the workbook, which dd_json_to_excel sets
+    to the created date.
+
+    Args:
+        output_file (str): The path to the workbook.
+
+    Returns:
+        str: The fingerprint, or None if the workbook does not exist, has no fingerprint or was saved since.
+    '''
+    try:
+        with zipfile.ZipFile(output_file) as archive:
+            with archive.open('docProps/core.xml') as f:
+                core = ElementTree.parse(f).getroot()
+            with archive.open('docProps/custom.xml') as f:
+                custom = ElementTree.parse(f).getroot()
+    except (OSError, KeyError, zipfile.BadZipFile, ElementTree.ParseError):
+        return None
+
+    dates = {element.tag.rsplit('}', 1)[-1]: element.text for element in core}
+    if dates.get('created') != dates.get('modified'):
+        return None
+    for element in custom:
+        if element.get('name') == FINGERPRINT_PROPERTY:
+            return next((value.text for value in element), None)
+    return None
+
+
+def _cell_value(value):
+    """
+    Converts a value the way pandas' to_excel does before writing it. Missing values are None (not written).
+    """
+    if type(value) is str:
+        if len(value) > MAX_CELL_LENGTH:
+            warnings.warn(
+                f'Cell contents too long ({len(value)}), truncated to {MAX_CELL_LENGTH} characters'
+            )
+            return value[:MAX_CELL_LENGTH]
+        return value
+    if value is None:
+        return None
+    if isinstance(value, (bool, np.bool_)):
+        return bool(value)
+    if isinstance(value, (int, np.integer)):
+        return int(value)
+    if isinstance(value, (float, np.floating)):
+        if math.isnan(value):
+            return None
+        if math.isinf(value):
+            return 'inf' if value > 0 else '-inf'
+        return float(value)
+    if isinstance(value, (Decimal, datetime.date)):
+        return value
+    if pd.api.types.is_scalar(value) and pd.isna(value):
+        return None
+    # Lists and other objects are written as their text
+    return _cell_value(str(value))
+
+
+class _SheetWriter:
+    """
+    Writes the cells of a worksheet with the formats shared by the whole workbook. Rows must be written in
+    order, which constant memory mode requires. The column formats must be set before the rows are written too,
+    since cells without a format get the format of their column when their row is written out.
+    """
+
+    def __init__(self, worksheet, formats):
+        self.worksheet = worksheet
+        self._formats = formats
+
+    def write(self, row, col, value):
+        """
+        Writes a data cell like pandas' to_excel: without a format, and nothing for missing values and empty
+        strings.
+        """
+        value = _cell_value(value)
+        if value is None or value == '':
+            return
+        cell_format = None
+        if isinstance(value, datetime.datetime):
+            cell_format = self._formats['datetime']
+        elif isinstance(value, datetime.date):
+            cell_format = self._formats['date']
+        self.worksheet.write(row, col, value, cell_format)
+
+    def write_row(self, row, values):
+        for col, value in enumerate(values):
+            self.write(row, col, value)
+
+    def write_header(self, headers, width=None):
+        for col, value in enumerate(headers):
+            self.worksheet.write(0, col, value, self._formats['header'])
+            if width is not None:
+                self.worksheet.set_column(col, col, width,
+                                          self._formats['text'])
+
+
+def write_data_dict(data, output_file, legend, fingerprint=None):
+    '''
+    Writes a JSON data dictionary to an Excel workbook through xlsxwriter directly, without building DataFrames
+    (see dd_json_to_excel). Rows are streamed to disk in constant memory mode, the cell formats are created once
+    and each field's row is looked up in a precomputed map. The workbook has the same sheets and cells as the
+    pandas engine's.
+
+    Args:
+        data (dict): The standard format JSON data dictionary to convert.
+        output_file (str): The path to the output Excel file to write to.
+        legend (list[dict]): The rows of the Legend sheet (see get_legend).
+        fingerprint (str, optional): The fingerprint of the data dictionary, stored in the workbook's custom
+            properties (see data_dict_fingerprint).
+
+    Returns:
+        None
+    '''
+    column_names = data['Workbook Column Names']
+    dd_columns = column_names['Data Dictionary']
+    code_columns = column_names['Codes']
+    fields = data.get('Data Dictionary', [])
+
+    # The code sheets, with the row of their field in the 'Data Dictionary' sheet
+    field_rows = {}
+    for row, variable in enumerate(fields, start=1):
+        field_rows.setdefault(variable.get('Field Name'), row)
+    code_sheets = [
+        (trunc31(variable['Field Name']), variable)
+        for variable in fields if 'Acceptable Values' in variable
+        and 'Field Name' in variable
+        and isinstance(variable['Acceptable Values'], list)
+    ]
+    # Code sheets with the same (truncated) name are written over each other like the pandas engine does, which
+    # needs the rows to stay in memory
+    sheet_names = [sheet_name for sheet_name, _ in code_sheets]
+    constant_memory = len(set(sheet_names)) == len(sheet_names)
+
+    workbook = xlsxwriter.Workbook(output_file,
+                                   {'constant_memory': constant_memory})
+    try:
+        if fingerprint is not None:
+            workbook.set_custom_property(FINGERPRINT_PROPERTY, fingerprint)
+
+        # The formats are created once for every sheet
+        formats = {
+            'header': workbook.add_format(HEADER_FORMAT),
+            'text': workbook.add_format(TEXT_FORMAT),
+            'date': workbook.add_format({'num_format': 'YYYY-MM-DD'}),
+            'datetime':
+            workbook.add_format({'num_format': 'YYYY-MM-DD HH:MM:SS'}),
+        }
+        header_format = formats['header']
+        text_format = formats['text']
+        hyperlink_format = workbook.add_format(HYPERLINK_FORMAT)
+        bold_format = workbook.add_format(BOLD_FORMAT)
+
+        def add_sheet(name):
+            worksheet = workbook.get_worksheet_by_name(name)
+            if worksheet is None:
+                worksheet = workbook.add_worksheet(name)
+            return _SheetWriter(worksheet, formats)
+
+        # LEGEND SHEET
+        sheet = add_sheet('Legend')
+        if legend:
+            legend_columns = list(dict.fromkeys(key for row in legend
+                                                for key in row))
+            sheet.write_header(legend_columns, 50)
+            for row, description in enumerate(legend, start=1):
+                sheet.write_row(
+                    row, [description.get(column) for column in legend_columns])
+
+        # INFO AND USES SHEET
+        sheet = add_sheet('Info and Uses')
+        worksheet = sheet.worksheet
+        worksheet.set_column('A:A', 50, text_format)  # FAQ column width
+        worksheet.set_column('B:B', 50, text_format)  # Response column width
+        worksheet.write('A1', 'Data Dictionary For:', bold_format)
+        worksheet.write('A2', data['Data Dictionary For'], text_format)
+        worksheet.write('A3', f'({data["Table Type"]})', text_format)
+        worksheet.write('A4', 'FAQ', header_format)
+        worksheet.write('B4', 'Response', header_format)
+        for row, faq in enumerate(data['FAQs'], start=4):
+            sheet.write(row, 0, faq.get('FAQ'))
+            sheet.write(row, 1, faq.get('Response'))
+
+        # RELATIONSHIPS SHEET
+        sheet = add_sheet('Relationships')
+        sheet.write_header(column_names['Relationships'], 50)
+        relationships = data['Relationships']
+        relationship_columns = list(
+            dict.fromkeys(key for row in relationships for key in row))
+        for row, relationship in enumerate(relationships, start=1):
+            sheet.write_row(
+                row,
+                [relationship.get(column) for column in relationship_columns])
+
+        # DATA DICTIONARY SHEET
+        sheet = add_sheet('Data Dictionary')
+        worksheet = sheet.worksheet
+        worksheet.set_column('A:Z', None, text_format)
+        sheet.write_header(dd_columns)
+        for col, column in enumerate(dd_columns):
+            if column in DATA_DICT_COLUMN_WIDTHS:
+                worksheet.set_column(col, col, DATA_DICT_COLUMN_WIDTHS[column],
+                                     text_format)
+        # Fields with a code sheet link to it from their 'Acceptable Values'
+        link_col = None
+        if 'Field Name' in dd_columns and 'Acceptable Values' in dd_columns:
+            link_col = dd_columns.index('Acceptable Values')
+        for row, variable in enumerate(fields, start=1):
+            for col, column in enumerate(dd_columns):
+                value = variable.get(column)
+                if col == link_col and isinstance(value, list):
+                    link_target = f"'{trunc31(variable['Field Name'])}'!A1"
+                    worksheet.write_formula(
+                        row, col, f'=HYPERLINK("#{link_target}", "Codes")',
+                        hyperlink_format)
+                else:
+                    sheet.write(row, col, value)
+
+        # CODE SHEETS
+        for sheet_name, variable in code_sheets:
+            sheet = add_sheet(sheet_name)
+            worksheet = sheet.worksheet
+            worksheet.set_column('A:Z', None, text_format)
+            sheet.write_header(code_columns, 20)
+            for col, column in enumerate(code_columns):
+                if column in CODES_COLUMN_WIDTHS:
+                    worksheet.set_column(col, col,
+                                         CODES_COLUMN_WIDTHS[column],
+                                         text_format)
+            # A link back to the field in the 'Data Dictionary' sheet, after the headers
+            link_target = f"'Data Dictionary'!A{field_rows[variable['Field Name']] + 1}"
+            worksheet.write_formula(
+                0, len(code_columns),
+                f'=HYPERLINK("#{link_target}", "{sheet_name} in Data Dictionary")',
+                hyperlink_format)
+            for row, code in enumerate(variable['Acceptable Values'], start=1):
+                sheet.write_row(row,
+                                [code.get(column) for column in code_columns])
+    finally:
+        workbook.close()
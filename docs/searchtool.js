@@ -1,35 +1,385 @@
 $(document).ready(function() {
-    // Placeholder for getServerOptions
+    // The search service (python -m ddtools.search_server <directories>) serves this page and the API.
+    // When the page is opened from anywhere else, use the service on this computer.
+    const isLocal = ['localhost', '127.0.0.1'].includes(window.location.hostname);
+    const SEARCH_API = isLocal ? '/api' : 'http://localhost:8765/api';
+    // Without the service, search the prebuilt index written by scripts/find_relationships.py
+    const STATIC_INDEX = 'search_index/';
+    const PAGE_SIZE = 50;
+
+    let staticIndex = null; // The manifest of the prebuilt index when the service is not running
+    const shards = {}; // Shard file -> promise of the loaded shard
+
+    function showError(message) {
+        $('#results').empty().append($('<p class="warning">').text(message));
+    }
+
+    function replaceOptions(select, options) {
+        const selected = select.val() || [];
+        select.empty();
+        options.forEach(function(option) {
+            select.append(new Option(option, option, false, selected.includes(option)));
+        });
+    }
+
+    function unique(values) {
+        return Array.from(new Set(values)).sort();
+    }
+
+    // Fetch the servers with data dictionaries
     function getServerOptions() {
-        // Add logic to fetch server options
-        return ["Server1", "Server2", "Server3"];
+        if (staticIndex) {
+            return $.Deferred().resolve(unique(Object.values(staticIndex['Shards']).map(s => s['Server'])));
+        }
+        return $.getJSON(`${SEARCH_API}/servers`);
     }
 
-    // Placeholder for getDatabaseOptions
-    function getDatabaseOptions() {
-        // Add logic to fetch database options
-        return ["Database1", "Database2", "Database3"];
+    // Fetch the databases on the selected servers (all servers if none are selected)
+    function getDatabaseOptions(servers) {
+        if (staticIndex) {
+            const databases = Object.values(staticIndex['Shards'])
+                .filter(s => servers.length === 0 || servers.includes(s['Server']))
+                .map(s => s['Database']);
+            return $.Deferred().resolve(unique(databases));
+        }
+        return $.getJSON(`${SEARCH_API}/databases?` + $.param({ server: servers }, true));
     }
 
-    // Populate server options
-    const serverOptions = getServerOptions();
-    serverOptions.forEach(function(option) {
-        $('#selectServers').append(new Option(option, option));
-    });
+    function refreshDatabases() {
+        getDatabaseOptions($('#selectServers').val() || []).done(function(databases) {
+            replaceOptions($('#selectDatabases'), databases);
+        });
+    }
+
+    function loadShard(file) {
+        if (!(file in shards)) {
+            shards[file] = $.getJSON(STATIC_INDEX + file).then(function(shard) {
+                shard.decoded = {}; // Trigram -> field positions, decoded when first used
+                return shard;
+            });
+        }
+        return shards[file];
+    }
+
+    // The positions of the fields containing a trigram (the index stores the differences between positions)
+    function gramPositions(shard, gram) {
+        if (!(gram in shard.decoded)) {
+            const positions = [];
+            let position = 0;
+            (shard['Grams'][gram] || []).forEach(function(delta) {
+                position += delta;
+                positions.push(position);
+            });
+            shard.decoded[gram] = positions;
+        }
+        return shard.decoded[gram];
+    }
+
+    // The positions of the fields that contain every trigram of the term, or null if the term is too short to narrow the search
+    function termCandidates(shard, term) {
+        if (term.length < 3) {
+            return null;
+        }
+        let candidates = null;
+        for (let i = 0; i + 3 <= term.length; i++) {
+            const positions = gramPositions(shard, term.slice(i, i + 3));
+            candidates = candidates === null ? new Set(positions) : new Set(positions.filter(p => candidates.has(p)));
+            if (candidates.size === 0) {
+                break;
+            }
+        }
+        return candidates;
+    }
+
+    // The tokens of a query, like ddtools/query.py: parentheses, [Column Name]: or Column: scopes,
+    // "quoted phrases", the AND/OR/NOT operators and words
+    const TOKEN_RE = /\s*(?:([()])|\[([^\]]+)\]:|([A-Za-z_]\w*):(?=\S)|"([^"]*)"|([^\s()"]+))/y;
+
+    function tokenizeQuery(query) {
+        const tokens = [];
+        const text = query.trimEnd();
+        TOKEN_RE.lastIndex = 0;
+        while (TOKEN_RE.lastIndex < text.length) {
+            const position = TOKEN_RE.lastIndex;
+            const m = TOKEN_RE.exec(text);
+            if (m === null) {
+                throw new Error(`Could not parse query at position ${position}: ${text.slice(position)}`);
+            }
+            if (m[1] !== undefined) {
+                tokens.push({ kind: 'paren', value: m[1] });
+            } else if (m[2] !== undefined) {
+                tokens.push({ kind: 'scope', value: m[2].trim() });
+            } else if (m[3] !== undefined) {
+                tokens.push({ kind: 'scope', value: m[3] });
+            } else if (m[4] !== undefined) {
+                tokens.push({ kind: 'term', value: m[4] });
+            } else if (['AND', 'OR', 'NOT'].includes(m[5])) {
+                tokens.push({ kind: 'op', value: m[5] });
+            } else {
+                tokens.push({ kind: 'term', value: m[5] });
+            }
+        }
+        return tokens;
+    }
+
+    // Parses a query with the grammar of ddtools.query.parse_query: terms next to each other must all
+    // match, NOT binds tightest and OR loosest, parentheses group terms and [Column Name]:term or
+    // Column:term searches one column. Terms search the given columns (positions in the index's
+    // columns) and are lower case, since the prebuilt index is searched without matching case.
+    function parseQuery(query, columns) {
+        const tokens = tokenizeQuery(query);
+        let pos = 0;
+
+        function peek(kind, value) {
+            const token = tokens[pos];
+            return token !== undefined && token.kind === kind && token.value === value;
+        }
+
+        function parseOr() {
+            const children = [parseAnd()];
+            while (peek('op', 'OR')) {
+                pos++;
+                children.push(parseAnd());
+            }
+            return children.length === 1 ? children[0] : { type: 'or', children: children };
+        }
+
+        function parseAnd() {
+            const children = [parseNot()];
+            while (pos < tokens.length && !peek('op', 'OR') && !peek('paren', ')')) {
+                if (peek('op', 'AND')) {
+                    pos++;
+                }
+                children.push(parseNot());
+            }
+            return children.length === 1 ? children[0] : { type: 'and', children: children };
+        }
+
+        function parseNot() {
+            if (peek('op', 'NOT')) {
+                pos++;
+                return { type: 'not', child: parseNot() };
+            }
+            return parseAtom();
+        }
 
-    // Populate database options
-    const databaseOptions = getDatabaseOptions();
-    databaseOptions.forEach(function(option) {
-        $('#selectDatabases').append(new Option(option, option));
+        function parseAtom() {
+            const token = tokens[pos++];
+            if (token === undefined) {
+                throw new Error(`Unexpected end of query ${query}`);
+            }
+            if (token.kind === 'paren' && token.value === '(') {
+                const node = parseOr();
+                if (!peek('paren', ')')) {
+                    throw new Error(`Missing ')' in query ${query}`);
+                }
+                pos++;
+                return node;
+            }
+            if (token.kind === 'scope') {
+                const term = tokens[pos++];
+                if (term === undefined || term.kind !== 'term') {
+                    throw new Error(`Expected a term after [${token.value}]: in query ${query}`);
+                }
+                const column = staticIndex['Columns'].indexOf(token.value);
+                if (column < 0) {
+                    throw new Error(`The column ${token.value} is not searchable without the search service`);
+                }
+                return { type: 'term', text: term.value.toLowerCase(), columns: [column] };
+            }
+            if (token.kind === 'term') {
+                return { type: 'term', text: token.value.toLowerCase(), columns: columns };
+            }
+            throw new Error(`Unexpected ${token.value} in query ${query}`);
+        }
+
+        if (tokens.length === 0) {
+            throw new Error('The query is empty');
+        }
+        const root = parseOr();
+        if (pos !== tokens.length) {
+            throw new Error(`Unexpected ${tokens[pos].value} in query ${query}`);
+        }
+        return root;
+    }
+
+    // The positions of the fields that can match a query node, or null if the trigrams cannot narrow it
+    function nodeCandidates(shard, node) {
+        if (node.type === 'term') {
+            return termCandidates(shard, node.text);
+        }
+        if (node.type === 'not') {
+            return null;
+        }
+        const sets = node.children.map(child => nodeCandidates(shard, child));
+        if (node.type === 'and') {
+            let candidates = null;
+            sets.filter(set => set !== null).forEach(function(set) {
+                candidates = candidates === null ? set : new Set([...candidates].filter(p => set.has(p)));
+            });
+            return candidates;
+        }
+        if (sets.includes(null)) {
+            return null;
+        }
+        return new Set(sets.flatMap(set => [...set]));
+    }
+
+    function matchesNode(node, texts) {
+        switch (node.type) {
+            case 'term':
+                return node.columns.some(col => texts(col).includes(node.text));
+            case 'not':
+                return !matchesNode(node.child, texts);
+            case 'and':
+                return node.children.every(child => matchesNode(child, texts));
+            default:
+                return node.children.some(child => matchesNode(child, texts));
+        }
+    }
+
+    function searchShard(shard, root) {
+        const candidates = nodeCandidates(shard, root);
+        const positions = candidates === null ? [...shard['Fields'].keys()] : [...candidates].sort((a, b) => a - b);
+        const results = [];
+        positions.forEach(function(position) {
+            const field = shard['Fields'][position];
+            const lowered = {};
+            const texts = function(col) {
+                if (!(col in lowered)) {
+                    lowered[col] = field[col + 1].toLowerCase();
+                }
+                return lowered[col];
+            };
+            if (matchesNode(root, texts)) {
+                results.push({ 'Location': `${staticIndex['Tables'][field[0]]}.[${field[1]}]` });
+            }
+        });
+        return results;
+    }
+
+    function staticSearch(query, page) {
+        const servers = $('#selectServers').val() || [];
+        const databases = $('#selectDatabases').val() || [];
+        const columns = ($('#selectColumns').val() || ['Field Name'])
+            .map(col => staticIndex['Columns'].indexOf(col))
+            .filter(col => col >= 0);
+        const files = Object.values(staticIndex['Shards'])
+            .filter(s => servers.length === 0 || servers.includes(s['Server']))
+            .filter(s => databases.length === 0 || databases.includes(s['Database']))
+            .map(s => s['File']);
+        let root;
+        try {
+            root = parseQuery(query, columns);
+        } catch (error) {
+            // Shown like the errors of the search service
+            return $.Deferred().reject({ responseJSON: { 'Error': error.message } });
+        }
+
+        // Only the shards of the selected databases are downloaded
+        return $.when(...files.map(loadShard)).then(function(...loaded) {
+            const results = [];
+            loaded.forEach(function(shard) {
+                results.push(...searchShard(shard, root));
+            });
+            const start = (page - 1) * PAGE_SIZE;
+            return {
+                'Total': results.length,
+                'Page': page,
+                'Page Size': PAGE_SIZE,
+                'Results': results.slice(start, start + PAGE_SIZE)
+            };
+        });
+    }
+
+    function serviceSearch(query, page) {
+        const params = {
+            q: query,
+            column: $('#selectColumns').val() || ['Field Name'],
+            server: $('#selectServers').val() || [],
+            database: $('#selectDatabases').val() || [],
+            ranked: $('#rankResults').is(':checked') ? 1 : 0,
+            page: page,
+            page_size: PAGE_SIZE
+        };
+        return $.getJSON(`${SEARCH_API}/search?` + $.param(params, true));
+    }
+
+    function showResults(response) {
+        const results = $('#results').empty();
+        const first = (response['Page'] - 1) * response['Page Size'] + 1;
+        const last = first + response['Results'].length - 1;
+        if (response['Total'] === 0) {
+            results.append($('<p>').text('No matches found.'));
+            return;
+        }
+        results.append($('<p>').text(`Showing ${first}-${last} of ${response['Total']} matches`));
+
+        const list = $('<ul class="list-unstyled">');
+        response['Results'].forEach(function(result) {
+            const item = $('<li>').text(result['Location']);
+            if (result['Score'] !== undefined) {
+                item.append($('<small class="text-muted">').text(` (score ${result['Score'].toFixed(2)})`));
+            }
+            list.append(item);
+        });
+        results.append(list);
+
+        const pager = $('<div>');
+        if (response['Page'] > 1) {
+            pager.append($('<button class="btn btn-secondary btn-sm mr-2" type="button">').text('Previous')
+                .click(function() { search(response['Page'] - 1); }));
+        }
+        if (last < response['Total']) {
+            pager.append($('<button class="btn btn-secondary btn-sm" type="button">').text('Next')
+                .click(function() { search(response['Page'] + 1); }));
+        }
+        results.append(pager);
+    }
+
+    function search(page) {
+        const query = $('#searchQuery').val().trim();
+        if (!query) {
+            showError('Enter a search query.');
+            return;
+        }
+        $('#results').html('<p>Searching...</p>');
+        const request = staticIndex ? staticSearch(query, page) : serviceSearch(query, page);
+        request.done(showResults).fail(function(xhr) {
+            if (xhr && xhr.responseJSON && xhr.responseJSON['Error']) {
+                showError(xhr.responseJSON['Error']);
+            } else {
+                showError('The search failed. Check that the search service is running.');
+            }
+        });
+    }
+
+    function populateOptions(servers) {
+        replaceOptions($('#selectServers'), servers);
+        refreshDatabases();
+    }
+
+    // Use the search service if it is running, otherwise the prebuilt index
+    getServerOptions().done(populateOptions).fail(function() {
+        $.getJSON(STATIC_INDEX + 'manifest.json').done(function(manifest) {
+            staticIndex = manifest;
+            // Ranking needs the search service
+            $('#rankResults').prop('checked', false).prop('disabled', true);
+            getServerOptions().done(populateOptions);
+        }).fail(function() {
+            showError('Could not reach the search service or the prebuilt search index. Start the service with: python -m ddtools.search_server <directories>');
+        });
     });
 
-    // Placeholder for searchDataDictionaries
+    $('#selectServers').change(refreshDatabases);
+
     $('#submitQuery').click(function() {
-        const selectedServers = $('#selectServers').val();
-        const selectedDatabases = $('#selectDatabases').val();
-        const query = $('#searchQuery').val();
+        search(1);
+    });
 
-        // Add logic to handle the search and display results
-        $('#results').html(`<p>Searching in ${selectedServers} and ${selectedDatabases} for query: ${query}</p>`);
+    $('#searchQuery').keypress(function(event) {
+        if (event.which === 13) {
+            search(1);
+        }
     });
 });
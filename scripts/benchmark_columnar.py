@@ -0,0 +1,64 @@
+# This script compares the "python" (row loop) and "pandas" (corpus frame) search engines of
+# search_data_dicts on synthetic corpora of data dictionaries (see benchmark_search.py).
+
+import random
+import sys
+import os
+import time
+
+# Add the parent directory where ddtools is located to the path
+# This is necessary to import ddtools
+scripts_dir = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), "..")  # Directory of this script
+)
+sys.path.append(scripts_dir)
+
+from ddtools.columnar import frame_search, records_frame
+from ddtools.query import compile_search
+from benchmark_search import WORDS, synthetic_corpus
+
+
+def row_search(records, query):
+    return [i for i, (_, _, item) in enumerate(records) if query.match(item)[0]]
+
+
+def columnar_search(frame, query):
+    mask, _ = frame_search(frame, query)
+    return mask.nonzero()[0].tolist()
+
+
+if __name__ == "__main__":
+    columns = ["Field Name", "Description", "Notes"]
+    rng = random.Random(1)
+    print(
+        f"{'fields':>7} {'terms':>6} {'query':>16} {'row (s)':>9} {'frame (s)':>10} {'matches':>8}"
+    )
+    for n_tables in [50, 500, 2500]:
+        corpus = synthetic_corpus(n_tables=n_tables)
+        records = [
+            ("", dd_for, item) for dd_for, fields in corpus for item in fields
+        ]
+        start = time.perf_counter()
+        frame = records_frame(records)
+        build_time = time.perf_counter() - start
+        print(f"{len(records):>7} frame built in {build_time:.3f}s")
+
+        for n_terms in [1, 5, 25, 100]:
+            terms = [rng.choice(WORDS)[: rng.randint(3, 6)] for _ in range(n_terms)]
+            for label, search_term_op, column_op in [
+                ("terms AND", "AND", "OR"),
+                ("terms OR", "OR", "OR"),
+            ]:
+                query = compile_search(terms, columns, search_term_op, column_op)
+                start = time.perf_counter()
+                row_matches = row_search(records, query)
+                row_time = time.perf_counter() - start
+
+                start = time.perf_counter()
+                frame_matches = columnar_search(frame, query)
+                frame_time = time.perf_counter() - start
+
+                assert row_matches == frame_matches, "The engines returned different results"
+                print(
+                    f"{len(records):>7} {n_terms:>6} {label:>16} {row_time:>9.3f} {frame_time:>10.3f} {len(row_matches):>8}"
+                )
@@ -0,0 +1,100 @@
+# This script compares the 'pandas' and 'openpyxl' workbook readers of dd_excel_to_json on
+# synthetic data dictionaries with many code sheets.
+
+import random
+import sys
+import os
+import tempfile
+import time
+
+# Add the parent directory where ddtools is located to the path
+# This is necessary to import ddtools
+scripts_dir = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), "..")  # Directory of this script
+)
+sys.path.append(scripts_dir)
+
+from ddtools.custom_cols import get_col_headers
+from ddtools.json_excel_conversion import dd_excel_to_json, dd_json_to_excel
+
+WORDS = (
+    "student enrollment english learner homeless district school marss grade code "
+    "year identifier status assessment score race ethnicity gender birth date program"
+).split()
+
+
+def synthetic_data_dict(n_fields, n_code_sheets, n_codes=20, seed=0):
+    """
+    Generates a JSON formatted data dictionary where the first n_code_sheets fields have code sheets.
+    """
+    rng = random.Random(seed)
+    fields = []
+    for i in range(n_fields):
+        field = {
+            "Field Name": f"{rng.choice(WORDS).title()}{rng.choice(WORDS).title()}{i}",
+            "Description": " ".join(rng.choice(WORDS) for _ in range(10)),
+            "Reporting Status": "Active",
+            "Introduced": rng.choice(["", 2019, 2021]),
+            "Discontinued": "",
+            "Acceptable Values": "",
+            "Null Meaning": rng.choice(["N", "Optional"]),
+            "Data Type": rng.choice(["varchar", "int", "date"]),
+            "Max Characters": rng.choice([10, 50, ""]),
+            "Notes": rng.choice(["", "N/A", " ".join(rng.sample(WORDS, 3))]),
+            "Key Information": rng.choice(["", "PK", "FK"]),
+            "Reporting Cycle": "",
+            "Validations": "",
+            "Source Information": "",
+        }
+        if i < n_code_sheets:
+            field["Acceptable Values"] = [
+                {
+                    "Code": rng.choice([f"{c:02d}", str(c), f"C{c}", "NA", ""]),
+                    "Description": " ".join(rng.sample(WORDS, 3)),
+                    "Reporting Status": "",
+                    "Introduced": "",
+                    "Discontinued": "",
+                    "In Data": rng.choice(["Y", "N"]),
+                    "Notes": "",
+                }
+                for c in range(n_codes)
+            ]
+        fields.append(field)
+    return {
+        "Workbook Column Names": get_col_headers("Typical"),
+        "Legend": [],
+        "Data Dictionary For": "[SERVER].[Database].[dbo].[Table]",
+        "Table Type": "Data Table",
+        "FAQs": [{"FAQ": "What does each record in the table represent?", "Response": "A student"}],
+        "Relationships": [],
+        "Data Dictionary": fields,
+    }
+
+
+def time_engine(path, engine, repeat=3):
+    """
+    Returns the best time of repeat parses and the parsed data dictionary.
+    """
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        data_dict = dd_excel_to_json(path, engine=engine)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, data_dict
+
+
+if __name__ == "__main__":
+    print(f"{'fields':>7} {'code sheets':>12} {'pandas (s)':>11} {'openpyxl (s)':>13} {'speedup':>8}")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for n_fields, n_code_sheets in [(50, 0), (150, 100), (300, 250), (600, 500)]:
+            path = os.path.join(tmp_dir, f"bench_{n_fields}_{n_code_sheets}_data_dict.xlsx")
+            dd_json_to_excel(synthetic_data_dict(n_fields, n_code_sheets), path)
+
+            pandas_time, pandas_dd = time_engine(path, "pandas")
+            openpyxl_time, openpyxl_dd = time_engine(path, "openpyxl")
+            # Compare the reprs so value types (e.g. int vs float) must match too
+            assert repr(pandas_dd) == repr(openpyxl_dd), "The readers returned different data dictionaries"
+            print(
+                f"{n_fields:>7} {n_code_sheets:>12} {pandas_time:>11.3f} {openpyxl_time:>13.3f} {pandas_time / openpyxl_time:>7.1f}x"
+            )
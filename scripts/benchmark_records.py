@@ -0,0 +1,118 @@
+# This script measures the peak memory (RSS) of loading a whole corpus of data dictionaries as JSON
+# formatted dicts and as compact records (ddtools/records.py).
+#
+# Usage: python benchmark_records.py [directories...]
+# Without directories, a synthetic corpus is generated. Each load runs in its own process so the peaks
+# do not overlap. Peak RSS comes from the resource module, which is not available on Windows.
+
+import gc
+import subprocess
+import sys
+import os
+import tempfile
+import time
+
+# Add the parent directory where ddtools is located to the path
+# This is necessary to import ddtools
+scripts_dir = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), "..")  # Directory of this script
+)
+sys.path.append(scripts_dir)
+
+from ddtools.json_excel_conversion import dd_json_to_excel, list_files
+from ddtools.parallel import iter_load_data_dicts
+from ddtools.records import compact_data_dict
+from benchmark_reader import synthetic_data_dict
+
+
+def peak_rss_mib():
+    """
+    Returns the peak resident set size of this process in MiB.
+    """
+    import resource
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def load_corpus(files, compact):
+    """
+    Loads every data dictionary from the parse cache (filled by the first load), like load_json_data in
+    find_relationships.py.
+    """
+    json_data = []
+    for file_path, data_dict, error in iter_load_data_dicts(files, workers=1, use_cache=True):
+        if error is not None:
+            print(f"Error loading {file_path}: {error}")
+            continue
+        if compact:
+            data_dict = compact_data_dict(data_dict)
+        json_data.append(data_dict)
+    return json_data
+
+
+def synthetic_corpus(directory, n_workbooks=200, n_fields=150, n_code_sheets=20):
+    """
+    Writes n_workbooks synthetic data dictionaries and returns their paths.
+    """
+    files = []
+    for i in range(n_workbooks):
+        data_dict = synthetic_data_dict(n_fields, n_code_sheets, seed=i)
+        data_dict["Data Dictionary For"] = f"[SERVER].[Database{i % 10}].[dbo].[Table{i}]"
+        path = os.path.join(directory, f"Table{i}_data_dict.xlsx")
+        dd_json_to_excel(data_dict, path)
+        files.append(path)
+    return files
+
+
+def measure(files, compact):
+    """
+    Loads the corpus in a new process and returns its peak RSS (MiB), load time (s) and field count.
+    """
+    output = subprocess.run(
+        [sys.executable, __file__, "--child", "compact" if compact else "dicts", *files],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    peak, elapsed, n_fields = output.split()[-3:]
+    return float(peak), float(elapsed), int(n_fields)
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["--child"]:
+        compact = sys.argv[2] == "compact"
+        start = time.perf_counter()
+        json_data = load_corpus(sys.argv[3:], compact)
+        elapsed = time.perf_counter() - start
+        gc.collect()
+        n_fields = sum(len(data_dict["Data Dictionary"]) for data_dict in json_data)
+        print(f"{peak_rss_mib():.1f} {elapsed:.2f} {n_fields}")
+        sys.exit()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        if len(sys.argv) > 1:
+            files = []
+            for directory in sys.argv[1:]:
+                files.extend(list_files(directory))
+        else:
+            print("Writing a synthetic corpus...")
+            files = synthetic_corpus(tmp_dir)
+
+        # Fill the parse cache, so both loads only measure holding the corpus in memory
+        for _ in iter_load_data_dicts(files):
+            pass
+
+        # The RSS of the process without a corpus (Python, pandas, ...)
+        baseline, _, _ = measure([], False)
+        results = {}
+        for compact in (False, True):
+            results[compact] = measure(files, compact)
+        print(f"{len(files)} workbooks, {results[False][2]} fields")
+        print(f"{'':>16} {'peak RSS (MiB)':>15} {'corpus (MiB)':>13} {'load (s)':>9}")
+        for compact, label in [(False, "dicts"), (True, "compact records")]:
+            peak, elapsed, _ = results[compact]
+            print(f"{label:>16} {peak:>15.1f} {peak - baseline:>13.1f} {elapsed:>9.2f}")
+        reduction = 1 - (results[True][0] - baseline) / (results[False][0] - baseline)
+        print(f"The corpus takes {reduction:.0%} less memory")
@@ -0,0 +1,233 @@
+# This script benchmarks the compiled query engine of search_data_dicts (ddtools/query.py)
+# against the original nested-loop matching on a synthetic corpus of data dictionaries.
+
+import random
+import sys
+import os
+import time
+
+# Add the parent directory where ddtools is located to the path
+# This is necessary to import ddtools
+scripts_dir = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), "..")  # Directory of this script
+)
+sys.path.append(scripts_dir)
+
+from ddtools.query import compile_search
+
+WORDS = (
+    "student enrollment english learner homeless district school marss grade code "
+    "year identifier status assessment score race ethnicity gender birth date program "
+    "special education free reduced lunch attendance graduation cohort test subject"
+).split()
+
+
+def synthetic_corpus(n_tables=500, n_fields=40, seed=0):
+    """
+    Generates a list of ('Data Dictionary For', fields) tuples with random text.
+    """
+    rng = random.Random(seed)
+    corpus = []
+    for t in range(n_tables):
+        dd_for = f"[SERVER].[Database{t % 10}].[dbo].[Table{t}]"
+        fields = []
+        for f in range(n_fields):
+            fields.append(
+                {
+                    "Field Name": "".join(w.title() for w in rng.sample(WORDS, 2)) + str(f),
+                    "Description": " ".join(rng.choice(WORDS) for _ in range(12)),
+                    "Notes": " ".join(rng.choice(WORDS) for _ in range(6)),
+                }
+            )
+        corpus.append((dd_for, fields))
+    return corpus
+
+
+def legacy_match(
+    item,
+    dd_for,
+    search_terms,
+    column_names=["Field Name"],
+    search_term_op="AND",
+    column_op="OR",
+    match_case=False,
+    concat=False,
+):
+    """
+    The matching logic of search_data_dicts before the compiled query engine.
+    """
+    if concat:
+        col_vals = [item[col] for col in column_names]
+        concat_vals = " ".join(col_vals)
+        if search_term_op == "AND":  # Every search term must be in the field
+            if not match_case:
+                if not all(
+                    term.lower() in concat_vals.lower() for term in search_terms
+                ):
+                    return None
+            else:
+                if not all(term in concat_vals for term in search_terms):
+                    return None
+
+        if (
+            search_term_op == "OR"
+        ):  # At least one search term must be in the field
+            if not match_case:
+                if not any(
+                    term.lower() in concat_vals.lower() for term in search_terms
+                ):
+                    return None
+            else:
+                if not any(term in concat_vals for term in search_terms):
+                    return None
+
+        location = f"{dd_for}.[{item['Field Name']}]"
+        return location
+
+    elif not concat:
+        if (
+            column_op == "AND"
+        ):  # Search critera must be met in every column in column_names
+            in_all = True
+            for col in column_names:
+                if (
+                    search_term_op == "AND"
+                ):  # All search terms must be in the field
+                    if not match_case:
+                        if not all(
+                            term.lower() in item[col].lower()
+                            for term in search_terms
+                        ):
+                            in_all = False
+                            break
+                    else:
+                        if not all(term in item[col] for term in search_terms):
+                            in_all = False
+                            break
+                elif (
+                    search_term_op == "OR"
+                ):  # At least one search term must be in the field
+                    if not match_case:
+                        if not any(
+                            term.lower() in item[col].lower()
+                            for term in search_terms
+                        ):
+                            in_all = False
+                            break
+                    else:
+                        if not any(term in item[col] for term in search_terms):
+                            in_all = False
+                            break
+            if in_all:
+                location = f"{dd_for}.[{item['Field Name']}]"
+                return location
+
+        if (
+            column_op == "OR"
+        ):  # Search critera must be met in at least one column in column_names
+            in_any = False
+            for col in column_names:
+                if (
+                    search_term_op == "AND"
+                ):  # All search terms must be in the field
+                    if not match_case:
+                        if all(
+                            term.lower() in item[col].lower()
+                            for term in search_terms
+                        ):
+                            in_any = True
+                            break
+                    else:
+                        if all(term in item[col] for term in search_terms):
+                            in_any = True
+                            break
+                elif (
+                    search_term_op == "OR"
+                ):  # At least one search term must be in the field
+                    if not match_case:
+                        if any(
+                            term.lower() in item[col].lower()
+                            for term in search_terms
+                        ):
+                            in_any = True
+                            break
+                    else:
+                        if any(term in item[col] for term in search_terms):
+                            in_any = True
+                            break
+            if in_any:
+                location = f"{dd_for}.[{item['Field Name']}]"
+                if len(column_names) > 1:
+                    location += f" ({col})"
+                return location
+
+    return None
+
+
+def compiled_match(query, item, dd_for):
+    matched, column = query.match(item)
+    if not matched:
+        return None
+    location = f"{dd_for}.[{item['Field Name']}]"
+    if query.show_column and column is not None:
+        location += f" ({column})"
+    return location
+
+
+def run(corpus, search_terms, column_names, search_term_op, column_op):
+    start = time.perf_counter()
+    legacy = [
+        location
+        for dd_for, fields in corpus
+        for item in fields
+        if (
+            location := legacy_match(
+                item, dd_for, search_terms, column_names, search_term_op, column_op
+            )
+        )
+        is not None
+    ]
+    legacy_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    query = compile_search(search_terms, column_names, search_term_op, column_op)
+    compiled = [
+        location
+        for dd_for, fields in corpus
+        for item in fields
+        if (location := compiled_match(query, item, dd_for)) is not None
+    ]
+    compiled_time = time.perf_counter() - start
+
+    assert legacy == compiled, "The compiled query returned different results"
+    return legacy_time, compiled_time, len(compiled)
+
+
+if __name__ == "__main__":
+    corpus = synthetic_corpus()
+    n_rows = sum(len(fields) for _, fields in corpus)
+    columns = ["Field Name", "Description", "Notes"]
+    rng = random.Random(1)
+    print(f"{n_rows} fields, columns {columns}")
+    print(
+        f"{'terms':>6} {'query':>18} {'legacy (s)':>11} {'compiled (s)':>13} {'matches':>8}"
+    )
+    for n_terms in [1, 5, 25, 50, 100, 250, 500]:
+        # Word fragments, half of which are made rare so the matching is not cut short
+        mixed = [
+            rng.choice(WORDS)[: rng.randint(3, 6)] + ("" if i % 2 else "zq")
+            for i in range(n_terms)
+        ]
+        # Terms that never match, so every term is checked against every column
+        rare = [f"{rng.choice(WORDS)[:4]}zq{i}" for i in range(n_terms)]
+        for label, terms, search_term_op in [
+            ("mixed terms, AND", mixed, "AND"),
+            ("mixed terms, OR", mixed, "OR"),
+            ("rare terms, OR", rare, "OR"),
+        ]:
+            legacy_time, compiled_time, n_matches = run(
+                corpus, terms, columns, search_term_op, "OR"
+            )
+            print(
+                f"{n_terms:>6} {label:>18} {legacy_time:>11.3f} {compiled_time:>13.3f} {n_matches:>8}"
+            )
@@ -0,0 +1,59 @@
+# This script compares the 'pandas' and 'xlsxwriter' workbook writers of dd_json_to_excel on
+# synthetic data dictionaries with many fields and code sheets.
+
+import sys
+import os
+import tempfile
+import time
+import tracemalloc
+
+# Add the parent directory where ddtools is located to the path
+# This is necessary to import ddtools
+scripts_dir = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), "..")  # Directory of this script
+)
+sys.path.append(scripts_dir)
+
+from ddtools.json_excel_conversion import dd_excel_to_json, dd_json_to_excel
+from benchmark_reader import synthetic_data_dict
+
+
+def time_engine(data_dict, path, engine, repeat=3):
+    """
+    Returns the best time of repeat writes and the peak memory (MiB) allocated by one write.
+    """
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        dd_json_to_excel(data_dict, path, engine=engine)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    tracemalloc.start()
+    dd_json_to_excel(data_dict, path, engine=engine)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak / (1024 * 1024)
+
+
+if __name__ == "__main__":
+    print(
+        f"{'fields':>7} {'code sheets':>12} {'pandas (s)':>11} {'xlsxwriter (s)':>15} {'speedup':>8}"
+        f" {'pandas (MiB)':>13} {'xlsxwriter (MiB)':>17}"
+    )
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for n_fields, n_code_sheets, n_codes in [(500, 200, 20), (2000, 200, 20), (500, 200, 500)]:
+            data_dict = synthetic_data_dict(n_fields, n_code_sheets, n_codes)
+            pandas_path = os.path.join(tmp_dir, "pandas_data_dict.xlsx")
+            xlsxwriter_path = os.path.join(tmp_dir, "xlsxwriter_data_dict.xlsx")
+
+            pandas_time, pandas_memory = time_engine(data_dict, pandas_path, "pandas")
+            xlsxwriter_time, xlsxwriter_memory = time_engine(data_dict, xlsxwriter_path, "xlsxwriter")
+            # The workbooks must read back the same
+            assert repr(dd_excel_to_json(pandas_path)) == repr(
+                dd_excel_to_json(xlsxwriter_path)
+            ), "The writers wrote different data dictionaries"
+            print(
+                f"{n_fields:>7} {n_code_sheets:>12} {pandas_time:>11.3f} {xlsxwriter_time:>15.3f}"
+                f" {pandas_time / xlsxwriter_time:>7.1f}x {pandas_memory:>13.1f} {xlsxwriter_memory:>17.1f}"
+            )
@@ -0,0 +1,100 @@
+# This script checks that dd_excel_to_json still returns byte-identical data dictionaries to the
+# original row-by-row normalization on the directories of data dictionaries given on the command
+# line (synthetic workbooks are checked by tests/test_dd_excel_to_json.py):
+#   python scripts/check_dd_excel_to_json.py directory [directory ...]
+
+import json
+import sys
+import os
+import warnings
+
+# Add the parent directory where ddtools is located to the path
+# This is necessary to import ddtools
+scripts_dir = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), "..")  # Directory of this script
+)
+sys.path.append(scripts_dir)
+
+import pandas as pd
+from ddtools.json_excel_conversion import dd_excel_to_json, list_files
+
+
+def legacy_data_dict_records(input_file):
+    """
+    The 'Data Dictionary' records of a workbook, normalized the way dd_excel_to_json did before the
+    normalization was done a column at a time.
+    """
+    xl = pd.ExcelFile(input_file)
+    df_data_dict = xl.parse("Data Dictionary")
+    df_data_dict.columns = df_data_dict.columns.str.strip()
+
+    records = []
+    for index, row in df_data_dict.iterrows():
+        record = row.to_dict()
+
+        # Change all empty cells to "" and strip any leading/trailing whitespace.
+        for key, value in record.items():
+            if pd.isnull(value):
+                record[key] = ""
+            elif isinstance(value, str):
+                record[key] = value.strip()
+
+        # Check if the 'Acceptable Values' indicates there are codes to be read from another sheet
+        if record["Acceptable Values"] == "Codes" or record["Acceptable Values"] == 0:
+            column_name = record["Field Name"].strip()
+
+            # Read the specific sheet for the codes, assuming it is named exactly as the 'Field Name'
+            if column_name in xl.sheet_names:
+                df_codes = xl.parse(column_name, dtype=str)
+                codes_list = df_codes.to_dict(orient="records")
+
+                # Change all empty cells to "NULL" and strip any leading/trailing whitespace. Remove all \n
+                for code in codes_list:
+                    for key, value in code.items():
+                        if pd.isnull(value):
+                            if key == "Code":
+                                code[key] = "NULL"
+                            else:
+                                code[key] = ""
+                        elif isinstance(value, str):
+                            code[key] = value.strip()
+
+                record["Acceptable Values"] = codes_list
+            else:
+                record["Acceptable Values"] = []
+
+        records.append(record)
+    return records
+
+
+def serialize(records):
+    """
+    Serializes records to the JSON written for data dictionaries, followed by their repr so that
+    value types (e.g. 50 vs 50.0) must match too.
+    """
+    return (json.dumps(records, indent=4, default=str) + repr(records)).encode("utf-8")
+
+
+def check(paths):
+    mismatches = 0
+    for path in paths:
+        expected = serialize(legacy_data_dict_records(path))
+        for engine in ["pandas", "openpyxl"]:
+            data_dict = dd_excel_to_json(path, engine=engine)
+            if serialize(data_dict["Data Dictionary"]) != expected:
+                print(f"MISMATCH ({engine}): {path}")
+                mismatches += 1
+    return mismatches
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        sys.exit("Usage: python scripts/check_dd_excel_to_json.py directory [directory ...]")
+    # pandas warns about duplicate columns
+    warnings.simplefilter("ignore", UserWarning)
+    paths = []
+    for directory in sys.argv[1:]:
+        paths.extend(f for f in list_files(directory) if "_data_dict.xlsx" in f)
+    mismatches = check(paths)
+    print(f"Checked {len(paths)} workbooks, {mismatches} mismatches")
+    sys.exit(1 if mismatches else 0)
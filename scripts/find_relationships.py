@@ -2,7 +2,6 @@
 
 import json
 from collections import defaultdict
-from pathlib import Path
 import pygraphviz as pgv
 import re
 import urllib.parse
@@ -16,7 +15,12 @@ scripts_dir = os.path.abspath(
 )
 sys.path.append(scripts_dir)
 
-from ddtools.json_excel_conversion import dd_json_to_excel, dd_excel_to_json
+from ddtools.batch import export_data_dicts, print_batch_report
+from ddtools.corpus_store import load_corpus_store, update_corpus_store
+from ddtools.parallel import iter_load_data_dicts
+from ddtools.records import compact_data_dict, expand_data_dict
+from ddtools.scanner import list_files
+from ddtools.static_index import write_static_search_index
 
 
 class Key:
@@ -196,29 +200,55 @@ class TableEdge:
         self.edge.attr["tooltip"] = tooltip
 
 
-# List all excel files in a given directory
-def list_files(directory, extension=".xlsx"):
-    path = Path(directory)
-    return [str(file) for file in path.rglob(f"*{extension}") if file.is_file()]
-
-
 # Load the data dictionary information from the excel files
-def load_json_data(file_paths):
+# With compact=True, the fields and relationships are compact records (see ddtools/records.py), which keeps
+# the memory of loading every data dictionary down
+def load_json_data(file_paths, use_cache=False, workers=None, compact=False):
+    file_paths = [file_path for file_path in file_paths if "data_dict" in file_path]
     json_data = []
-    for file_path in file_paths:
-        if "data_dict" not in file_path:
+    for file_path, data_dict, error in iter_load_data_dicts(
+        file_paths, workers=workers, use_cache=use_cache
+    ):
+        if error is not None:
+            print(f"Error loading {file_path}: {error}")
             continue
-        data_dict = dd_excel_to_json(file_path)
+        if compact:
+            data_dict = compact_data_dict(data_dict)
         data_dict["File Path"] = file_path
         json_data.append(data_dict)
     return json_data
 
 
-# Write the json data to excel files
-def write_json_data(json_data, replaced, replacer):
-    for data_dict in json_data:
-        new_file_path = data_dict["File Path"].replace(replaced, replacer)
-        dd_json_to_excel(data_dict, new_file_path)
+# Load the data dictionary information from the corpus store of each directory (see ddtools/corpus_store.py),
+# parsing only the workbooks that changed since the store was last updated
+# With field_columns, only those 'Data Dictionary' columns are loaded (e.g. ["Field Name", "Key Information"])
+def load_store_data(directories, workers=None, compact=False, field_columns=None):
+    json_data = []
+    for directory in directories:
+        update_corpus_store(directory, workers=workers)
+        # The store was just updated, so it is not checked against the workbooks again
+        for file_path, data_dict in load_corpus_store(
+            directory, field_columns=field_columns, check_current=False
+        ):
+            if compact:
+                data_dict = compact_data_dict(data_dict)
+            data_dict["File Path"] = file_path
+            json_data.append(data_dict)
+    return json_data
+
+
+# Write the json data to excel files, in a process pool (see ddtools/batch.py)
+def write_json_data(json_data, replaced, replacer, workers=None):
+    report = export_data_dicts(
+        (
+            (data_dict["File Path"].replace(replaced, replacer), expand_data_dict(data_dict))
+            for data_dict in json_data
+        ),
+        total=len(json_data),
+        workers=workers,
+    )
+    print_batch_report(report)
+    return report
 
 
 # Group the data dictionary information by database
@@ -865,10 +895,7 @@ def generate_graph_svg(G, path):
 if __name__ == "__main__":
 
     directories = ["data\\excel_dds\\EDU-SQLPROD01"]
-    files = []
-    for directory in directories:
-        files.extend(list_files(directory))
-    json_data = load_json_data(files)
+    json_data = load_store_data(directories, compact=True)
 
     with open("data\\equivalent_fields.json", "r") as f:
         equivalent_keys = json.load(f)
@@ -885,3 +912,7 @@ if __name__ == "__main__":
 
     with open("mde-data-dicts\\docs\\graph_data.json", "w") as f:
         f.write(json.dumps(graph_json, indent=4))
+
+    # Prebuilt index for searching in the browser without the search service
+    report = write_static_search_index(json_data, "mde-data-dicts\\docs\\search_index")
+    print(f"Wrote the search index ({report['Total Bytes']} bytes)")
@@ -0,0 +1,65 @@
+import datetime
+import math
+import pandas as pd
+import pytest
+from ddtools.corpus_store import load_corpus_store, read_corpus_table, write_corpus_store
+
+CELLS = [
+    datetime.datetime(2024, 1, 2),
+    datetime.datetime(2024, 1, 2, 3, 4, 5, 6),
+    datetime.date(2024, 1, 2),
+    datetime.time(12, 30),
+    datetime.timedelta(days=1, seconds=2, microseconds=3),
+    pd.Timestamp("2024-01-02 03:04:05"),
+    pd.Timedelta("1 days 02:03:04"),
+    "2024-01-02 00:00:00",
+    "",
+    0,
+    1.5,
+    True,
+    None,
+]
+
+
+def data_dict(value):
+    return {
+        "Data Dictionary For": "[server].[database].[dbo].[table]",
+        "Last Updated": value,
+        "Data Dictionary": [
+            {
+                "Field Name": "Field",
+                "Notes": value,
+                "Acceptable Values": [{"Code": value, "Description": "code"}],
+            }
+        ],
+        "Relationships": [],
+        "FAQs": [],
+    }
+
+
+@pytest.mark.parametrize("value", CELLS, ids=repr)
+def test_cells_round_trip(tmp_path, value):
+    store_dir = str(tmp_path / "store")
+    write_corpus_store([("table_data_dict.xlsx", data_dict(value))], store_dir)
+    [(_, loaded)] = load_corpus_store(str(tmp_path), store_dir, check_current=False)
+
+    for cell in (
+        loaded["Last Updated"],
+        loaded["Data Dictionary"][0]["Notes"],
+        loaded["Data Dictionary"][0]["Acceptable Values"][0]["Code"],
+    ):
+        assert type(cell) is type(value)
+        assert cell == value
+    assert loaded == data_dict(value)
+
+
+def test_nan_round_trips(tmp_path):
+    store_dir = str(tmp_path / "store")
+    write_corpus_store([("table_data_dict.xlsx", data_dict(math.nan))], store_dir)
+    frame = read_corpus_table(str(tmp_path), "Fields", ["Notes"], store_dir)
+    assert math.isnan(frame["Notes"][0])
+
+
+def test_unsupported_cells_are_refused(tmp_path):
+    with pytest.raises(TypeError):
+        write_corpus_store([("table_data_dict.xlsx", data_dict(b"bytes"))], str(tmp_path / "store"))
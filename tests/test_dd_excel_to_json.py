@@ -0,0 +1,90 @@
+import datetime
+import os
+import sys
+import openpyxl
+import pytest
+from ddtools.json_excel_conversion import dd_excel_to_json, dd_json_to_excel
+
+# The reference normalization and the synthetic data dictionaries are shared with the scripts
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "scripts"))
+from benchmark_reader import synthetic_data_dict
+from check_dd_excel_to_json import legacy_data_dict_records, serialize
+
+ENGINES = ["pandas", "openpyxl"]
+
+# (fields, code sheets, seed) of the synthetic workbooks
+SYNTHETIC_WORKBOOKS = [(40, 10, 1), (120, 60, 2), (5, 0, 3)]
+WORKBOOKS = [f"synthetic_{n_fields}_{n_code_sheets}" for n_fields, n_code_sheets, _ in SYNTHETIC_WORKBOOKS]
+WORKBOOKS.append("edge_cases")
+
+
+def synthetic_workbook(directory, n_fields, n_code_sheets, seed):
+    """
+    Writes a synthetic workbook with values that need normalizing (padding, NA strings, blanks,
+    numbers in text columns, missing code sheets).
+    """
+    data_dict = synthetic_data_dict(n_fields, n_code_sheets, seed=seed)
+    for i, field in enumerate(data_dict["Data Dictionary"]):
+        if i % 3 == 0:
+            field["Description"] = f"  {field['Description']}\n"
+        if i % 7 == 0:
+            field["Data Type"] = ""
+        if isinstance(field["Acceptable Values"], list) and i % 4 == 0:
+            for code in field["Acceptable Values"]:
+                code["Description"] = f" {code['Description']} "
+    path = os.path.join(directory, f"check_{n_fields}_{n_code_sheets}_data_dict.xlsx")
+    dd_json_to_excel(data_dict, path)
+    return path
+
+
+def edge_case_workbook(directory):
+    """
+    Writes a workbook with cells dd_json_to_excel never writes: blank rows, booleans, dates, mixed
+    column types, headers that are duplicates once stripped and duplicate code sheet headers.
+    """
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.title = "Data Dictionary"
+    sheet.append(
+        ["Field Name", "Acceptable Values", "Notes", "Notes ", "Max Characters", "Flag", "When", "Mixed"]
+    )
+    sheet.append([" A ", "Codes", " n ", "x", 50, True, datetime.datetime(2020, 1, 1), "01"])
+    sheet.append([None] * 8)
+    sheet.append(["B", 0, "N/A", "y", None, False, None, 5])
+    sheet.append(["C", False, "", " z ", 10.5, True, datetime.datetime(2021, 1, 1), "abc"])
+    sheet.append(["D", "Codes", "", "", 7, True, datetime.datetime(2021, 1, 1), 2.5])
+    codes = workbook.create_sheet("A")
+    codes.append(["Code", "Description", "Code"])
+    codes.append([None, " d ", 1])
+    codes.append(["NA", "x", None])
+    workbook.create_sheet("B").append(["Code"])
+    workbook.create_sheet("C")
+    for name in ["Info and Uses", "Legend"]:
+        sheet = workbook.create_sheet(name)
+        sheet.append(["Data Dictionary For", "Notes"])
+        sheet.append(["[SERVER].[Database].[dbo].[Edge]", ""])
+        sheet.append(["(Data Table)", ""])
+    path = os.path.join(directory, "check_edge_cases_data_dict.xlsx")
+    workbook.save(path)
+    return path
+
+
+@pytest.fixture(scope="module")
+def workbooks(tmp_path_factory):
+    directory = str(tmp_path_factory.mktemp("workbooks"))
+    paths = {
+        f"synthetic_{n_fields}_{n_code_sheets}": synthetic_workbook(directory, n_fields, n_code_sheets, seed)
+        for n_fields, n_code_sheets, seed in SYNTHETIC_WORKBOOKS
+    }
+    paths["edge_cases"] = edge_case_workbook(directory)
+    return paths
+
+
+# pandas warns about the duplicate columns of the edge case workbook
+@pytest.mark.filterwarnings("ignore::UserWarning")
+@pytest.mark.parametrize("engine", ENGINES)
+@pytest.mark.parametrize("workbook", WORKBOOKS)
+def test_matches_legacy_normalization(workbooks, workbook, engine):
+    path = workbooks[workbook]
+    data_dict = dd_excel_to_json(path, engine=engine)
+    assert serialize(data_dict["Data Dictionary"]) == serialize(legacy_data_dict_records(path))
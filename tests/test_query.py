@@ -0,0 +1,66 @@
+import pytest
+from ddtools.query import MAX_SUBSTRING_PATTERNS, compile_search, parse_query
+
+RECORDS = [
+    {"Field Name": "{x}", "Description": "braces"},
+    {"Field Name": "a{0}b", "Description": 'say "hi"'},
+    {"Field Name": "path\\to", "Description": "back\\slash"},
+    {"Field Name": "it's", "Description": "}{"},
+    {"Field Name": "plain", "Description": "nothing special"},
+]
+
+SPECIAL_TERMS = ["{x}", "}", "{", "a{0}b", "'", '"', "\\", "\\t", "{!r}"]
+
+
+def matching(query):
+    return [record["Field Name"] for record in RECORDS if query.match(record)[0]]
+
+
+def expected(term, columns):
+    return [
+        record["Field Name"]
+        for record in RECORDS
+        if any(term.lower() in record[col].lower() for col in columns)
+    ]
+
+
+@pytest.mark.parametrize("term", SPECIAL_TERMS)
+def test_compile_search_special_characters(term):
+    columns = ["Field Name", "Description"]
+    assert matching(compile_search([term], columns)) == expected(term, columns)
+
+
+@pytest.mark.parametrize("term", SPECIAL_TERMS)
+def test_compile_search_special_characters_concat(term):
+    columns = ["Field Name", "Description"]
+    query = compile_search([term], columns, concat=True)
+    assert matching(query) == [
+        record["Field Name"]
+        for record in RECORDS
+        if term.lower() in " ".join(record[col] for col in columns).lower()
+    ]
+
+
+def test_compile_search_special_characters_matcher():
+    # Enough patterns to use the multi-pattern matcher instead of substring checks
+    terms = SPECIAL_TERMS + [f"filler{i}" for i in range(MAX_SUBSTRING_PATTERNS)]
+    query = compile_search(terms, ["Field Name"], search_term_op="OR")
+    assert matching(query) == ["{x}", "a{0}b", "path\\to", "it's"]
+
+
+def test_parse_query_special_characters():
+    columns = ["Field Name", "Description"]
+    assert matching(parse_query("{x}", columns)) == ["{x}"]
+    assert matching(parse_query("a{0}b", columns)) == ["a{0}b"]
+    assert matching(parse_query("[Description]:}{", columns)) == ["it's"]
+    assert matching(parse_query("\\", columns)) == ["path\\to"]
+    assert matching(parse_query("it's OR say", columns)) == ["a{0}b", "it's"]
+    assert matching(parse_query("NOT {", columns)) == ["path\\to", "plain"]
+
+
+def test_parse_query_operators():
+    columns = ["Field Name", "Description"]
+    assert matching(parse_query('(plain OR braces) NOT "nothing special"', columns)) == ["{x}"]
+    assert matching(parse_query("[Field Name]:a AND Description:say", columns)) == ["a{0}b"]
+    with pytest.raises(ValueError):
+        parse_query("(plain", columns)